@@ -0,0 +1,294 @@
+import mysql.connector
+from mysql.connector import Error
+import os
+import sys
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+from app.archive_store import ARCHIVE_MODE, archived_table
+from app.blueprints.lookups import CUSTOMER_LOOKUP_QUERY, flight_lookup_query
+from app import routes
+from app.functions import keyset_condition
+
+# Composite indexes backing the keyset-paginated listing and archive pages
+# and the typeahead lookups.
+# InnoDB appends the primary key to every secondary index, so each one also
+# covers the id tie-breaker used in the page cursor.
+# The archived_at indexes go on the table archived rows live in for the
+# current ARCHIVE_MODE (<table>_archive when it is "cold").
+INDEXES = [
+    ('flights', 'idx_flights_active_departure', 'is_archived, departure_time'),
+    (archived_table('flights'), 'idx_flights_archived_at', 'is_archived, archived_at'),
+    ('customers', 'idx_customers_active_name', 'is_archived, last_name, first_name'),
+    (archived_table('customers'), 'idx_customers_archived_at', 'is_archived, archived_at'),
+    ('airports', 'idx_airports_active_location', 'is_archived, country, city'),
+    (archived_table('airports'), 'idx_airports_archived_at', 'is_archived, archived_at'),
+    ('bookings', 'idx_bookings_active_date', 'is_archived, booking_date'),
+    (archived_table('bookings'), 'idx_bookings_archived_at', 'is_archived, archived_at'),
+    # Typeahead lookups: one per UNION branch in app/blueprints/lookups.py.
+    # The flight number one also holds departure_time, so the branch's
+    # ORDER BY sorts index entries only instead of reading every matching row.
+    ('customers', 'idx_customers_active_first_name', 'is_archived, first_name'),
+    ('customers', 'idx_customers_active_email', 'is_archived, email'),
+    ('customers', 'idx_customers_active_ffn', 'is_archived, frequent_flyer_number'),
+    ('flights', 'idx_flights_active_number_departure', 'is_archived, flight_number, departure_time'),
+    ('flights', 'idx_flights_departure_airport_time', 'departure_airport_id, departure_time'),
+    ('flights', 'idx_flights_arrival_airport_time', 'arrival_airport_id, departure_time'),
+]
+
+# FULLTEXT indexes backing the ?q= search on the listing pages. The ngram
+# parser indexes every 2-character sequence, so partial words, codes and
+# emails match too. Column lists must match the MATCH() calls in routes.py.
+# The first FULLTEXT index on a table rebuilds it to add FTS_DOC_ID.
+FULLTEXT_INDEXES = [
+    ('customers', 'ft_customers_search', 'first_name, last_name, email, phone, frequent_flyer_number'),
+    ('airports', 'ft_airports_search', 'airport_code, airport_name, city, state, country, timezone'),
+    ('flights', 'ft_flights_search', 'flight_number, aircraft_type, status, gate'),
+    ('bookings', 'ft_bookings_search', 'booking_reference, seat_number, booking_status'),
+]
+
+# A search term and typeahead prefix to EXPLAIN the search queries with
+SEARCH_QUERY = '+"sm"'
+LOOKUP_PARAMS = {'pattern': 'sm%', 'limit': 20, 'start': None, 'end': None}
+
+def page_one(query, keys, descending, search=''):
+    """The first page of a listing as fetch_page() runs it"""
+    direction = 'DESC' if descending else 'ASC'
+    order_by = ', '.join(f'{column} {direction}' for column, _ in keys)
+    return f"{query}{' AND ' + search if search else ''} ORDER BY {order_by} LIMIT 51"
+
+# A mid-table position to EXPLAIN deeper pages (?after=) from, per sort key
+SAMPLE_POSITION = {
+    'departure_time': '2025-01-01 00:00:00',
+    'booking_date': '2025-01-01 00:00:00',
+    'archived_at': '2025-01-01 00:00:00',
+    'last_name': 'M',
+    'first_name': 'M',
+    'country': 'M',
+    'city': 'M',
+}
+
+def page_after(query, keys, descending):
+    """A later page of a listing (?after=) as fetch_page() runs it; returns (query, params)"""
+    position = [SAMPLE_POSITION.get(key, 1000) for _, key in keys]
+    condition, params = keyset_condition([column for column, _ in keys], position, '<' if descending else '>')
+    return page_one(query + condition, keys, descending), params
+
+def search_params(condition):
+    """Parameters for a search condition, as search_clause() builds them"""
+    return [SEARCH_QUERY] * condition.count('%s')
+
+# The queries the listing, archive, search and typeahead routes run, built
+# from the same constants, checked with EXPLAIN after the migration:
+# (description, query, params, {table alias: index it must use}). An index
+# of None accepts any index (a foreign key or unique index may serve as
+# well); a full scan always fails. Archive queries read archived_table(),
+# so they follow ARCHIVE_MODE.
+LISTING_CHECKS = [
+    ('flights listing', routes.FLIGHTS_LIST_QUERY, routes.FLIGHTS_LIST_KEYS, True,
+     {'f': 'idx_flights_active_departure'}),
+    ('customers listing', routes.CUSTOMERS_LIST_QUERY, routes.CUSTOMERS_LIST_KEYS, False,
+     {'customers': 'idx_customers_active_name'}),
+    ('airports listing', routes.AIRPORTS_LIST_QUERY, routes.AIRPORTS_LIST_KEYS, False,
+     {'airports': 'idx_airports_active_location'}),
+    ('bookings listing', routes.BOOKINGS_LIST_QUERY, routes.BOOKINGS_LIST_KEYS, True,
+     {'b': 'idx_bookings_active_date'}),
+    ('flights archive', routes.ARCHIVED_FLIGHTS_QUERY, routes.ARCHIVED_FLIGHTS_KEYS, True,
+     {'f': 'idx_flights_archived_at'}),
+    ('customers archive', routes.ARCHIVED_CUSTOMERS_QUERY, routes.ARCHIVED_CUSTOMERS_KEYS, True,
+     {'c': 'idx_customers_archived_at'}),
+    ('airports archive', routes.ARCHIVED_AIRPORTS_QUERY, routes.ARCHIVED_AIRPORTS_KEYS, True,
+     {'a': 'idx_airports_archived_at'}),
+    ('bookings archive', routes.ARCHIVED_BOOKINGS_QUERY, routes.ARCHIVED_BOOKINGS_KEYS, True,
+     {'b': 'idx_bookings_archived_at'}),
+]
+
+QUERY_CHECKS = [
+    (description, page_one(query, keys, descending), [], expected)
+    for description, query, keys, descending, expected in LISTING_CHECKS
+] + [
+    # Deeper pages must range-scan the same index from the cursor position
+    (f'{description}, after', *page_after(query, keys, descending), expected)
+    for description, query, keys, descending, expected in LISTING_CHECKS
+] + [
+    ('customers search', page_one(routes.CUSTOMERS_LIST_QUERY, routes.CUSTOMERS_LIST_KEYS, False,
+                                  routes.CUSTOMER_MATCH),
+     search_params(routes.CUSTOMER_MATCH), {'customers': 'ft_customers_search'}),
+    ('airports search', page_one(routes.AIRPORTS_LIST_QUERY, routes.AIRPORTS_LIST_KEYS, False,
+                                 routes.AIRPORT_MATCH),
+     search_params(routes.AIRPORT_MATCH), {'airports': 'ft_airports_search'}),
+    ('flights search', page_one(routes.FLIGHTS_LIST_QUERY, routes.FLIGHTS_LIST_KEYS, True, routes.FLIGHT_SEARCH),
+     search_params(routes.FLIGHT_SEARCH), {
+         'matched_flights': 'ft_flights_search',
+         'matched_airports': 'ft_airports_search',
+         'by_departure': None,
+         'by_arrival': None,
+     }),
+    ('bookings search', page_one(routes.BOOKINGS_LIST_QUERY, routes.BOOKINGS_LIST_KEYS, True, routes.BOOKING_SEARCH),
+     search_params(routes.BOOKING_SEARCH), {
+         'matched_bookings': 'ft_bookings_search',
+         'matched_customers': 'ft_customers_search',
+         'matched_flights': 'ft_flights_search',
+         'matched_airports': 'ft_airports_search',
+         'by_customer': None,
+         'by_flight': None,
+     }),
+    ('customers typeahead', CUSTOMER_LOOKUP_QUERY, LOOKUP_PARAMS, {
+        'by_last_name': 'idx_customers_active_name',
+        'by_first_name': 'idx_customers_active_first_name',
+        'by_email': None,
+        'by_ffn': None,
+    }),
+    ('flights typeahead', flight_lookup_query(by_day=False), LOOKUP_PARAMS, {
+        'by_number': 'idx_flights_active_number_departure',
+        'departure': None,
+        'arrival': None,
+    }),
+    ('flights typeahead by date', flight_lookup_query(by_day=True),
+     dict(LOOKUP_PARAMS, start='2025-01-01', end='2025-01-02'), {'by_day': 'idx_flights_active_departure'}),
+]
+
+# Checks whose keyset predicate must be read as an index range: a full
+# index scan (type index) would walk every earlier page first
+RANGE_CHECKS = {f'{description}, after' for description, *_ in LISTING_CHECKS}
+
+def create_connection():
+    """Create database connection"""
+    try:
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306))
+        )
+        if connection.is_connected():
+            print("[OK] Successfully connected to the database")
+            return connection
+    except Error as e:
+        print(f"[ERROR] Error connecting to database: {e}")
+        return None
+
+def add_indexes(connection):
+    """Create any missing listing and search indexes; return False if any failed (run add_archive_columns.py first)"""
+    cursor = connection.cursor()
+    ok = True
+
+    print(f"\nAdding listing indexes (ARCHIVE_MODE={ARCHIVE_MODE})...")
+
+    indexes = [(table, name, columns, '') for table, name, columns in INDEXES]
+    indexes += [(table, name, columns, 'FULLTEXT') for table, name, columns in FULLTEXT_INDEXES]
+
+    for table, index_name, columns, kind in indexes:
+        try:
+            # Check if index already exists
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM INFORMATION_SCHEMA.STATISTICS
+                WHERE TABLE_SCHEMA = %s
+                AND TABLE_NAME = %s
+                AND INDEX_NAME = %s
+            """, (os.getenv('DB_NAME'), table, index_name))
+
+            result = cursor.fetchone()
+
+            if result[0] == 0:
+                if kind == 'FULLTEXT':
+                    cursor.execute(f"CREATE FULLTEXT INDEX {index_name} ON {table} ({columns}) WITH PARSER ngram")
+                else:
+                    cursor.execute(f"CREATE INDEX {index_name} ON {table} ({columns})")
+                print(f"[OK] Created {index_name} on {table} ({columns})")
+            else:
+                print(f"[SKIP] {index_name} already exists on {table}")
+        except Error as e:
+            print(f"[ERROR] Could not create {index_name} on {table}: {e}")
+            ok = False
+
+    cursor.close()
+    return ok
+
+def check_plan(plan, description, expected, require_range=False):
+    """Print and return whether every aliased table in an EXPLAIN plan uses its expected index.
+
+    With require_range, the index must also be read as a range.
+    """
+    ok = True
+    for alias, index_name in expected.items():
+        rows = [row for row in plan if row['table'] == alias]
+        if not rows:
+            print(f"[ERROR] {description}: no plan row for table {alias}")
+            ok = False
+        for row in rows:
+            if (row['type'] == 'ALL' or row['key'] is None or (index_name and row['key'] != index_name)
+                    or (require_range and row['type'] != 'range')):
+                print(f"[ERROR] {description}: {alias} expected {index_name or 'an index'}"
+                      f"{' read as a range' if require_range else ''}, "
+                      f"got type={row['type']} key={row['key']} rows={row['rows']}")
+                ok = False
+            else:
+                print(f"[OK] {description}: {alias} uses {row['key']} (type={row['type']})")
+    return ok
+
+def verify_indexes(connection):
+    """EXPLAIN each QUERY_CHECKS query; return False if any misses its index.
+
+    A check fails when a table is read with a full scan (type ALL), with
+    no index, or through a different index than the one expected; deeper
+    pages (RANGE_CHECKS) must also read it as a range. Run this
+    against a database with realistic row counts: on a near-empty table
+    the optimizer may rightly prefer a scan.
+    """
+    cursor = connection.cursor(dictionary=True)
+    ok = True
+
+    print(f"\nVerifying query plans (ARCHIVE_MODE={ARCHIVE_MODE})...")
+
+    for description, query, params, expected in QUERY_CHECKS:
+        try:
+            cursor.execute("EXPLAIN " + query, params)
+            plan = cursor.fetchall()
+        except Error as e:
+            print(f"[ERROR] {description}: EXPLAIN failed: {e}")
+            ok = False
+            continue
+        ok = check_plan(plan, description, expected, description in RANGE_CHECKS) and ok
+
+    cursor.close()
+    return ok
+
+def main():
+    """Main function to run migration (pass --check to only verify the plans)"""
+    print("=" * 50)
+    print("Delta Airlines - Add Listing Indexes Migration")
+    print("=" * 50)
+
+    # Create connection
+    connection = create_connection()
+    if not connection:
+        sys.exit(1)
+
+    created = True
+    if '--check' not in sys.argv[1:]:
+        created = add_indexes(connection)
+
+    ok = verify_indexes(connection)
+
+    # Close connection
+    connection.close()
+
+    print("\n" + "=" * 50)
+    if not created:
+        print("[ERROR] Some indexes could not be created")
+    if not ok:
+        print("[ERROR] Some queries are not using their indexes")
+    if created and ok:
+        print("Migration complete!")
+    print("=" * 50)
+
+    if not (created and ok):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
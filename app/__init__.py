@@ -1,11 +1,16 @@
-from flask import Flask, g
+from flask import Flask
 from flask_login import LoginManager
 from .app_factory import create_app
+from .compression import compress_responses
 from .db_connect import close_db, get_db
 from .models import User
+from .query_log import check_query_budget
+from .template_cache import enable_bytecode_cache
+from .user_cache import cache_user, clear_session_claims, get_cached_user, store_session_claims, user_from_session_claims
 
 app = create_app()
 app.secret_key = 'your-secret-key-change-this-in-production'  # Replace with an environment variable
+enable_bytecode_cache(app)
 
 # Initialize Flask-Login
 login_manager = LoginManager()
@@ -16,7 +21,11 @@ login_manager.login_message_category = 'error'
 
 @login_manager.user_loader
 def load_user(user_id):
-    """Load user from database for Flask-Login"""
+    """Load user for Flask-Login from session claims, the user cache, or the database"""
+    user = user_from_session_claims(user_id) or get_cached_user(user_id)
+    if user:
+        return user
+
     db = get_db()
     if db:
         cursor = db.cursor()
@@ -25,25 +34,48 @@ def load_user(user_id):
         cursor.close()
 
         if employee:
-            return User(
+            user = User(
                 employee['employee_id'],
                 employee['email'],
                 employee['first_name'],
                 employee['last_name'],
                 employee['role']
             )
+            cache_user(user)
+            store_session_claims(user)
+            return user
+
+        # The employee is gone; stop trusting any claims in the session
+        clear_session_claims()
     return None
 
 # Register Blueprints
 from . import routes
+from .blueprints.analytics import bp as analytics_bp
+from .blueprints.assets import bp as assets_bp
+from .blueprints.bulk import bp as bulk_bp
+from .blueprints.exports import bp as exports_bp
+from .blueprints.imports import bp as imports_bp
+from .blueprints.lookups import bp as lookups_bp
+from .blueprints.metrics import bp as metrics_bp
 
-@app.before_request
-def before_request():
-    g.db = get_db()
-    if g.db is None:
-        print("Warning: Database connection unavailable. Some features may not work.")
+app.register_blueprint(analytics_bp)
+app.register_blueprint(assets_bp, url_prefix='/assets')
+app.register_blueprint(bulk_bp, url_prefix='/bulk')
+app.register_blueprint(exports_bp, url_prefix='/export')
+app.register_blueprint(imports_bp)
+app.register_blueprint(lookups_bp, url_prefix='/api')
+app.register_blueprint(metrics_bp)
+
+# gzip/brotli for HTML, JSON and other text responses (see compression.py)
+app.wsgi_app = compress_responses(app.wsgi_app)
 
 # Setup database connection teardown
+# Connections are checked out lazily by get_db(), so pages and static assets
+# that never query the database never touch the pool.
 @app.teardown_appcontext
 def teardown_db(exception=None):
-    close_db(exception)
\ No newline at end of file
+    close_db(exception)
+
+# Report requests that ran more queries than their view's @query_budget
+app.teardown_request(check_query_budget)
\ No newline at end of file
@@ -0,0 +1,98 @@
+# Airport reference data, shared by every worker.
+# Airports are few and rarely change, so instead of joining airports
+# twice into every flight and booking listing, the whole table lives in a
+# shared-memory segment (see shared_memory.py) and listings resolve codes
+# and cities from it. The airport write routes bump the segment's version
+# after committing; each worker keeps a decoded copy and rebuilds it only
+# when the version moves. AIRPORT_CACHE_MAX_AGE bounds how stale the copy
+# can get from writes this host never saw (other hosts, CLI scripts).
+import json
+import os
+import threading
+import time
+
+from .archive_store import COLD_ARCHIVE
+from .db_connect import get_db
+from .shared_memory import bump_version, read_header, read_segment, write_segment
+
+SEGMENT_NAME = 'airports'
+AIRPORT_CACHE_MAX_AGE = float(os.getenv('AIRPORT_CACHE_MAX_AGE', 300))
+
+AIRPORT_COLUMNS = 'airport_id, airport_code, airport_name, city, state, country, timezone, is_archived'
+
+_local_lock = threading.Lock()
+# This process's decoded copy: payload version, build time, airport_id -> airport
+_local = {'version': None, 'built_at': 0.0, 'airports': {}}
+
+def load_airports():
+    """Every airport, archived ones included (archived flights still point at them), or None without a database"""
+    db = get_db()
+    if not db:
+        return None
+    query = f"SELECT {AIRPORT_COLUMNS} FROM airports"
+    if COLD_ARCHIVE:
+        query += f" UNION ALL SELECT {AIRPORT_COLUMNS} FROM airports_archive"
+    cursor = db.cursor()
+    cursor.execute(query)
+    rows = cursor.fetchall()
+    cursor.close()
+    return [dict(row, is_archived=bool(row['is_archived'])) for row in rows]
+
+def rebuild():
+    """Load airports from the database into the shared segment and this process's copy"""
+    # Read the version first: a bump that lands while loading leaves the
+    # new payload marked stale rather than hiding the change
+    version = read_header(SEGMENT_NAME)[0]
+    airports = load_airports()
+    if airports is None:
+        return _local['airports']
+    built_at = write_segment(SEGMENT_NAME, version, json.dumps(airports).encode())
+    with _local_lock:
+        _local.update(version=version, built_at=built_at,
+                      airports={airport['airport_id']: airport for airport in airports})
+    return _local['airports']
+
+def get_airports(refresh=False):
+    """Return {airport_id: airport} from the shared cache, rebuilding it if it is stale"""
+    version, payload_version, built_at = read_header(SEGMENT_NAME)
+    fresh = payload_version == version and time.time() - built_at < AIRPORT_CACHE_MAX_AGE
+    if refresh or not fresh:
+        return rebuild()
+    if _local['version'] != payload_version or _local['built_at'] != built_at:
+        # Another worker rebuilt the segment; decode its payload once
+        _, payload_version, built_at, payload = read_segment(SEGMENT_NAME)
+        airports = {airport['airport_id']: airport for airport in json.loads(payload)}
+        with _local_lock:
+            _local.update(version=payload_version, built_at=built_at, airports=airports)
+    return _local['airports']
+
+def active_airports():
+    """Active airports ordered by code, for dropdowns"""
+    airports = get_airports().values()
+    return sorted((a for a in airports if not a['is_archived']), key=lambda a: a['airport_code'])
+
+def add_routes(rows, fields=('code', 'city'), refresh_on_miss=True):
+    """Yield flight-shaped rows with departure_<field>/arrival_<field> filled in from their airport ids.
+
+    fields are airport columns, 'code' meaning airport_code. The cache is
+    read once for the whole listing, and rebuilt at most once if a row
+    points at an airport added since it was built (e.g. on another host).
+    Pass refresh_on_miss=False for rows streamed from an unbuffered
+    cursor, whose connection cannot run another query mid-stream.
+    """
+    airports = get_airports()
+    refreshed = not refresh_on_miss
+    for row in rows:
+        ids = (row['departure_airport_id'], row['arrival_airport_id'])
+        if not refreshed and any(airport_id not in airports for airport_id in ids):
+            airports = get_airports(refresh=True)
+            refreshed = True
+        for prefix, airport_id in zip(('departure', 'arrival'), ids):
+            airport = airports.get(airport_id, {})
+            for field in fields:
+                row[f'{prefix}_{field}'] = airport.get('airport_code' if field == 'code' else field)
+        yield row
+
+def airports_changed():
+    """Mark the cache stale in every worker; call after committing an airport change"""
+    bump_version(SEGMENT_NAME)
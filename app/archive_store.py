@@ -0,0 +1,111 @@
+# Where archived rows live.
+# ARCHIVE_MODE=flag (the default) keeps archived rows in their table with
+# is_archived = TRUE. ARCHIVE_MODE=cold moves them into <table>_archive
+# (created by move_archived_rows.py), so the hot tables and their indexes
+# only hold live rows. Every archive/restore goes through this module so
+# the stats counters stay right in either mode.
+import os
+
+from .counters import booking_deltas, bump_counters, move_deltas, version_deltas
+
+ARCHIVE_MODE = os.getenv('ARCHIVE_MODE', 'flag')
+COLD_ARCHIVE = ARCHIVE_MODE == 'cold'
+
+PRIMARY_KEYS = {
+    'flights': 'flight_id',
+    'customers': 'customer_id',
+    'airports': 'airport_id',
+    'bookings': 'booking_id',
+}
+
+def archived_table(table):
+    """Name of the table holding table's archived rows in the current mode"""
+    return f'{table}_archive' if COLD_ARCHIVE else table
+
+def parent_join(table, alias, key_expr, columns):
+    """Join the parent row whose primary key is key_expr, wherever it lives.
+
+    Archived rows can point at parents that have since been archived
+    themselves, which in cold mode means moved to <table>_archive.
+    columns maps output names to parent columns. Returns (select_sql,
+    join_sql) for splicing into a query.
+    """
+    pk = PRIMARY_KEYS[table]
+    join = f"LEFT JOIN {table} {alias} ON {alias}.{pk} = {key_expr}"
+    if not COLD_ARCHIVE:
+        select = ', '.join(f'{alias}.{column} as {name}' for name, column in columns.items())
+        return select, join
+    cold = f'{alias}_cold'
+    join += f" LEFT JOIN {table}_archive {cold} ON {cold}.{pk} = {key_expr} AND {alias}.{pk} IS NULL"
+    select = ', '.join(f'COALESCE({alias}.{column}, {cold}.{column}) as {name}' for name, column in columns.items())
+    return select, join
+
+def move_rows(cursor, source, target, pk, ids):
+    """Copy rows from source to target and delete them from source.
+
+    Both tables must have the same column order (the cold tables are
+    created with CREATE TABLE ... LIKE), and the caller commits.
+    """
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"INSERT INTO {target} SELECT * FROM {source} WHERE {pk} IN ({placeholders})", ids)
+    cursor.execute(f"DELETE FROM {source} WHERE {pk} IN ({placeholders})", ids)
+
+def lock_rows(cursor, table, ids, archived):
+    """Lock the rows of ids that are currently active (or archived) and return their ids"""
+    pk = PRIMARY_KEYS[table]
+    source = archived_table(table) if archived else table
+    placeholders = ', '.join(['%s'] * len(ids))
+    cursor.execute(f"""
+        SELECT {pk} as id FROM {source}
+        WHERE {pk} IN ({placeholders}) AND is_archived = %s
+        ORDER BY {pk}
+        FOR UPDATE
+    """, [*ids, archived])
+    return [row['id'] for row in cursor.fetchall()]
+
+def archive_rows(cursor, table, ids, employee_id):
+    """Archive the active rows among ids and update the counters; return how many moved (caller commits)"""
+    if not ids:
+        return 0
+    ids = lock_rows(cursor, table, ids, archived=False)
+    if not ids:
+        return 0
+    pk = PRIMARY_KEYS[table]
+    placeholders = ', '.join(['%s'] * len(ids))
+
+    deltas = {}
+    if table == 'bookings':
+        # Take the bookings out of the revenue/status figures while they are still active
+        deltas = booking_deltas(cursor, ids, -1)
+    cursor.execute(f"""
+        UPDATE {table}
+        SET is_archived = TRUE, archived_at = NOW(), archived_by = %s
+        WHERE {pk} IN ({placeholders})
+    """, [employee_id, *ids])
+    if COLD_ARCHIVE:
+        # Fails on a foreign key if active rows still reference these
+        move_rows(cursor, table, f'{table}_archive', pk, ids)
+    bump_counters(cursor, deltas, move_deltas(table, archived=True, count=len(ids)), version_deltas(table))
+    return len(ids)
+
+def restore_rows(cursor, table, ids):
+    """Restore the archived rows among ids and update the counters; return how many moved (caller commits)"""
+    if not ids:
+        return 0
+    ids = lock_rows(cursor, table, ids, archived=True)
+    if not ids:
+        return 0
+    pk = PRIMARY_KEYS[table]
+    placeholders = ', '.join(['%s'] * len(ids))
+
+    if COLD_ARCHIVE:
+        # Fails on a foreign key if a parent row is itself still archived
+        move_rows(cursor, f'{table}_archive', table, pk, ids)
+    cursor.execute(f"""
+        UPDATE {table}
+        SET is_archived = FALSE, archived_at = NULL, archived_by = NULL
+        WHERE {pk} IN ({placeholders})
+    """, ids)
+    deltas = booking_deltas(cursor, ids, 1) if table == 'bookings' else {}
+    bump_counters(cursor, deltas, move_deltas(table, archived=False, count=len(ids)), version_deltas(table))
+    return len(ids)
@@ -0,0 +1,254 @@
+# Revenue analytics computed with pandas.
+# The revenue summary and revenue per route and per day come from the
+# daily_route_revenue rollup (see rollups.py), so those views never
+# rescan booking history; they are as of the last refresh, which the page
+# shows. Figures
+# that need individual bookings (price percentiles, revenue by aircraft)
+# are pulled once per request in columnar chunks from a server-side
+# cursor, and every figure comes from vectorized groupbys over the
+# resulting frames instead of per-row Python. The date range selects
+# bookings by booking day, and the flights departing in it for load
+# factor. pandas and numpy are imported inside the functions that use
+# them, so only the first analytics request pays for loading them rather
+# than every worker's startup.
+import os
+from datetime import date, timedelta
+
+import pymysql
+from flask import Blueprint, abort, jsonify, render_template, request
+from flask_login import login_required
+
+from ..archive_store import parent_join
+from ..db_connect import get_db, iter_chunks
+from ..functions import cached
+from ..query_log import query_budget
+from ..rollups import rollup_as_of, rollup_missing
+
+bp = Blueprint("analytics", __name__, template_folder="../templates")
+
+ANALYTICS_CHUNK_ROWS = int(os.getenv('ANALYTICS_CHUNK_ROWS', 50000))
+ANALYTICS_CACHE_TTL = float(os.getenv('ANALYTICS_CACHE_TTL', 300))
+TOP_ROUTES = 20
+PERCENTILES = [10, 25, 50, 75, 90, 95, 99]
+
+# Seats per aircraft type, for load factor; flights on other types are
+# left out of the load factor figures
+AIRCRAFT_SEATS = {
+    'Airbus A320': 150,
+    'Airbus A321': 191,
+    'Airbus A330': 293,
+    'Airbus A350': 306,
+    'Boeing 717': 110,
+    'Boeing 737': 160,
+    'Boeing 757': 199,
+    'Boeing 767': 211,
+    'Boeing 777': 291,
+}
+
+def route_days_query():
+    """Rollup rows with their airport codes; the airports may have been archived since"""
+    departure_select, departure_join = parent_join(
+        'airports', 'a1', 'r.departure_airport_id', {'departure_code': 'airport_code'})
+    arrival_select, arrival_join = parent_join(
+        'airports', 'a2', 'r.arrival_airport_id', {'arrival_code': 'airport_code'})
+    return f"""
+        SELECT r.day, {departure_select}, {arrival_select}, r.bookings, r.priced, r.revenue
+        FROM daily_route_revenue r
+        {departure_join}
+        {arrival_join}
+        WHERE 1 = 1
+    """
+
+ROUTE_DAY_COLUMNS = ['day', 'departure_code', 'arrival_code', 'bookings', 'priced', 'revenue']
+ROUTE_DAYS_QUERY = route_days_query()
+
+BOOKING_COLUMNS = ['booking_id', 'flight_id', 'booking_status', 'price', 'aircraft_type']
+BOOKINGS_QUERY = """
+    SELECT b.booking_id, b.flight_id, b.booking_status, b.price, f.aircraft_type
+    FROM bookings b
+    JOIN flights f ON b.flight_id = f.flight_id
+    WHERE b.is_archived = FALSE
+"""
+
+FLIGHT_COLUMNS = ['flight_id', 'aircraft_type', 'booked']
+FLIGHTS_QUERY = """
+    SELECT f.flight_id, f.aircraft_type, COUNT(b.booking_id) as booked
+    FROM flights f
+    LEFT JOIN bookings b ON b.flight_id = f.flight_id
+        AND b.is_archived = FALSE AND b.booking_status <> 'Cancelled'
+    WHERE f.is_archived = FALSE
+"""
+
+def empty_frame(columns, dtypes):
+    """A DataFrame with no rows but the columns and dtypes read_frame() would give"""
+    import pandas as pd
+    return pd.DataFrame({column: pd.Series(dtype=dtypes.get(column, 'object')) for column in columns})
+
+def read_frame(query, params, columns, dtypes):
+    """Read a query into a DataFrame, ANALYTICS_CHUNK_ROWS rows at a time"""
+    import pandas as pd
+    frames = [
+        pd.DataFrame.from_records(rows, columns=columns).astype(dtypes)
+        for rows in iter_chunks(query, params, ANALYTICS_CHUNK_ROWS)
+    ]
+    if not frames:
+        return empty_frame(columns, dtypes)
+    return pd.concat(frames, ignore_index=True)
+
+def date_filter(query, column, date_from, date_to):
+    """Add inclusive date bounds on a DATE or DATETIME column to a query ending in its WHERE clause"""
+    params = []
+    if date_from:
+        query += f" AND {column} >= %s"
+        params.append(date_from)
+    if date_to:
+        query += f" AND {column} < %s"
+        params.append(date_to + timedelta(days=1))
+    return query, params
+
+def load_route_days(date_from=None, date_to=None):
+    """Per day and route booking counts and revenue from the rollup, as a DataFrame"""
+    query, params = date_filter(ROUTE_DAYS_QUERY, 'r.day', date_from, date_to)
+    dtypes = {'bookings': 'int64', 'priced': 'int64', 'revenue': 'float64'}
+    try:
+        frame = read_frame(query, params, ROUTE_DAY_COLUMNS, dtypes)
+    except pymysql.err.ProgrammingError as e:
+        # No refresh_rollups.py run yet: show the booking figures without the per-day ones
+        if not rollup_missing(e):
+            raise
+        frame = empty_frame(ROUTE_DAY_COLUMNS, dtypes)
+    route = frame.pop('departure_code').str.cat(frame.pop('arrival_code'), sep='-')
+    frame['route'] = route.astype('category')
+    return frame
+
+def load_bookings(date_from=None, date_to=None):
+    """Active bookings made within the inclusive date range, as a DataFrame"""
+    query, params = date_filter(BOOKINGS_QUERY, 'b.booking_date', date_from, date_to)
+    frame = read_frame(query, params, BOOKING_COLUMNS, {'price': 'float64'})
+    # Low-cardinality labels group much faster as categoricals
+    for column in ('booking_status', 'aircraft_type'):
+        frame[column] = frame[column].astype('category')
+    return frame
+
+def load_flights(date_from=None, date_to=None):
+    """Active flights departing within the inclusive date range, with their booked seat counts"""
+    query, params = date_filter(FLIGHTS_QUERY, 'f.departure_time', date_from, date_to)
+    return read_frame(query + " GROUP BY f.flight_id, f.aircraft_type", params, FLIGHT_COLUMNS, {'booked': 'int64'})
+
+def revenue_breakdown(bookings, by):
+    """Revenue, booking count and average price per value of the by column, highest revenue first"""
+    grouped = bookings.groupby(by, observed=True)['price'].agg(revenue='sum', bookings='size', avg_price='mean')
+    return grouped.sort_values('revenue', ascending=False)
+
+def load_factors(flights):
+    """Per-flight load factor (booked, non-cancelled seats / aircraft seats) for flights of known types"""
+    seats = flights['aircraft_type'].map(AIRCRAFT_SEATS)
+    flights = flights.assign(seats=seats)[seats.notna()]
+    return flights.assign(load_factor=flights['booked'] / flights['seats'])
+
+def records(frame, index_name):
+    """Turn a grouped frame into JSON-ready dicts with plain Python numbers"""
+    import numpy as np
+    frame = frame.reset_index().rename(columns={frame.index.name or 'index': index_name})
+    return [
+        {key: (value.item() if isinstance(value, np.generic) else value) for key, value in row.items()}
+        for row in frame.to_dict('records')
+    ]
+
+def compute_analytics(route_days, bookings, flights):
+    """Compute every analytics figure from rollup, booking and flight frames.
+
+    Pure function of its inputs (no database access), so it can be
+    benchmarked on synthetic frames. The summary, by-route and by-day
+    figures come from the rollup, so they are only as fresh as its last
+    refresh; revenue by aircraft, price percentiles and load factor come
+    from the live bookings and flights, so the two can briefly disagree.
+    """
+    import numpy as np
+    import pandas as pd
+    prices = bookings['price'].dropna().to_numpy()
+    by_route = route_days.groupby('route', observed=True)[['revenue', 'bookings', 'priced']].sum()
+    by_route['avg_price'] = by_route['revenue'] / by_route['priced'].where(by_route['priced'] > 0)
+    by_route = by_route.drop(columns='priced').sort_values('revenue', ascending=False)
+    by_day = route_days.groupby('day')[['revenue', 'bookings']].sum()
+    by_day.index = pd.to_datetime(by_day.index).strftime('%Y-%m-%d')
+    by_aircraft = revenue_breakdown(bookings, 'aircraft_type')
+
+    factors = load_factors(flights)
+    factor_by_aircraft = factors.groupby('aircraft_type').agg(
+        flights=('flight_id', 'size'), booked=('booked', 'sum'), seats=('seats', 'sum'),
+        avg_load_factor=('load_factor', 'mean'),
+    )
+    total_seats = factors['seats'].sum()
+    priced = route_days['priced'].sum()
+    revenue = route_days['revenue'].sum()
+
+    return {
+        'summary': {
+            'bookings': int(route_days['bookings'].sum()),
+            'revenue': float(revenue),
+            'avg_price': float(revenue / priced) if priced else 0.0,
+        },
+        'revenue_by_route': records(by_route.head(TOP_ROUTES).fillna(0), 'route'),
+        'revenue_by_day': records(by_day.sort_index(), 'day'),
+        'revenue_by_aircraft': records(by_aircraft, 'aircraft_type'),
+        'price_percentiles': {
+            f'p{p}': float(value)
+            for p, value in zip(PERCENTILES, np.percentile(prices, PERCENTILES) if len(prices) else [0.0] * len(PERCENTILES))
+        },
+        'load_factor': {
+            'flights': int(len(factors)),
+            # Seat-weighted across all flights, plus the per-type averages
+            'overall': float(factors['booked'].sum() / total_seats) if total_seats else 0.0,
+            'by_aircraft': records(factor_by_aircraft, 'aircraft_type'),
+        },
+    }
+
+def parse_day(value):
+    """Parse an optional YYYY-MM-DD query parameter, aborting with 400 if it is invalid"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f'Invalid date {value!r}; use YYYY-MM-DD.')
+
+def load_rollup_as_of():
+    """When the rollup figures were last brought up to date, as 'YYYY-MM-DD HH:MM', or None"""
+    db = get_db()
+    if not db:
+        return None
+    cursor = db.cursor()
+    as_of = rollup_as_of(cursor)
+    cursor.close()
+    return as_of.isoformat(sep=' ', timespec='minutes') if as_of else None
+
+def get_analytics():
+    """Analytics for the ?from=/?to= date range, cached per range for ANALYTICS_CACHE_TTL"""
+    date_from = parse_day(request.args.get('from'))
+    date_to = parse_day(request.args.get('to'))
+
+    def load():
+        result = compute_analytics(
+            load_route_days(date_from, date_to),
+            load_bookings(date_from, date_to),
+            load_flights(date_from, date_to),
+        )
+        result['rollup_as_of'] = load_rollup_as_of()
+        return result
+
+    return cached(f'analytics:{date_from}:{date_to}', ANALYTICS_CACHE_TTL, load)
+
+@bp.route('/analytics')
+@login_required
+@query_budget(5)
+def analytics():
+    """Revenue analytics page"""
+    return render_template('analytics.html', analytics=get_analytics())
+
+@bp.route('/api/analytics')
+@login_required
+@query_budget(5)
+def analytics_api():
+    """Revenue analytics as JSON"""
+    return jsonify(get_analytics())
@@ -0,0 +1,73 @@
+# Fingerprinted static assets.
+# build_assets.py copies every file under static/assets to static/dist
+# with a content hash in its name, precompresses the text ones to gzip
+# and brotli, and writes a manifest. Templates link assets through
+# asset_url(), which points at the fingerprinted copy when the manifest
+# lists it (falling back to the plain static URL otherwise). Since a
+# fingerprinted name changes whenever the content does, those responses
+# can be cached for a year without revalidation.
+import json
+import mimetypes
+import os
+
+from flask import Blueprint, abort, request, send_file, url_for
+from werkzeug.security import safe_join
+
+bp = Blueprint("assets", __name__, template_folder="../templates")
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static')
+SOURCE_DIR = os.path.join(STATIC_DIR, 'assets')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+# Only text formats shrink; images and fonts are already compressed
+PRECOMPRESSED_EXTENSIONS = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+# (Content-Encoding, file suffix), in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+_manifest = {'mtime': None, 'files': {}}
+
+def load_manifest():
+    """Return {'assets/...': 'assets/....<hash>.ext'}, re-reading the manifest after a rebuild"""
+    try:
+        mtime = os.stat(MANIFEST_PATH).st_mtime_ns
+    except OSError:
+        return {}
+    if mtime != _manifest['mtime']:
+        with open(MANIFEST_PATH, encoding='utf-8') as f:
+            _manifest['files'] = json.load(f)
+        _manifest['mtime'] = mtime
+    return _manifest['files']
+
+@bp.app_template_global()
+def asset_url(filename, **values):
+    """url_for('static', filename=...) that prefers the fingerprinted copy of filename"""
+    hashed = load_manifest().get(filename)
+    if hashed is None:
+        return url_for('static', filename=filename, **values)
+    return url_for('assets.fingerprinted', filename=hashed, **values)
+
+def accepted_encoding(path):
+    """The best precompressed (encoding, path) the client accepts for the file at path, or (None, path)"""
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] and os.path.isfile(path + suffix):
+            return encoding, path + suffix
+    return None, path
+
+@bp.route('/<path:filename>')
+def fingerprinted(filename):
+    """Serve a fingerprinted asset, precompressed when possible, cacheable for a year"""
+    path = safe_join(DIST_DIR, filename)
+    if path is None or path == MANIFEST_PATH or not os.path.isfile(path):
+        abort(404)
+    encoding, path = accepted_encoding(path)
+    mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    if os.path.splitext(filename)[1] in PRECOMPRESSED_EXTENSIONS:
+        response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
@@ -0,0 +1,161 @@
+# Set-based bulk archive and restore.
+# Rows are picked by a list of ids or by a filter and moved in chunks of
+# BULK_CHUNK_SIZE, one short transaction per chunk, so no statement holds
+# row locks on more than one chunk at a time. Works in either
+# ARCHIVE_MODE (see archive_store.py).
+import os
+import time
+from datetime import date
+
+from flask import Blueprint, jsonify, request
+from flask_login import current_user, login_required
+
+from ..airport_cache import airports_changed
+from ..archive_store import archive_rows, archived_table, restore_rows
+from ..db_connect import get_db
+from ..routes import invalidate_stats
+
+bp = Blueprint("bulk", __name__, template_folder="../templates")
+
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 500))
+
+# table -> primary key, and the columns the ?before= and ?status= filters use
+BULK_TABLES = {
+    'flights': {'id': 'flight_id', 'date_column': 'departure_time', 'status_column': 'status'},
+    'customers': {'id': 'customer_id', 'date_column': 'created_at', 'status_column': None},
+    'airports': {'id': 'airport_id', 'date_column': 'created_at', 'status_column': None},
+    'bookings': {'id': 'booking_id', 'date_column': 'booking_date', 'status_column': 'booking_status'},
+}
+
+def read_ids(payload):
+    """Read ids from a JSON list or a comma-separated string; raise ValueError if any is not a number"""
+    ids = payload.get('ids') or []
+    if isinstance(ids, str):
+        ids = [part for part in ids.split(',') if part.strip()]
+    return sorted({int(value) for value in ids})
+
+def filter_clause(table, payload):
+    """Build (' AND ...', params) from the before/status filters; raise ValueError if one does not apply"""
+    spec = BULK_TABLES[table]
+    clause = ''
+    params = []
+    if payload.get('before'):
+        clause += f" AND {spec['date_column']} < %s"
+        params.append(date.fromisoformat(payload['before']))
+    if payload.get('status'):
+        if not spec['status_column']:
+            raise ValueError(f'{table} cannot be filtered by status')
+        clause += f" AND {spec['status_column']} = %s"
+        params.append(payload['status'])
+    return clause, params
+
+def bulk_move(db, table, archive, ids=None, clause='', params=()):
+    """Archive (archive=True) or restore matching rows chunk by chunk.
+
+    With ids, only those rows are considered, and of them only the ones
+    matching clause; without ids every row matching clause is. Each chunk
+    is one transaction: archive_rows()/restore_rows() lock the chunk's
+    rows, move them with set-based statements and update the counters,
+    then it commits. Candidates are read in primary key order so finished
+    rows are never scanned again.
+    Returns {'affected', 'chunks'}.
+    """
+    spec = BULK_TABLES[table]
+    source = table if archive else archived_table(table)
+    result = {'affected': 0, 'chunks': 0}
+    last_id = 0
+    pending = list(ids) if ids is not None else None
+
+    while True:
+        if pending is not None:
+            if not pending:
+                break
+            chunk_ids, pending = pending[:BULK_CHUNK_SIZE], pending[BULK_CHUNK_SIZE:]
+            if clause:
+                placeholders = ', '.join(['%s'] * len(chunk_ids))
+                cursor = db.cursor()
+                cursor.execute(f"""
+                    SELECT {spec['id']} as id FROM {source}
+                    WHERE is_archived = %s AND {spec['id']} IN ({placeholders}){clause}
+                    ORDER BY {spec['id']}
+                """, [not archive, *chunk_ids, *params])
+                chunk_ids = [row['id'] for row in cursor.fetchall()]
+                cursor.close()
+                if not chunk_ids:
+                    continue
+        else:
+            cursor = db.cursor()
+            cursor.execute(f"""
+                SELECT {spec['id']} as id FROM {source}
+                WHERE is_archived = %s AND {spec['id']} > %s{clause}
+                ORDER BY {spec['id']} LIMIT %s
+            """, [not archive, last_id, *params, BULK_CHUNK_SIZE])
+            chunk_ids = [row['id'] for row in cursor.fetchall()]
+            cursor.close()
+            if not chunk_ids:
+                break
+
+        cursor = db.cursor()
+        if archive:
+            moved = archive_rows(cursor, table, chunk_ids, current_user.id)
+        else:
+            moved = restore_rows(cursor, table, chunk_ids)
+        db.commit()
+        cursor.close()
+
+        result['affected'] += moved
+        result['chunks'] += 1
+        last_id = chunk_ids[-1]
+    return result
+
+def bulk_action(table, archive):
+    """Shared handler for the bulk archive and restore endpoints"""
+    if table not in BULK_TABLES:
+        return jsonify({'error': f'unknown table {table}'}), 404
+
+    payload = request.get_json(silent=True) or request.form.to_dict()
+    if not isinstance(payload, dict):
+        return jsonify({'error': 'send a JSON object with ids or filters'}), 400
+    try:
+        ids = read_ids(payload) if payload.get('ids') else None
+        clause, params = filter_clause(table, payload)
+    except (ValueError, TypeError) as e:
+        return jsonify({'error': str(e)}), 400
+    if ids is None and not clause:
+        # Never touch a whole table by accident
+        return jsonify({'error': 'give ids or at least one filter (before, status)'}), 400
+
+    db = get_db()
+    if not db:
+        return jsonify({'error': 'database unavailable'}), 503
+
+    started = time.monotonic()
+    try:
+        result = bulk_move(db, table, archive, ids, clause, params)
+    except Exception as e:
+        db.rollback()
+        # Chunks committed before the failure stay moved
+        return jsonify({'error': str(e)}), 500
+    finally:
+        invalidate_stats()
+        if table == 'airports':
+            airports_changed()
+
+    result.update({
+        'table': table,
+        'action': 'archive' if archive else 'restore',
+        'seconds': round(time.monotonic() - started, 3),
+    })
+    return jsonify(result)
+
+@bp.route('/archive/<table>', methods=['POST'])
+@login_required
+def bulk_archive(table):
+    """Archive rows by ids or filter: {"ids": [...]} or {"before": "YYYY-MM-DD", "status": "..."}"""
+    return bulk_action(table, archive=True)
+
+@bp.route('/restore/<table>', methods=['POST'])
+@login_required
+def bulk_restore(table):
+    """Restore archived rows by ids or filter, as for bulk_archive"""
+    return bulk_action(table, archive=False)
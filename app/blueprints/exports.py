@@ -0,0 +1,147 @@
+# Streaming CSV extracts of bookings and flights for ops and finance.
+# Rows come off an unbuffered server-side cursor and are written out in
+# fixed-size chunks, so memory stays flat however large the extract is;
+# export_csv.py produces the same files from the command line.
+import csv
+import io
+import os
+import zlib
+from datetime import date, timedelta
+
+from flask import Blueprint, Response, abort, request, stream_with_context
+from flask_login import login_required
+
+from ..db_connect import get_db, iter_rows
+from ..query_log import query_budget
+
+bp = Blueprint("exports", __name__, template_folder="../templates")
+
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', 64 * 1024))
+EXPORT_FETCH_SIZE = int(os.getenv('EXPORT_FETCH_SIZE', 1000))
+
+# table -> query (ending in its WHERE clause), output columns, and the
+# date/status columns the ?from=, ?to= and ?status= filters apply to
+EXPORT_SPECS = {
+    'bookings': {
+        'query': """
+            SELECT b.booking_id, b.booking_reference, b.booking_date, b.booking_status,
+                   b.seat_number, b.price,
+                   c.customer_id, c.first_name, c.last_name, c.email, c.frequent_flyer_number,
+                   f.flight_id, f.flight_number, f.departure_time, f.arrival_time,
+                   a1.airport_code as departure_code, a2.airport_code as arrival_code
+            FROM bookings b
+            JOIN customers c ON b.customer_id = c.customer_id
+            JOIN flights f ON b.flight_id = f.flight_id
+            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
+            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
+            WHERE b.is_archived = FALSE
+        """,
+        'columns': [
+            'booking_id', 'booking_reference', 'booking_date', 'booking_status', 'seat_number', 'price',
+            'customer_id', 'first_name', 'last_name', 'email', 'frequent_flyer_number',
+            'flight_id', 'flight_number', 'departure_time', 'arrival_time', 'departure_code', 'arrival_code',
+        ],
+        'date_column': 'b.booking_date',
+        'status_column': 'b.booking_status',
+        'order_by': 'b.booking_date, b.booking_id',
+    },
+    'flights': {
+        'query': """
+            SELECT f.flight_id, f.flight_number,
+                   a1.airport_code as departure_code, a1.city as departure_city,
+                   a2.airport_code as arrival_code, a2.city as arrival_city,
+                   f.departure_time, f.arrival_time, f.aircraft_type, f.status, f.gate
+            FROM flights f
+            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
+            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
+            WHERE f.is_archived = FALSE
+        """,
+        'columns': [
+            'flight_id', 'flight_number', 'departure_code', 'departure_city', 'arrival_code', 'arrival_city',
+            'departure_time', 'arrival_time', 'aircraft_type', 'status', 'gate',
+        ],
+        'date_column': 'f.departure_time',
+        'status_column': 'f.status',
+        'order_by': 'f.departure_time, f.flight_id',
+    },
+}
+
+def export_query(table, date_from=None, date_to=None, status=None):
+    """Build (query, params) for an export, pushing the filters into SQL.
+
+    date_from and date_to are inclusive datetime.date values; status is
+    matched exactly.
+    """
+    spec = EXPORT_SPECS[table]
+    query = spec['query']
+    params = []
+    if date_from:
+        query += f" AND {spec['date_column']} >= %s"
+        params.append(date_from)
+    if date_to:
+        query += f" AND {spec['date_column']} < %s"
+        params.append(date_to + timedelta(days=1))
+    if status:
+        query += f" AND {spec['status_column']} = %s"
+        params.append(status)
+    return query + f" ORDER BY {spec['order_by']}", params
+
+def csv_chunks(rows, columns, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the CSV text for rows (dicts) in chunks of about chunk_size characters"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for row in rows:
+        writer.writerow([row[column] for column in columns])
+        if buffer.tell() >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+def gzip_chunks(chunks):
+    """Gzip a stream of text chunks on the fly, yielding compressed bytes"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def parse_day(value):
+    """Parse an optional YYYY-MM-DD query parameter, aborting with 400 if it is invalid"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        abort(400, description=f'Invalid date {value!r}; use YYYY-MM-DD.')
+
+@bp.route('/<any(bookings, flights):table>.csv')
+@login_required
+@query_budget(2)
+def export_csv(table):
+    """Stream a CSV extract; filters: ?from=, ?to= (YYYY-MM-DD), ?status=, ?gzip=1"""
+    query, params = export_query(
+        table,
+        date_from=parse_day(request.args.get('from')),
+        date_to=parse_day(request.args.get('to')),
+        status=request.args.get('status') or None,
+    )
+    # Check out the connection now: once the stream starts the status is
+    # sent, and a missing database would look like an empty extract
+    if not get_db():
+        abort(503, description='Database unavailable; try the export again shortly.')
+    chunks = csv_chunks(iter_rows(query, params, EXPORT_FETCH_SIZE), EXPORT_SPECS[table]['columns'])
+
+    filename = f'{table}.csv'
+    mimetype = 'text/csv'
+    if request.args.get('gzip') == '1':
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,313 @@
+# Bulk CSV import for customers, flights and bookings.
+# Rows are validated in chunks, inserted with one multi-row executemany()
+# per chunk and committed once per chunk; import_csv.py runs the same
+# import from the command line. Web uploads run inside the request, so
+# they are capped well inside GUNICORN_TIMEOUT: larger files are turned
+# away (to import_csv.py), and an import that still runs long stops between
+# chunks and reports how far it got.
+import csv
+import io
+import itertools
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from flask import Blueprint, flash, redirect, render_template, request, url_for
+from flask_login import login_required
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from ..counters import booking_figures, bump_counters, version_deltas
+from ..db_connect import get_db
+from ..routes import invalidate_stats
+
+bp = Blueprint("imports", __name__, template_folder="../templates")
+
+IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 1000))
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', 5 * 1024 * 1024))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', 50000))
+IMPORT_TIME_LIMIT = float(os.getenv('IMPORT_TIME_LIMIT', 20))
+# Only the first errors are kept for the report; all of them are counted
+MAX_REPORTED_ERRORS = 1000
+
+def text(required=False, max_length=None):
+    """Parser for a text column: blank becomes None, or an error when required"""
+    def parse(value):
+        value = (value or '').strip()
+        if not value:
+            if required:
+                raise ValueError('is required')
+            return None
+        if max_length and len(value) > max_length:
+            raise ValueError(f'is longer than {max_length} characters')
+        return value
+    return parse
+
+def choice(default, options):
+    """Parser for a column limited to options, with a default for blanks"""
+    def parse(value):
+        value = (value or '').strip() or default
+        if value not in options:
+            raise ValueError(f"must be one of {', '.join(options)}")
+        return value
+    return parse
+
+def integer(value):
+    """Parser for a required positive integer id"""
+    try:
+        number = int((value or '').strip())
+    except ValueError:
+        raise ValueError('must be a whole number')
+    if number <= 0:
+        raise ValueError('must be positive')
+    return number
+
+def optional_date(value):
+    """Parser for an optional YYYY-MM-DD date"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError('must be a date like 2025-01-31')
+
+def timestamp(value):
+    """Parser for a required 'YYYY-MM-DD HH:MM[:SS]' (or ISO 'T') datetime"""
+    try:
+        return datetime.fromisoformat((value or '').strip())
+    except ValueError:
+        raise ValueError('must be a date and time like 2025-01-31 14:30')
+
+def money(value):
+    """Parser for an optional non-negative price"""
+    value = (value or '').strip()
+    if not value:
+        return None
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        raise ValueError('must be a number')
+    if not amount.is_finite() or amount < 0:
+        raise ValueError('must be zero or more')
+    return amount.quantize(Decimal('0.01'))
+
+def check_flight(values):
+    """Cross-column checks for a flight row"""
+    if values['departure_airport_id'] == values['arrival_airport_id']:
+        raise ValueError('departure and arrival airports must differ')
+    if values['arrival_time'] <= values['departure_time']:
+        raise ValueError('arrival_time must be after departure_time')
+
+# table -> column parsers in INSERT order, plus an optional row check
+IMPORT_SPECS = {
+    'customers': {
+        'columns': {
+            'first_name': text(required=True, max_length=50),
+            'last_name': text(required=True, max_length=50),
+            'email': text(required=True, max_length=100),
+            'phone': text(max_length=20),
+            'frequent_flyer_number': text(max_length=20),
+            'date_of_birth': optional_date,
+        },
+    },
+    'flights': {
+        'columns': {
+            'flight_number': text(required=True, max_length=10),
+            'departure_airport_id': integer,
+            'arrival_airport_id': integer,
+            'departure_time': timestamp,
+            'arrival_time': timestamp,
+            'aircraft_type': text(max_length=50),
+            'status': text(max_length=20),
+            'gate': text(max_length=10),
+        },
+        'check': check_flight,
+    },
+    'bookings': {
+        'columns': {
+            'booking_reference': text(required=True, max_length=10),
+            'customer_id': integer,
+            'flight_id': integer,
+            'seat_number': text(max_length=10),
+            'booking_status': choice('Confirmed', ['Confirmed', 'Pending', 'Cancelled']),
+            'price': money,
+        },
+    },
+}
+
+def parse_row(table, row):
+    """Validate one CSV row (a dict) and return its values in INSERT order.
+
+    Raises ValueError naming the first bad column.
+    """
+    spec = IMPORT_SPECS[table]
+    values = {}
+    for column, parse in spec['columns'].items():
+        try:
+            values[column] = parse(row.get(column))
+        except ValueError as e:
+            raise ValueError(f'{column} {e}')
+    if spec.get('check'):
+        spec['check'](values)
+    if table == 'flights' and values['status'] is None:
+        values['status'] = 'Scheduled'
+    return tuple(values.values())
+
+def counter_deltas(table, rows):
+    """stats_counters deltas for newly inserted active rows of table"""
+    deltas = {f'{table}_active': len(rows)}
+    if table == 'bookings':
+        columns = list(IMPORT_SPECS['bookings']['columns'])
+        status_at, price_at = columns.index('booking_status'), columns.index('price')
+        deltas.update(booking_figures((values[status_at], values[price_at]) for values in rows))
+    return deltas
+
+def insert_chunk(connection, table, chunk, report):
+    """Insert a chunk of (line_number, values) rows and commit once.
+
+    The whole chunk goes in as one multi-row INSERT. If the database
+    rejects it (a duplicate email, an unknown flight_id, ...), the chunk is
+    retried row by row so only the bad rows are reported and skipped.
+    """
+    columns = list(IMPORT_SPECS[table]['columns'])
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join(['%s'] * len(columns))})"
+
+    cursor = connection.cursor()
+    try:
+        cursor.executemany(query, [values for _, values in chunk])
+        inserted = [values for _, values in chunk]
+    except Exception:
+        connection.rollback()
+        inserted = []
+        for line_number, values in chunk:
+            try:
+                cursor.execute(query, values)
+                inserted.append(values)
+            except Exception as e:
+                add_error(report, line_number, str(e))
+
+    if inserted:
+        bump_counters(cursor, counter_deltas(table, inserted), version_deltas(table))
+    connection.commit()
+    cursor.close()
+    report['inserted'] += len(inserted)
+
+def add_error(report, line_number, message):
+    """Record a rejected row in the report"""
+    report['failed'] += 1
+    if len(report['errors']) < MAX_REPORTED_ERRORS:
+        report['errors'].append({'line': line_number, 'error': message})
+
+def import_rows(connection, table, stream, chunk_size=IMPORT_CHUNK_SIZE, time_limit=None):
+    """Stream a CSV (text file object with a header row) into table.
+
+    Bad rows are reported and skipped rather than aborting the run.
+    Returns {'table', 'rows', 'inserted', 'failed', 'errors', 'seconds',
+    'rows_per_second', 'stopped_at_line'}; errors holds up to
+    MAX_REPORTED_ERRORS {'line', 'error'} entries. With time_limit
+    (seconds), the import stops after the first chunk that ends past it;
+    stopped_at_line is then the last line read (every row up to it is
+    committed or reported), otherwise None.
+    """
+    if table not in IMPORT_SPECS:
+        raise ValueError(f'cannot import into {table}')
+
+    report = {'table': table, 'rows': 0, 'inserted': 0, 'failed': 0, 'errors': [], 'stopped_at_line': None}
+    started = time.monotonic()
+
+    reader = csv.DictReader(stream)
+    missing = [column for column in IMPORT_SPECS[table]['columns'] if column not in (reader.fieldnames or [])]
+    if missing:
+        # Every column must be present in the header, even if left blank
+        add_error(report, 1, f"missing columns: {', '.join(missing)}")
+        report['seconds'] = 0.0
+        report['rows_per_second'] = 0.0
+        return report
+
+    chunk = []
+    for row in reader:
+        report['rows'] += 1
+        try:
+            chunk.append((reader.line_num, parse_row(table, row)))
+        except ValueError as e:
+            add_error(report, reader.line_num, str(e))
+        if len(chunk) >= chunk_size:
+            insert_chunk(connection, table, chunk, report)
+            chunk = []
+            if time_limit is not None and time.monotonic() - started > time_limit:
+                report['stopped_at_line'] = reader.line_num
+                break
+    if chunk:
+        insert_chunk(connection, table, chunk, report)
+
+    report['seconds'] = time.monotonic() - started
+    report['rows_per_second'] = report['rows'] / report['seconds'] if report['seconds'] > 0 else 0.0
+    return report
+
+def count_rows(upload_stream, limit):
+    """Count the data rows of an uploaded CSV, reading no further than limit + 1; rewinds the stream"""
+    stream = io.TextIOWrapper(upload_stream, encoding='utf-8-sig', newline='')
+    try:
+        # The header line is not a data row
+        count = sum(1 for _ in itertools.islice(csv.reader(stream), limit + 2)) - 1
+    finally:
+        # Detach so closing the wrapper does not close the upload
+        stream.detach()
+    upload_stream.seek(0)
+    return max(count, 0)
+
+def too_large(table):
+    """Flash why an upload is too big for the web import and return the redirect"""
+    flash(f"Files over {IMPORT_MAX_ROWS} rows or {IMPORT_MAX_BYTES // (1024 * 1024)} MB are too large to import "
+          f"here. Run: python import_csv.py {table or '<table>'} <file.csv>", 'error')
+    return redirect(url_for('imports.import_form'))
+
+@bp.route('/import', methods=['GET'])
+@login_required
+def import_form():
+    """Show the CSV upload form"""
+    return render_template('imports.html', tables=list(IMPORT_SPECS), specs=IMPORT_SPECS, report=None)
+
+@bp.route('/import', methods=['POST'])
+@login_required
+def import_upload():
+    """Import an uploaded CSV file and show the per-row report"""
+    # Enforced while the body is read, so it also covers chunked uploads
+    # and ones without a Content-Length
+    request.max_content_length = IMPORT_MAX_BYTES
+    try:
+        table = request.form.get('table')
+        upload = request.files.get('file')
+    except RequestEntityTooLarge:
+        return too_large(None)
+    if table not in IMPORT_SPECS or not upload or not upload.filename:
+        flash('Choose a table and a CSV file to import.', 'error')
+        return redirect(url_for('imports.import_form'))
+
+    db = get_db()
+    if not db:
+        flash('Database connection error. Please try again later.', 'error')
+        return redirect(url_for('imports.import_form'))
+
+    try:
+        if count_rows(upload.stream, IMPORT_MAX_ROWS) > IMPORT_MAX_ROWS:
+            return too_large(table)
+        # Decode the upload as it is read instead of loading it into memory
+        stream = io.TextIOWrapper(upload.stream, encoding='utf-8-sig', newline='')
+        report = import_rows(db, table, stream, IMPORT_CHUNK_SIZE, time_limit=IMPORT_TIME_LIMIT)
+    except (UnicodeDecodeError, csv.Error) as e:
+        flash(f'Could not read the CSV file: {e}', 'error')
+        return redirect(url_for('imports.import_form'))
+
+    if report['inserted']:
+        # Imported rows change the dashboard and archive totals
+        invalidate_stats()
+    if report['stopped_at_line']:
+        flash(f"Stopped after {report['seconds']:.0f}s at line {report['stopped_at_line']}: imported "
+              f"{report['inserted']} of the {report['rows']} {table} rows read so far. Import the rest "
+              f"(the rows after line {report['stopped_at_line']}) with import_csv.py.", 'warning')
+    else:
+        flash(f"Imported {report['inserted']} of {report['rows']} {table} rows "
+              f"({report['rows_per_second']:.0f} rows/s).", 'success' if not report['failed'] else 'warning')
+    return render_template('imports.html', tables=list(IMPORT_SPECS), specs=IMPORT_SPECS, report=report)
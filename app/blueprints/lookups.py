@@ -0,0 +1,165 @@
+# JSON typeahead lookups used by the booking forms instead of preloading
+# every customer and flight into <select> lists.
+from datetime import datetime, timedelta
+import os
+
+from flask import Blueprint, jsonify, request
+from flask_login import login_required
+
+from ..db_connect import get_db
+from ..functions import cached
+from ..query_log import query_budget
+
+bp = Blueprint("lookups", __name__, template_folder="../templates")
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+SEARCH_CACHE_TTL = float(os.getenv('SEARCH_CACHE_TTL', 30))
+
+def like_prefix(term):
+    """Escape LIKE wildcards in term and turn it into a prefix pattern"""
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+def get_search_args():
+    """Read the q and limit query parameters, clamping limit to 1..MAX_LIMIT"""
+    term = request.args.get('q', '').strip()
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+    return term, max(1, min(limit, MAX_LIMIT))
+
+def search_response(results):
+    """Return results as JSON that browsers may reuse for the cache TTL"""
+    response = jsonify({'results': results})
+    response.headers['Cache-Control'] = f'private, max-age={int(SEARCH_CACHE_TTL)}'
+    return response
+
+# One index range scan per column, merged by UNION, instead of an OR that
+# would force a full scan. Every branch skips archived rows itself:
+# otherwise they could fill its LIMIT and crowd out live matches. The
+# branch aliases name them in add_indexes.py's EXPLAIN checks.
+CUSTOMER_LOOKUP_QUERY = """
+    SELECT c.customer_id, c.first_name, c.last_name, c.email
+    FROM (
+        (SELECT customer_id FROM customers by_last_name
+         WHERE is_archived = FALSE AND last_name LIKE %(pattern)s LIMIT %(limit)s)
+        UNION
+        (SELECT customer_id FROM customers by_first_name
+         WHERE is_archived = FALSE AND first_name LIKE %(pattern)s LIMIT %(limit)s)
+        UNION
+        (SELECT customer_id FROM customers by_email
+         WHERE is_archived = FALSE AND email LIKE %(pattern)s LIMIT %(limit)s)
+        UNION
+        (SELECT customer_id FROM customers by_ffn
+         WHERE is_archived = FALSE AND frequent_flyer_number LIKE %(pattern)s LIMIT %(limit)s)
+    ) matches
+    JOIN customers c ON c.customer_id = matches.customer_id
+    WHERE c.is_archived = FALSE
+    ORDER BY c.last_name, c.first_name, c.customer_id
+    LIMIT %(limit)s
+"""
+
+FLIGHT_DAY_MATCHES = """
+    (SELECT flight_id FROM flights by_day
+     WHERE is_archived = FALSE AND departure_time >= %(start)s AND departure_time < %(end)s)
+"""
+FLIGHT_TERM_MATCHES = """
+    (SELECT flight_id FROM flights by_number
+     WHERE is_archived = FALSE AND flight_number LIKE %(pattern)s
+     ORDER BY departure_time DESC LIMIT %(limit)s)
+    UNION
+    (SELECT f.flight_id FROM airports departure
+     JOIN flights f ON f.departure_airport_id = departure.airport_id
+     WHERE departure.airport_code LIKE %(pattern)s AND f.is_archived = FALSE
+     ORDER BY f.departure_time DESC LIMIT %(limit)s)
+    UNION
+    (SELECT f.flight_id FROM airports arrival
+     JOIN flights f ON f.arrival_airport_id = arrival.airport_id
+     WHERE arrival.airport_code LIKE %(pattern)s AND f.is_archived = FALSE
+     ORDER BY f.departure_time DESC LIMIT %(limit)s)
+"""
+
+def flight_lookup_query(by_day):
+    """SELECT for the flights typeahead: matching a departure date, or a flight number or airport code prefix"""
+    return f"""
+        SELECT f.flight_id, f.flight_number, f.departure_time,
+               a1.airport_code as departure_code,
+               a2.airport_code as arrival_code
+        FROM ({FLIGHT_DAY_MATCHES if by_day else FLIGHT_TERM_MATCHES}) matches
+        JOIN flights f ON f.flight_id = matches.flight_id
+        JOIN airports a1 ON f.departure_airport_id = a1.airport_id
+        JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
+        WHERE f.is_archived = FALSE
+        ORDER BY f.departure_time DESC, f.flight_id DESC
+        LIMIT %(limit)s
+    """
+
+def find_customers(term, limit):
+    """Prefix-match active customers on name, email or frequent flyer number"""
+    db = get_db()
+    if not db:
+        return None
+
+    cursor = db.cursor()
+    cursor.execute(CUSTOMER_LOOKUP_QUERY, {'pattern': like_prefix(term), 'limit': limit})
+    rows = cursor.fetchall()
+    cursor.close()
+
+    return [{
+        'id': row['customer_id'],
+        'label': f"{row['first_name']} {row['last_name']} - {row['email']}"
+    } for row in rows]
+
+def parse_day(term):
+    """Return the date in a YYYY-MM-DD search term, or None"""
+    try:
+        return datetime.strptime(term, '%Y-%m-%d')
+    except ValueError:
+        return None
+
+def find_flights(term, limit):
+    """Match active flights by flight number prefix, airport code prefix or departure date"""
+    db = get_db()
+    if not db:
+        return None
+
+    day = parse_day(term)
+    cursor = db.cursor()
+    cursor.execute(flight_lookup_query(by_day=day is not None), {
+        'pattern': like_prefix(term),
+        'limit': limit,
+        'start': day,
+        'end': day + timedelta(days=1) if day else None
+    })
+    rows = cursor.fetchall()
+    cursor.close()
+
+    return [{
+        'id': row['flight_id'],
+        'label': f"{row['flight_number']} - {row['departure_code']} → {row['arrival_code']}"
+                 f" ({row['departure_time'].strftime('%b %d, %Y %I:%M %p')})"
+    } for row in rows]
+
+@bp.get("/customers/search")
+@login_required
+@query_budget(2)
+def search_customers():
+    """Typeahead search over active customers"""
+    term, limit = get_search_args()
+    if not term:
+        return search_response([])
+    key = ('customer_search', term.lower(), limit)
+    return search_response(cached(key, SEARCH_CACHE_TTL, lambda: find_customers(term, limit)) or [])
+
+@bp.get("/flights/search")
+@login_required
+@query_budget(2)
+def search_flights():
+    """Typeahead search over active flights"""
+    term, limit = get_search_args()
+    if not term:
+        return search_response([])
+    key = ('flight_search', term.lower(), limit)
+    return search_response(cached(key, SEARCH_CACHE_TTL, lambda: find_flights(term, limit)) or [])
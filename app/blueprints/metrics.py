@@ -0,0 +1,78 @@
+# Operational metrics for tuning the app against production hardware.
+import hmac
+import os
+
+from flask import Blueprint, Response, abort, g, jsonify, request, send_from_directory
+from flask_login import current_user, login_required
+
+from ..instrumentation import collect, finish_request, prometheus_text, set_status, start_request
+from ..passwords import password_stats
+from ..profiler import PROFILES_DIR, finish_profile, requested, start_profile
+
+bp = Blueprint("metrics", __name__, template_folder="../templates")
+
+# Bearer token that lets a Prometheus scraper read /metrics without a login
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
+def require_admin():
+    """Abort with 403 unless the current user is an admin"""
+    if current_user.role != 'admin':
+        abort(403)
+
+@bp.before_app_request
+def before_request():
+    """Start timing every request, and profiling it when an admin asks to"""
+    start_request()
+    if requested():
+        start_profile()
+
+@bp.after_app_request
+def after_request(response):
+    """Note the status the request ended with, and the profile it was written to"""
+    set_status(response.status_code)
+    if 'profile_status' in g:
+        response.headers['X-Profile'] = g.profile_status
+    return response
+
+@bp.teardown_app_request
+def teardown_request(exception=None):
+    """Record the request's latency, queries and render time, and write its profile"""
+    finish_profile()
+    finish_request()
+
+@bp.route('/api/metrics/login')
+@login_required
+def login_metrics():
+    """Password hashing pool counters and queue-wait/hash-time histograms (this worker only)"""
+    require_admin()
+    return jsonify(password_stats())
+
+@bp.route('/api/metrics/profiles')
+@login_required
+def profiles():
+    """Profiles written by this host, newest first"""
+    require_admin()
+    names = os.listdir(PROFILES_DIR) if os.path.isdir(PROFILES_DIR) else []
+    return jsonify(sorted(names, reverse=True))
+
+@bp.route('/api/metrics/profiles/<path:filename>')
+@login_required
+def profile_file(filename):
+    """Download one profile file"""
+    require_admin()
+    return send_from_directory(PROFILES_DIR, filename, as_attachment=True)
+
+@bp.route('/metrics')
+def prometheus():
+    """Every worker's request, database and password metrics in Prometheus text format.
+
+    Open to admins, or to scrapers sending "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    scraper = METRICS_TOKEN and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode())
+    if not scraper and not (current_user.is_authenticated and current_user.role == 'admin'):
+        abort(403)
+    response = Response(prometheus_text(collect()), mimetype='text/plain')
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,184 @@
+# Response compression.
+# Listing pages are large, repetitive HTML (every row repeats the same
+# markup, the add/edit modals repeat the airport dropdown four times), so
+# they shrink 10-20x. compress_responses() wraps the WSGI app and encodes
+# text responses with brotli or gzip, whichever the client prefers through
+# Accept-Encoding. Small bodies are sent as they are: below
+# COMPRESS_MIN_SIZE the CPU costs more than the bytes saved. Streamed
+# responses (stream_page, CSV exports) are compressed chunk by chunk and
+# flushed after each one, so they keep arriving incrementally. Responses
+# that already carry a Content-Encoding (precompressed assets, ?gzip=1
+# exports) pass through untouched.
+import os
+import zlib
+
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# zlib level 1-9; 0 turns compression off (e.g. when a proxy in front does it)
+COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))
+# brotli quality 0-11; 4-5 is where dynamic content stays cheap to encode
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 4))
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript', 'text/xml',
+    'application/json', 'application/javascript', 'application/xml', 'image/svg+xml',
+}
+# No body, or a body whose bytes must match a range or a cached copy
+SKIP_STATUSES = {204, 206, 304}
+
+def choose_encoding(accept_encoding):
+    """The encoding to use for an Accept-Encoding header value ('br', 'gzip' or None)"""
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_header(accept_encoding)
+    candidates = [encoding for encoding in ('br', 'gzip') if encoding != 'br' or brotli]
+    # Highest q-value wins; on a tie the list order (br first) does
+    best = max(candidates, key=lambda encoding: accepted[encoding])
+    return best if accepted[best] > 0 else None
+
+def get_header(headers, name):
+    """Value of a header in a WSGI header list, or None"""
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return None
+
+def set_header(headers, name, value=None):
+    """Replace (or, with value None, remove) a header in a WSGI header list, in place"""
+    headers[:] = [(key, val) for key, val in headers if key.lower() != name.lower()]
+    if value is not None:
+        headers.append((name, value))
+
+def add_vary(headers):
+    """Add Accept-Encoding to the Vary header, so caches keep one copy per encoding"""
+    vary = get_header(headers, 'Vary')
+    if not vary:
+        set_header(headers, 'Vary', 'Accept-Encoding')
+    elif vary.strip() != '*' and 'accept-encoding' not in vary.lower():
+        set_header(headers, 'Vary', f'{vary}, Accept-Encoding')
+
+def weaken_etag(headers):
+    """Mark the ETag weak: the encoded bytes differ from the ones it was computed for"""
+    etag = get_header(headers, 'ETag')
+    if etag and not etag.startswith('W/'):
+        set_header(headers, 'ETag', f'W/{etag}')
+
+def is_compressible(status, headers, environ):
+    """True when a response is a text type this middleware should encode"""
+    content_type = (get_header(headers, 'Content-Type') or '').split(';')[0].strip().lower()
+    cache_control = (get_header(headers, 'Cache-Control') or '').lower()
+    return (
+        content_type in COMPRESSIBLE_TYPES
+        and int(status.split(' ', 1)[0]) not in SKIP_STATUSES
+        and environ.get('REQUEST_METHOD') != 'HEAD'
+        and not get_header(headers, 'Content-Encoding')
+        and 'no-transform' not in cache_control
+    )
+
+def new_encoder(encoding):
+    """Return (compress, flush, finish) functions for a streaming encoder"""
+    if encoding == 'br':
+        compressor = brotli.Compressor(quality=COMPRESS_BROTLI_QUALITY)
+        return compressor.process, compressor.flush, compressor.finish
+    # wbits 31: zlib's deflate with a gzip header and trailer
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, 31)
+    return compressor.compress, lambda: compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+def compress_body(encoding, body):
+    """Encode a complete body in one call"""
+    if encoding == 'br':
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return zlib.compress(body, COMPRESS_LEVEL, wbits=31)
+
+def compressed_stream(encoding, head, rest):
+    """Encode head (the chunks already buffered) and then rest, flushing after every chunk"""
+    compress, flush, finish = new_encoder(encoding)
+    yield b''.join(compress(chunk) for chunk in head) + flush()
+    for chunk in rest:
+        if chunk:
+            data = compress(chunk) + flush()
+            if data:
+                yield data
+    yield finish()
+
+def compress_responses(wsgi_app, min_size=None):
+    """Wrap a WSGI app so its text responses are gzip/brotli encoded when the client accepts it"""
+    if min_size is None:
+        min_size = COMPRESS_MIN_SIZE
+
+    def middleware(environ, start_response):
+        encoding = choose_encoding(environ.get('HTTP_ACCEPT_ENCODING')) if COMPRESS_LEVEL > 0 else None
+        captured = {}
+
+        def send_headers(status, headers):
+            captured['sent'] = True
+            start_response(status, headers)
+
+        def capture_start_response(status, headers, exc_info=None):
+            if exc_info and captured.get('sent'):
+                # An error after the headers went out; the server re-raises it
+                return start_response(status, headers, exc_info)
+            # Before that, an error response simply replaces the captured one
+            captured.update(status=status, headers=headers)
+            # Nothing in Flask writes through this; keep the WSGI contract anyway
+            return lambda data: captured.setdefault('written', []).append(data)
+
+        # Flask calls start_response before returning its iterable
+        app_iter = wsgi_app(environ, capture_start_response)
+        try:
+            status, headers = captured['status'], captured['headers']
+            compressible = is_compressible(status, headers, environ)
+            if compressible:
+                add_vary(headers)
+            if encoding and (compressible or status.startswith('304')):
+                # Weak, so it also matches the tag the client got with a compressed copy
+                weaken_etag(headers)
+            if not compressible or not encoding:
+                send_headers(status, headers)
+                yield from captured.get('written', [])
+                yield from app_iter
+                return
+
+            # Read until the body is known to reach min_size (or ends short of it)
+            chunks = iter(app_iter)
+            head = list(captured.get('written', []))
+            size = sum(len(chunk) for chunk in head)
+            length = get_header(headers, 'Content-Length')
+            ended = False
+            if length is None or int(length) >= min_size:
+                while size < min_size:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        ended = True
+                        break
+                    head.append(chunk)
+                    size += len(chunk)
+
+            if size < min_size:
+                send_headers(status, headers)
+                yield from head
+                yield from chunks
+                return
+
+            set_header(headers, 'Content-Encoding', encoding)
+            if length is not None or ended:
+                # The whole body is already in memory: encode it in one call
+                body = compress_body(encoding, b''.join(head) + b''.join(chunks))
+                set_header(headers, 'Content-Length', str(len(body)))
+                send_headers(status, headers)
+                yield body
+            else:
+                send_headers(status, headers)
+                yield from compressed_stream(encoding, head, chunks)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
+
+    return middleware
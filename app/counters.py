@@ -0,0 +1,136 @@
+# Incrementally maintained statistics kept in the stats_counters table.
+# Every write route updates the counters in the same transaction as the
+# row change, so reading the dashboard/archive stats is a single lookup.
+# The same table holds a version stamp per table ('version:<table>'),
+# bumped by every write to it; listing pages derive their ETags from it.
+
+COUNTED_TABLES = ['flights', 'customers', 'airports', 'bookings']
+
+def merge_deltas(*deltas):
+    """Sum several {counter_name: delta} dicts into one"""
+    merged = {}
+    for part in deltas:
+        for name, delta in part.items():
+            merged[name] = merged.get(name, 0) + delta
+    return merged
+
+def bump_counters(cursor, *deltas):
+    """Add each delta in one or more {counter_name: delta} dicts to its counter, creating missing rows.
+
+    Everything goes through one INSERT ... ON DUPLICATE KEY statement with
+    the counters in name order, so every writer locks stats_counters rows
+    in the same order and concurrent writers cannot deadlock on them. A
+    transaction should call this once, after its row changes, with all of
+    its deltas (booking_deltas(), move_deltas(), version_deltas(), ...).
+    """
+    merged = merge_deltas(*deltas)
+    names = sorted(name for name, delta in merged.items() if delta)
+    if not names:
+        return
+    rows = ', '.join(['(%s, %s)'] * len(names))
+    params = []
+    for name in names:
+        params.extend([name, merged[name]])
+    cursor.execute(f"""
+        INSERT INTO stats_counters (counter_name, counter_value)
+        VALUES {rows}
+        ON DUPLICATE KEY UPDATE counter_value = counter_value + VALUES(counter_value)
+    """, params)
+
+def move_deltas(table, archived, count=1):
+    """Deltas moving count rows of table between its active and archived counters"""
+    source, target = ('active', 'archived') if archived else ('archived', 'active')
+    return {f'{table}_{source}': -count, f'{table}_{target}': count}
+
+def booking_figures(rows, sign=1):
+    """Revenue and status deltas for (booking_status, price) pairs, matching reconcile_counters()"""
+    deltas = {'bookings_revenue': 0, 'bookings_priced': 0}
+    for status, price in rows:
+        if price is not None:
+            deltas['bookings_revenue'] += price * sign
+            deltas['bookings_priced'] += sign
+        if status is not None:
+            deltas[f'status_count:{status}'] = deltas.get(f'status_count:{status}', 0) + sign
+            deltas[f'status_revenue:{status}'] = deltas.get(f'status_revenue:{status}', 0) + (price or 0) * sign
+    return deltas
+
+def booking_deltas(cursor, booking_ids, sign, archived=False):
+    """Deltas adding (sign=1) or removing (sign=-1) bookings' revenue and status figures.
+
+    The figures are read from the stored rows themselves (locking them),
+    so they always match what the reconcile query would compute. Only
+    bookings whose is_archived flag equals archived count.
+    """
+    if not booking_ids:
+        return {}
+    ids = ', '.join(['%s'] * len(booking_ids))
+    cursor.execute(f"""
+        SELECT booking_status, price FROM bookings
+        WHERE booking_id IN ({ids}) AND is_archived = %s
+        FOR UPDATE
+    """, [*booking_ids, archived])
+    return booking_figures([(row['booking_status'], row['price']) for row in cursor.fetchall()], sign)
+
+def version_counter(table):
+    """stats_counters name of table's version stamp"""
+    return f'version:{table}'
+
+def version_deltas(*tables):
+    """Deltas bumping the version stamp of each table, so pages built from it stop matching cached copies"""
+    return {version_counter(table): 1 for table in tables}
+
+def bump_versions(cursor, *tables):
+    """Bump the version stamp of each table (for writes that change no other counter)"""
+    bump_counters(cursor, version_deltas(*tables))
+
+def read_versions(cursor, tables):
+    """Return the version of each of the given tables, in order"""
+    names = [version_counter(table) for table in tables]
+    cursor.execute(f"""
+        SELECT counter_name, counter_value FROM stats_counters
+        WHERE counter_name IN ({', '.join(['%s'] * len(names))})
+    """, names)
+    rows = {row['counter_name']: row['counter_value'] for row in cursor.fetchall()}
+    return [int(rows[name]) if name in rows else 0 for name in names]
+
+def read_counters(cursor):
+    """Return every counter as {counter_name: value} in one query"""
+    cursor.execute("SELECT counter_name, counter_value FROM stats_counters")
+    return {row['counter_name']: row['counter_value'] for row in cursor.fetchall()}
+
+def reconcile_counters(cursor, cold_archive=False):
+    """Rebuild every counter from the base tables (caller commits).
+
+    With cold_archive, rows in the <table>_archive tables count as
+    archived too (see archive_store.py).
+    """
+    sources = [f"""
+        SELECT CONCAT('{table}_', CASE WHEN is_archived THEN 'archived' ELSE 'active' END) as counter_name,
+               COUNT(*) as counter_value
+        FROM {table} WHERE is_archived IS NOT NULL GROUP BY is_archived
+    """ for table in COUNTED_TABLES]
+    if cold_archive:
+        sources += [f"SELECT '{table}_archived', COUNT(*) FROM {table}_archive" for table in COUNTED_TABLES]
+    row_counts = f"""
+        SELECT counter_name, SUM(counter_value) FROM ({' UNION ALL '.join(sources)}) as row_counts
+        GROUP BY counter_name
+    """
+    # Version stamps are not derived from the rows; resetting them could
+    # make an old ETag match again
+    cursor.execute("DELETE FROM stats_counters WHERE counter_name NOT LIKE 'version:%'")
+    cursor.execute(f"""
+        INSERT INTO stats_counters (counter_name, counter_value)
+        {row_counts}
+        UNION ALL
+        SELECT 'bookings_revenue', COALESCE(SUM(price), 0) FROM bookings WHERE is_archived = FALSE
+        UNION ALL
+        SELECT 'bookings_priced', COUNT(price) FROM bookings WHERE is_archived = FALSE
+        UNION ALL
+        SELECT CONCAT('status_count:', booking_status), COUNT(*)
+        FROM bookings WHERE is_archived = FALSE AND booking_status IS NOT NULL
+        GROUP BY booking_status
+        UNION ALL
+        SELECT CONCAT('status_revenue:', booking_status), COALESCE(SUM(price), 0)
+        FROM bookings WHERE is_archived = FALSE AND booking_status IS NOT NULL
+        GROUP BY booking_status
+    """)
@@ -2,38 +2,317 @@ import pymysql
 import pymysql.cursors
 from flask import g
 import os
+import threading
+import time
+from functools import wraps
 from dotenv import load_dotenv
 
 load_dotenv()
 
-def get_db():
-    if 'db' not in g or not is_connection_open(g.db):
-        print("Re-establishing closed database connection.")
+# Connection pool settings (per worker process)
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 1))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+POOL_IDLE_TIMEOUT = float(os.getenv('DB_POOL_IDLE_TIMEOUT', 300))
+POOL_MAX_LIFETIME = float(os.getenv('DB_POOL_MAX_LIFETIME', 3600))
+POOL_CHECKOUT_TIMEOUT = float(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', 5))
+POOL_HEALTH_CHECK_AFTER = float(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', 30))
+
+# Pool state: idle entries are dicts of {'conn', 'created_at', 'last_used'}
+_pool_lock = threading.Condition()
+_pool = {}
+
+def _new_pool_state():
+    """Return an empty pool state for the current process"""
+    return {
+        'pid': os.getpid(),
+        'idle': [],
+        'size': 0,
+        'created': 0,
+        'closed': 0,
+        'checkouts': 0,
+        'timeouts': 0,
+        'health_checks': 0,
+        'wait_time': 0.0,
+    }
+
+# Instrumentation hooks: event -> listeners. 'query' listeners are called
+# as listener(statement, seconds) after every statement a pooled
+# connection runs; 'checkout' listeners as listener(seconds) after each
+# get_db() checkout (seconds spent waiting for or opening a connection)
+_listeners = {'query': [], 'checkout': []}
+
+def add_db_listener(event, listener):
+    """Register a listener for 'query' or 'checkout' events"""
+    _listeners[event].append(listener)
+
+def _notify(event, *args):
+    """Call every listener registered for event"""
+    for listener in _listeners[event]:
+        listener(*args)
+
+def _timed_execute(execute):
+    """Wrap a cursor's execute so 'query' listeners see each statement's duration.
+
+    executemany() runs its statements through execute(), so wrapping
+    execute covers it too; callproc() does not (see _timed_callproc).
+    """
+    @wraps(execute)
+    def timed_execute(query, args=None):
+        started = time.perf_counter()
+        try:
+            return execute(query, args)
+        finally:
+            _notify('query', query, time.perf_counter() - started)
+    return timed_execute
+
+def _timed_callproc(callproc):
+    """Wrap a cursor's callproc, which PyMySQL runs without going through execute()"""
+    @wraps(callproc)
+    def timed_callproc(procname, args=()):
+        started = time.perf_counter()
         try:
-            g.db = pymysql.connect(
-                # Database configuration from environment variables
-                host=os.getenv('DB_HOST'),
-                user=os.getenv('DB_USER'),
-                password=os.getenv('DB_PASSWORD'),
-                database=os.getenv('DB_NAME'),
-                port=int(os.getenv('DB_PORT', 3306)),
-                cursorclass=pymysql.cursors.DictCursor  # Set the default cursor class to DictCursor
-            )
-        except Exception as e:
-            print(f"Database connection failed: {e}")
+            return callproc(procname, args)
+        finally:
+            _notify('query', f'CALL {procname}()', time.perf_counter() - started)
+    return timed_callproc
+
+def _instrument(conn):
+    """Make every cursor conn hands out report its queries (no-op while nobody listens)"""
+    new_cursor = conn.cursor
+
+    @wraps(new_cursor)
+    def cursor(*args, **kwargs):
+        cur = new_cursor(*args, **kwargs)
+        if _listeners['query']:
+            cur.execute = _timed_execute(cur.execute)
+            cur.callproc = _timed_callproc(cur.callproc)
+        return cur
+    conn.cursor = cursor
+    return conn
+
+def reset_pool():
+    """Forget every pooled connection without closing it (used after fork)"""
+    with _pool_lock:
+        _pool.clear()
+        _pool.update(_new_pool_state())
+        _pool_lock.notify_all()
+
+def _ensure_pool():
+    """Start a fresh pool if this is a new process (e.g. a forked gunicorn worker)"""
+    if _pool.get('pid') != os.getpid():
+        reset_pool()
+
+def _open_connection():
+    """Open a new PyMySQL connection, or return None on failure"""
+    try:
+        return _instrument(pymysql.connect(
+            # Database configuration from environment variables
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306)),
+            cursorclass=pymysql.cursors.DictCursor  # Set the default cursor class to DictCursor
+        ))
+    except Exception as e:
+        print(f"Database connection failed: {e}")
+        return None
+
+def _close_quietly(conn):
+    """Close a connection, ignoring errors from an already broken socket"""
+    try:
+        if not conn._closed:
+            conn.close()
+    except Exception:
+        pass
+
+def _discard(entry):
+    """Close a pooled connection and free its slot (caller holds the lock)"""
+    _close_quietly(entry['conn'])
+    _pool['size'] -= 1
+    _pool['closed'] += 1
+    _pool_lock.notify()
+
+def _is_expired(entry, now):
+    """Check max lifetime and idle timeout (idle timeout never shrinks below min size)"""
+    if now - entry['created_at'] > POOL_MAX_LIFETIME:
+        return True
+    return now - entry['last_used'] > POOL_IDLE_TIMEOUT and _pool['size'] > POOL_MIN_SIZE
+
+def _reserve(deadline):
+    """Pop a usable idle entry or reserve a slot for a new connection.
+
+    Returns (entry, None) for an idle connection, (None, True) when a new
+    connection may be opened, and (None, False) when the checkout timed out.
+    """
+    with _pool_lock:
+        while True:
+            now = time.monotonic()
+            while _pool['idle']:
+                entry = _pool['idle'].pop()  # LIFO keeps the warmest connection in use
+                if _is_expired(entry, now):
+                    _discard(entry)
+                    continue
+                return entry, None
+            if _pool['size'] < POOL_MAX_SIZE:
+                _pool['size'] += 1
+                return None, True
+            remaining = deadline - now
+            if remaining <= 0:
+                _pool['timeouts'] += 1
+                return None, False
+            _pool_lock.wait(remaining)
+
+def _checkout():
+    """Check a connection out of the pool, or return None if none is available"""
+    _ensure_pool()
+    started = time.monotonic()
+    deadline = started + POOL_CHECKOUT_TIMEOUT
+    while True:
+        entry, may_open = _reserve(deadline)
+        if entry is not None:
+            # Only ping connections that have sat idle long enough to have gone stale
+            if time.monotonic() - entry['last_used'] > POOL_HEALTH_CHECK_AFTER:
+                with _pool_lock:
+                    _pool['health_checks'] += 1
+                if not is_connection_open(entry['conn']):
+                    with _pool_lock:
+                        _discard(entry)
+                    continue
+            break
+        if not may_open:
+            print("Database pool exhausted: checkout timed out.")
+            return None
+        conn = _open_connection()
+        if conn is None:
+            with _pool_lock:
+                _pool['size'] -= 1
+                _pool_lock.notify()
+            return None
+        now = time.monotonic()
+        entry = {'conn': conn, 'created_at': now, 'last_used': now}
+        with _pool_lock:
+            _pool['created'] += 1
+        break
+    with _pool_lock:
+        _pool['checkouts'] += 1
+        _pool['wait_time'] += time.monotonic() - started
+    return entry
+
+def _checkin(entry):
+    """Return a connection to the pool, discarding it if it is unusable"""
+    conn = entry['conn']
+    try:
+        # End any open transaction so the next request does not see a stale snapshot
+        conn.rollback()
+        healthy = not conn._closed
+    except Exception:
+        healthy = False
+    with _pool_lock:
+        if _pool.get('pid') != os.getpid():
+            _close_quietly(conn)
+            return
+        if not healthy:
+            _discard(entry)
+            return
+        entry['last_used'] = time.monotonic()
+        _pool['idle'].append(entry)
+        _pool_lock.notify()
+
+def warm_pool():
+    """Open connections until the pool holds at least POOL_MIN_SIZE"""
+    _ensure_pool()
+    entries = []
+    while len(entries) < POOL_MIN_SIZE:
+        entry = _checkout()
+        if entry is None:
+            break
+        entries.append(entry)
+    for entry in entries:
+        _checkin(entry)
+
+def close_pool():
+    """Close every idle connection held by this process"""
+    with _pool_lock:
+        while _pool.get('idle'):
+            _discard(_pool['idle'].pop())
+
+def pool_stats():
+    """Return a snapshot of the pool counters for this process"""
+    _ensure_pool()
+    with _pool_lock:
+        stats = {key: value for key, value in _pool.items() if key != 'idle'}
+        stats['idle'] = len(_pool['idle'])
+        stats['in_use'] = _pool['size'] - stats['idle']
+        stats['max_size'] = POOL_MAX_SIZE
+        stats['min_size'] = POOL_MIN_SIZE
+    return stats
+
+def get_db():
+    """Check out this request's connection on first use and reuse it afterwards"""
+    if g.get('db') is None:
+        started = time.perf_counter()
+        entry = _checkout()
+        _notify('checkout', time.perf_counter() - started)
+        if entry is None:
+            print("Warning: Database connection unavailable. Some features may not work.")
             g.db = None
             return None
+        g.db_entry = entry
+        g.db = entry['conn']
     return g.db
 
 def is_connection_open(conn):
     try:
-        conn.ping(reconnect=True)  # PyMySQL's way to check connection health
+        conn.ping(reconnect=False)  # PyMySQL's way to check connection health
         return True
     except:
         return False
 
 def close_db(exception=None):
-    db = g.pop('db', None)
-    if db is not None and not db._closed:
-        print("Closing database connection.")
-        db.close()
\ No newline at end of file
+    g.pop('db', None)
+    entry = g.pop('db_entry', None)
+    if entry is not None:
+        _checkin(entry)
+
+def iter_rows(query, params=None, batch_size=500):
+    """Yield rows one at a time from an unbuffered server-side cursor.
+
+    Nothing is sent to MySQL until the first row is requested, and at most
+    batch_size rows are held in memory at once. The connection cannot run
+    other queries until the generator is exhausted or closed, so fetch
+    anything else first.
+    """
+    db = get_db()
+    if not db:
+        return
+    cursor = db.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchmany(batch_size)
+        while rows:
+            yield from rows
+            rows = cursor.fetchmany(batch_size)
+    finally:
+        # Drains any unread rows so the connection can go back to the pool
+        cursor.close()
+
+def iter_chunks(query, params=None, size=10000):
+    """Yield lists of up to size row tuples from an unbuffered server-side cursor.
+
+    Tuples (rather than dicts) are cheap to turn into columnar frames; the
+    caller knows the column order from its SELECT. The same connection
+    caveat as iter_rows() applies.
+    """
+    db = get_db()
+    if not db:
+        return
+    cursor = db.cursor(pymysql.cursors.SSCursor)
+    try:
+        cursor.execute(query, params)
+        rows = cursor.fetchmany(size)
+        while rows:
+            yield rows
+            rows = cursor.fetchmany(size)
+    finally:
+        cursor.close()
@@ -1 +1,227 @@
 # Function will go in here for the entire site to use
+import base64
+import json
+import math
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal
+
+from flask import Response, flash, request, stream_template
+
+# Per-process TTL cache: key -> (expires_at, value)
+CACHE_MAX_ENTRIES = 1000
+_cache = {}
+_cache_lock = threading.Lock()
+
+def cache_get(key):
+    """Return a cached value, or None if it is missing or expired"""
+    with _cache_lock:
+        item = _cache.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del _cache[key]
+            return None
+        return item[1]
+
+def cache_set(key, value, ttl):
+    """Cache a value for ttl seconds (a ttl of 0 disables caching)"""
+    if ttl <= 0:
+        return
+    with _cache_lock:
+        now = time.monotonic()
+        if len(_cache) >= CACHE_MAX_ENTRIES:
+            # Drop expired entries first, then the oldest ones
+            for stale in [k for k, item in _cache.items() if item[0] < now]:
+                del _cache[stale]
+            while len(_cache) >= CACHE_MAX_ENTRIES:
+                del _cache[next(iter(_cache))]
+        _cache[key] = (now + ttl, value)
+
+def cache_delete(*keys):
+    """Drop one or more keys from the cache"""
+    with _cache_lock:
+        for key in keys:
+            _cache.pop(key, None)
+
+def cached(key, ttl, loader):
+    """Return the cached value for key, calling loader() to fill it on a miss.
+
+    A loader result of None is returned but not cached, so a failed load
+    (e.g. the database is down) is retried on the next call.
+    """
+    value = cache_get(key)
+    if value is None:
+        value = loader()
+        if value is not None:
+            cache_set(key, value, ttl)
+    return value
+
+# Keyset pagination
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+def encode_cursor(values):
+    """Encode a row's sort-key values as an opaque URL-safe token"""
+    def pack(value):
+        if isinstance(value, datetime):
+            return {'dt': value.isoformat()}
+        if isinstance(value, Decimal):
+            return {'dec': str(value)}
+        return value
+    raw = json.dumps([pack(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(token, size):
+    """Decode a token from encode_cursor(), or return None if it is missing or invalid"""
+    if not token:
+        return None
+    def unpack(value):
+        if isinstance(value, dict) and set(value) == {'dt'} and isinstance(value['dt'], str):
+            return datetime.fromisoformat(value['dt'])
+        if isinstance(value, dict) and set(value) == {'dec'} and isinstance(value['dec'], str):
+            return Decimal(value['dec'])
+        # Anything else (lists, other dicts, booleans) is not a sort key value
+        if isinstance(value, (str, int)) and not isinstance(value, bool):
+            return value
+        if isinstance(value, float) and math.isfinite(value):
+            return value
+        raise ValueError(f'invalid cursor value {value!r}')
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list):
+            return None
+        values = [unpack(value) for value in values]
+    except (ValueError, TypeError, ArithmeticError):
+        return None
+    if len(values) != size:
+        return None
+    return values
+
+def keyset_condition(columns, values, op):
+    """Return (' AND ...', params) selecting rows past values in the order of columns.
+
+    Written out as a < x OR (a = x AND (b < y OR ...)) rather than the row
+    constructor (a, b) < (x, y), which MySQL does not reliably turn into
+    an index range; op is '<' or '>'.
+    """
+    condition = f"{columns[-1]} {op} %s"
+    params = [values[-1]]
+    for column, value in zip(reversed(columns[:-1]), reversed(values[:-1])):
+        condition = f"{column} {op} %s OR ({column} = %s AND ({condition}))"
+        params = [value, value] + params
+    return f" AND ({condition})", params
+
+def get_page_size():
+    """Read the per_page query parameter, clamped to 1..MAX_PAGE_SIZE"""
+    try:
+        per_page = int(request.args.get('per_page', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        per_page = DEFAULT_PAGE_SIZE
+    return max(1, min(per_page, MAX_PAGE_SIZE))
+
+def fetch_page(cursor, query, params, keys, descending):
+    """Fetch one keyset page of rows for the current request.
+
+    query is a SELECT ending in its WHERE clause (no ORDER BY or LIMIT).
+    keys lists (sql_column, row_key) pairs giving the sort order; the last
+    one must be unique (the primary key) so every row has a distinct
+    position. The ?after= and ?before= tokens move forwards and backwards.
+    Returns {'rows', 'next', 'prev', 'per_page'}, where next/prev are tokens
+    or None at either end.
+    """
+    per_page = get_page_size()
+    after = decode_cursor(request.args.get('after'), len(keys))
+    before = None if after else decode_cursor(request.args.get('before'), len(keys))
+    backwards = before is not None
+
+    # Walking backwards flips both the comparison and the sort direction
+    reverse = descending != backwards
+    direction = 'DESC' if reverse else 'ASC'
+    order_by = ', '.join(f'{column} {direction}' for column, _ in keys)
+
+    params = list(params)
+    position = after or before
+    if position:
+        condition, position_params = keyset_condition([column for column, _ in keys], position,
+                                                      '<' if reverse else '>')
+        query += condition
+        params.extend(position_params)
+    cursor.execute(f"{query} ORDER BY {order_by} LIMIT %s", params + [per_page + 1])
+    rows = list(cursor.fetchall())
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def token(row):
+        return encode_cursor([row[key] for _, key in keys])
+
+    page = {'rows': rows, 'next': None, 'prev': None, 'per_page': per_page}
+    if rows:
+        if backwards or has_more:
+            page['next'] = token(rows[-1])
+        if after or (backwards and has_more):
+            page['prev'] = token(rows[0])
+    return page
+
+# Streamed rendering
+STREAM_CHUNK_SIZE = 16 * 1024
+
+def wants_stream():
+    """True when the request opted into streaming every row (?stream=1)"""
+    return request.args.get('stream') == '1'
+
+def stream_page(template_name, **context):
+    """Stream a template, sending output in chunks of about STREAM_CHUNK_SIZE bytes.
+
+    Jinja yields many tiny strings; coalescing them keeps the first byte
+    early without paying a socket write per fragment.
+    """
+    def coalesce(fragments):
+        buffer = []
+        size = 0
+        for fragment in fragments:
+            buffer.append(fragment)
+            size += len(fragment)
+            if size >= STREAM_CHUNK_SIZE:
+                yield ''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield ''.join(buffer)
+    return Response(coalesce(stream_template(template_name, **context)), mimetype='text/html')
+
+# Server-side search
+# Shortest word the ngram parser can match (the default ngram_token_size)
+MIN_SEARCH_WORD = 2
+
+def fulltext_terms(term):
+    """Turn free text into a BOOLEAN MODE query that requires every word.
+
+    Each word becomes a quoted phrase so the ngram parser matches it as a
+    substring; words shorter than MIN_SEARCH_WORD are dropped because they
+    cannot match anything.
+    """
+    words = [word.replace('"', '') for word in term.split()]
+    return ' '.join(f'+"{word}"' for word in words if len(word) >= MIN_SEARCH_WORD)
+
+def search_clause(condition):
+    """Return (' AND condition', params) for the ?q= search box, or ('', []) without one.
+
+    condition is a WHERE fragment whose %s placeholders all take the
+    BOOLEAN MODE query built from the search term. A term whose words are
+    all too short to match returns no rows (with a message saying why)
+    rather than silently listing everything.
+    """
+    term = request.args.get('q', '')
+    query = fulltext_terms(term)
+    if not query:
+        if not term.strip():
+            return '', []
+        flash(f'Search terms must be at least {MIN_SEARCH_WORD} characters long.', 'warning')
+        return ' AND FALSE', []
+    return f' AND {condition}', [query] * condition.count('%s')
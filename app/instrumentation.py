@@ -0,0 +1,281 @@
+# Per-request instrumentation, exported as Prometheus text at /metrics.
+# Each request records its latency, the number and total time of its
+# database queries (through db_connect's listeners), how long get_db()
+# waited for a connection and how long its templates took to render.
+# Series are labelled by endpoint name only, so their number is bounded by
+# the app's routes however many distinct URLs are hit.
+#
+# Counters live in each worker process. Every worker writes a snapshot of
+# its own (plus its pool_stats() and password_stats()) to a small JSON file
+# under SHARED_CACHE_DIR at most every METRICS_FLUSH_INTERVAL seconds, and
+# /metrics sums the snapshots, so a scrape that lands on any one worker
+# still reports all of them.
+import glob
+import json
+import os
+import threading
+import time
+
+from flask import before_render_template, g, has_request_context, request, template_rendered
+
+from .db_connect import add_db_listener, pool_stats
+from .passwords import LATENCY_BUCKETS, password_stats
+from .shared_memory import SHARED_CACHE_DIR
+
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 1))
+# Snapshots of workers that exited are dropped after this many seconds
+METRICS_RETENTION = float(os.getenv('METRICS_RETENTION', 3600))
+
+QUERY_COUNT_BUCKETS = [0, 1, 2, 3, 5, 10, 20, 50, 100]
+
+# name -> (type, help text, bucket bounds for histograms)
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by route and status.', None),
+    'http_request_duration_seconds': ('histogram', 'Request latency, by route.', LATENCY_BUCKETS),
+    'http_request_db_queries': ('histogram', 'Database queries per request, by route.', QUERY_COUNT_BUCKETS),
+    'http_request_db_seconds': ('histogram', 'Time spent in database queries per request, by route.', LATENCY_BUCKETS),
+    'http_request_template_seconds': ('histogram', 'Template render time per request, by route.', LATENCY_BUCKETS),
+    'db_pool_wait_seconds': ('histogram', 'Time get_db() took to check out a connection, by route.', LATENCY_BUCKETS),
+    'db_pool_connections': ('gauge', 'Pooled database connections, by state.', None),
+    'db_pool_checkouts_total': ('counter', 'Connections checked out of the pool.', None),
+    'db_pool_timeouts_total': ('counter', 'Checkouts that timed out waiting for a connection.', None),
+    'db_pool_opened_total': ('counter', 'Database connections opened.', None),
+    'db_pool_closed_total': ('counter', 'Database connections closed.', None),
+    'bcrypt_rejected_total': ('counter', 'Logins turned away because the hashing pool was full.', None),
+    'bcrypt_rehashed_total': ('counter', 'Password hashes upgraded to the current cost.', None),
+    'bcrypt_queue_wait_seconds': ('histogram', 'Time logins waited for a hashing thread.', LATENCY_BUCKETS),
+    'bcrypt_hash_seconds': ('histogram', 'Time spent hashing or checking a password.', LATENCY_BUCKETS),
+}
+
+_lock = threading.Lock()
+# This process's series: name -> {label string: value}; histogram values
+# are per-bucket counts (last slot +Inf) plus sum and count
+_state = {'pid': None, 'flushed_at': 0.0, 'counters': {}, 'histograms': {}}
+
+def labels(**values):
+    """Render label values as a Prometheus label string"""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values.values())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(values, escaped)) + '}'
+
+def _current():
+    """This process's state, started afresh in a newly forked worker (caller holds the lock)"""
+    if _state['pid'] != os.getpid():
+        _state.update(pid=os.getpid(), flushed_at=0.0, counters={}, histograms={})
+    return _state
+
+def increment(name, label_string, amount=1):
+    """Add amount to a counter series"""
+    with _lock:
+        series = _current()['counters'].setdefault(name, {})
+        series[label_string] = series.get(label_string, 0) + amount
+
+def observe(name, label_string, value):
+    """Record one sample in a histogram series"""
+    bounds = METRICS[name][2]
+    with _lock:
+        series = _current()['histograms'].setdefault(name, {})
+        histogram = series.get(label_string)
+        if histogram is None:
+            histogram = series[label_string] = {'buckets': [0] * (len(bounds) + 1), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                break
+        else:
+            i = len(bounds)
+        histogram['buckets'][i] += 1
+        histogram['sum'] += value
+        histogram['count'] += 1
+
+def route_label():
+    """The label for the current request: its endpoint, or 'unmatched' for 404s"""
+    return labels(route=request.endpoint or 'unmatched')
+
+# Request lifecycle
+
+def start_request():
+    """Start measuring the current request"""
+    g.request_metrics = {'started': time.perf_counter(), 'status': 500,
+                         'queries': 0, 'db_seconds': 0.0, 'render_seconds': 0.0, 'render_started': None}
+
+def set_status(status_code):
+    """Remember the status of the response being sent"""
+    if 'request_metrics' in g:
+        g.request_metrics['status'] = status_code
+
+def finish_request():
+    """Record the current request's figures (from teardown, so streamed bodies are included)"""
+    metrics = g.pop('request_metrics', None)
+    if metrics is None:
+        return
+    route = route_label()
+    increment('http_requests_total', labels(route=request.endpoint or 'unmatched', status=metrics['status']))
+    observe('http_request_duration_seconds', route, time.perf_counter() - metrics['started'])
+    observe('http_request_db_queries', route, metrics['queries'])
+    observe('http_request_db_seconds', route, metrics['db_seconds'])
+    if metrics['render_seconds']:
+        observe('http_request_template_seconds', route, metrics['render_seconds'])
+    if time.time() - _state['flushed_at'] >= METRICS_FLUSH_INTERVAL:
+        flush_snapshot()
+
+def _on_query(statement, seconds):
+    """db_connect 'query' listener: count the statement against the current request"""
+    if has_request_context() and 'request_metrics' in g:
+        g.request_metrics['queries'] += 1
+        g.request_metrics['db_seconds'] += seconds
+
+def _on_checkout(seconds):
+    """db_connect 'checkout' listener"""
+    if has_request_context():
+        observe('db_pool_wait_seconds', route_label(), seconds)
+
+def _on_render_start(sender, template, context, **extra):
+    """Flask before_render_template signal"""
+    if has_request_context() and 'request_metrics' in g:
+        g.request_metrics['render_started'] = time.perf_counter()
+
+def _on_rendered(sender, template, context, **extra):
+    """Flask template_rendered signal.
+
+    A streamed template reports once it has been fully sent, so its time
+    includes fetching the rows it streams.
+    """
+    metrics = g.get('request_metrics') if has_request_context() else None
+    if metrics and metrics['render_started'] is not None:
+        metrics['render_seconds'] += time.perf_counter() - metrics['render_started']
+        metrics['render_started'] = None
+
+add_db_listener('query', _on_query)
+add_db_listener('checkout', _on_checkout)
+before_render_template.connect(_on_render_start)
+template_rendered.connect(_on_rendered)
+
+# Snapshots
+
+def snapshot_path(pid):
+    """File holding a worker's latest snapshot"""
+    return os.path.join(SHARED_CACHE_DIR, f"{os.getenv('DB_NAME', 'app')}-metrics-{pid}.json")
+
+def _cumulative(histogram):
+    """A histogram with cumulative bucket counts, as Prometheus exposes them"""
+    total = 0
+    buckets = []
+    for count in histogram['buckets']:
+        total += count
+        buckets.append(total)
+    return {'buckets': buckets, 'sum': histogram['sum'], 'count': histogram['count']}
+
+def snapshot():
+    """This process's series, pool and password counters as {'counters', 'gauges', 'histograms'}"""
+    with _lock:
+        state = _current()
+        counters = {name: dict(series) for name, series in state['counters'].items()}
+        histograms = {name: {label_string: _cumulative(histogram) for label_string, histogram in series.items()}
+                      for name, series in state['histograms'].items()}
+
+    pool = pool_stats()
+    counters.update({
+        'db_pool_checkouts_total': {'': pool['checkouts']},
+        'db_pool_timeouts_total': {'': pool['timeouts']},
+        'db_pool_opened_total': {'': pool['created']},
+        'db_pool_closed_total': {'': pool['closed']},
+    })
+    gauges = {'db_pool_connections': {labels(state='idle'): pool['idle'], labels(state='in_use'): pool['in_use']}}
+
+    passwords = password_stats()
+    counters['bcrypt_rejected_total'] = {'': passwords['rejected']}
+    counters['bcrypt_rehashed_total'] = {'': passwords['rehashed']}
+    for name in ('queue_wait', 'hash'):
+        histogram = passwords[name]
+        histograms[f'bcrypt_{name}_seconds'] = {'': {
+            'buckets': [count for _, count in histogram['buckets']],
+            'sum': histogram['sum'], 'count': histogram['count'],
+        }}
+    return {'counters': counters, 'gauges': gauges, 'histograms': histograms}
+
+def flush_snapshot():
+    """Write this process's snapshot where /metrics in any worker can read it"""
+    with _lock:
+        _current()['flushed_at'] = time.time()
+    path = snapshot_path(os.getpid())
+    try:
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(snapshot(), f)
+        os.replace(path + '.tmp', path)
+    except OSError as e:
+        print(f"Could not write metrics snapshot: {e}")
+
+def _is_alive(pid):
+    """True if a process with this pid exists"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+def collect():
+    """Sum the snapshots of every worker on this host.
+
+    Counters and histograms include workers that have exited (so totals
+    never go backwards while their snapshot is kept); gauges only count
+    live workers.
+    """
+    flush_snapshot()
+    merged = {'counters': {}, 'gauges': {}, 'histograms': {}}
+    for path in glob.glob(snapshot_path('*')):
+        try:
+            pid = int(path.rsplit('-', 1)[1].split('.')[0])
+            alive = pid == os.getpid() or _is_alive(pid)
+            if not alive and time.time() - os.path.getmtime(path) > METRICS_RETENTION:
+                os.remove(path)
+                continue
+            with open(path, encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # Removed or being replaced by its worker; it is picked up next scrape
+            continue
+
+        for kind in ('counters', 'gauges'):
+            if kind == 'gauges' and not alive:
+                continue
+            for name, series in data[kind].items():
+                target = merged[kind].setdefault(name, {})
+                for label_string, value in series.items():
+                    target[label_string] = target.get(label_string, 0) + value
+        for name, series in data['histograms'].items():
+            target = merged['histograms'].setdefault(name, {})
+            for label_string, histogram in series.items():
+                total = target.get(label_string)
+                if total is None:
+                    target[label_string] = {'buckets': list(histogram['buckets']),
+                                            'sum': histogram['sum'], 'count': histogram['count']}
+                    continue
+                total['buckets'] = [a + b for a, b in zip(total['buckets'], histogram['buckets'])]
+                total['sum'] += histogram['sum']
+                total['count'] += histogram['count']
+    return merged
+
+def _histogram_labels(label_string, bound):
+    """Add the le label for a bucket to a label string"""
+    le = labels(le='+Inf' if bound is None else f'{bound:g}')
+    return le if not label_string else label_string[:-1] + ',' + le[1:]
+
+def prometheus_text(merged):
+    """Render collected metrics in the Prometheus text exposition format"""
+    lines = []
+    for name, (kind, help_text, bounds) in METRICS.items():
+        series = merged['histograms' if kind == 'histogram' else kind + 's'].get(name)
+        if not series:
+            continue
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        for label_string, value in sorted(series.items()):
+            if kind != 'histogram':
+                lines.append(f'{name}{label_string} {value}')
+                continue
+            for bound, count in zip(bounds + [None], value['buckets']):
+                lines.append(f'{name}_bucket{_histogram_labels(label_string, bound)} {count}')
+            lines.append(f"{name}_sum{label_string} {value['sum']:.6f}")
+            lines.append(f"{name}_count{label_string} {value['count']}")
+    return '\n'.join(lines) + '\n'
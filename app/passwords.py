@@ -0,0 +1,132 @@
+# Password hashing on a small bounded thread pool.
+# bcrypt releases the GIL while hashing, so a few worker threads keep a
+# login burst from tying up every request thread, and a full queue turns
+# extra logins away at once instead of stalling the other pages. The
+# request threads are gunicorn's gthread workers, sized from these settings
+# in gunicorn.conf.py.
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 2))
+BCRYPT_QUEUE_LIMIT = int(os.getenv('BCRYPT_QUEUE_LIMIT', 4))
+BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0]
+
+_pool_lock = threading.Lock()
+_pool = {'pid': None, 'executor': None, 'slots': None}
+
+_stats_lock = threading.Lock()
+_stats = {
+    'rejected': 0,
+    'rehashed': 0,
+    # name -> per-bucket counts (last slot is +Inf), running sum and count
+    'queue_wait': {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0, 'count': 0},
+    'hash': {'buckets': [0] * (len(LATENCY_BUCKETS) + 1), 'sum': 0.0, 'count': 0},
+}
+
+def _ensure_pool():
+    """Create the executor for this process (threads do not survive a fork)"""
+    with _pool_lock:
+        if _pool['pid'] != os.getpid():
+            _pool['pid'] = os.getpid()
+            _pool['executor'] = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix='bcrypt')
+            # One slot per running or queued job
+            _pool['slots'] = threading.BoundedSemaphore(BCRYPT_WORKERS + BCRYPT_QUEUE_LIMIT)
+        return _pool
+
+def _observe(name, seconds):
+    """Record one latency sample in the named histogram"""
+    with _stats_lock:
+        histogram = _stats[name]
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                break
+        else:
+            i = len(LATENCY_BUCKETS)
+        histogram['buckets'][i] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+def _submit(fn, *args):
+    """Run fn(*args) on the pool and return a Future, or None if the pool is saturated"""
+    pool = _ensure_pool()
+    if not pool['slots'].acquire(blocking=False):
+        with _stats_lock:
+            _stats['rejected'] += 1
+        return None
+
+    queued_at = time.monotonic()
+
+    def job():
+        started = time.monotonic()
+        _observe('queue_wait', started - queued_at)
+        try:
+            return fn(*args)
+        finally:
+            _observe('hash', time.monotonic() - started)
+            pool['slots'].release()
+
+    try:
+        return pool['executor'].submit(job)
+    except RuntimeError:
+        pool['slots'].release()
+        raise
+
+def check_password(password, hashed):
+    """Check password against a bcrypt hash on the pool.
+
+    Returns True or False, or None when the pool is saturated and the
+    caller should turn the request away (503) without checking.
+    """
+    future = _submit(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+    if future is None:
+        return None
+    return future.result()
+
+def hash_rounds(hashed):
+    """Return the cost factor of a bcrypt hash, or None if it cannot be read"""
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+def rehash_password(password, hashed):
+    """Return a new hash at BCRYPT_ROUNDS if hashed uses another cost, else None.
+
+    Also returns None when the pool is saturated; the rehash is simply
+    retried on a later login.
+    """
+    if hash_rounds(hashed) == BCRYPT_ROUNDS:
+        return None
+    future = _submit(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(rounds=BCRYPT_ROUNDS))
+    if future is None:
+        return None
+    with _stats_lock:
+        _stats['rehashed'] += 1
+    return future.result().decode('utf-8')
+
+def password_stats():
+    """Return pool settings, counters and cumulative latency histograms for this process"""
+    with _stats_lock:
+        stats = {
+            'workers': BCRYPT_WORKERS,
+            'queue_limit': BCRYPT_QUEUE_LIMIT,
+            'rounds': BCRYPT_ROUNDS,
+            'rejected': _stats['rejected'],
+            'rehashed': _stats['rehashed'],
+        }
+        for name in ('queue_wait', 'hash'):
+            histogram = _stats[name]
+            cumulative = []
+            total = 0
+            for bound, count in zip(LATENCY_BUCKETS + ['+Inf'], histogram['buckets']):
+                total += count
+                cumulative.append((bound, total))
+            stats[name] = {'buckets': cumulative, 'sum': histogram['sum'], 'count': histogram['count']}
+        return stats
@@ -0,0 +1,190 @@
+# On-demand sampling profiler for single requests.
+# An admin adds "X-Profile: 1" (or ?_profile=1) to a request. A sampler
+# thread then reads that request thread's stack every PROFILE_INTERVAL_MS
+# until the response has been sent, streamed bodies included. Alongside it,
+# every query the request runs is timed. The result is written to
+# PROFILES_DIR as:
+#   <id>.folded            collapsed stacks (flamegraph.pl, speedscope)
+#   <id>.speedscope.json   for https://www.speedscope.app
+#   <id>.queries.json      request summary and per-query timings
+# Requests without the switch pay one header lookup; nothing else runs.
+# Each worker starts at most one profile per PROFILE_MIN_INTERVAL seconds.
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from flask import g, request
+from flask_login import current_user
+
+from .db_connect import add_db_listener
+from .query_log import normalize_sql
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES_DIR = os.getenv('PROFILES_DIR') or os.path.join(PROJECT_DIR, 'profiles')
+PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+PROFILE_MIN_INTERVAL = float(os.getenv('PROFILE_MIN_INTERVAL', 10))
+# Stop sampling a request that is still running after this many seconds
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', 60))
+
+_lock = threading.Lock()
+_limit = {'pid': None, 'last_started': 0.0}
+# Request thread id -> its running profile
+_running = {}
+
+def requested():
+    """True when the current request asks to be profiled"""
+    return request.headers.get('X-Profile') == '1' or request.args.get('_profile') == '1'
+
+def _take_slot():
+    """Claim this worker's profiling slot, or return False if one started too recently"""
+    now = time.monotonic()
+    with _lock:
+        if _limit['pid'] != os.getpid():
+            _limit.update(pid=os.getpid(), last_started=0.0)
+        if _running or now - _limit['last_started'] < PROFILE_MIN_INTERVAL:
+            return False
+        _limit['last_started'] = now
+        return True
+
+def _stack(frame):
+    """(qualname or name, file, first line) for each frame from the outermost call to frame"""
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        # co_qualname is Python 3.11+; older interpreters only have the bare name
+        stack.append((getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+def _sample(profile):
+    """Sampler thread: record the request thread's stack until stopped"""
+    interval = PROFILE_INTERVAL_MS / 1000
+    deadline = profile['started'] + PROFILE_MAX_SECONDS
+    last = time.perf_counter()
+    while not profile['stop'].wait(interval):
+        now = time.perf_counter()
+        if now > deadline:
+            break
+        frame = sys._current_frames().get(profile['thread'])
+        if frame is None:
+            break
+        profile['samples'].append((tuple(_stack(frame)), now - last))
+        last = now
+
+def start_profile():
+    """Start profiling the current request if an admin asked for it and the rate limit allows"""
+    if not (current_user.is_authenticated and current_user.role == 'admin'):
+        return
+    if not _take_slot():
+        g.profile_status = 'rate-limited'
+        return
+    endpoint = re.sub(r'[^\w.-]', '_', request.endpoint or 'unmatched')
+    profile = {
+        'id': f"{time.strftime('%Y%m%d-%H%M%S')}-{endpoint}-{os.getpid()}",
+        'url': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'thread': threading.get_ident(),
+        'started': time.perf_counter(),
+        'stop': threading.Event(),
+        'samples': [],
+        'queries': [],
+    }
+    profile['sampler'] = threading.Thread(target=_sample, args=(profile,), name='profiler', daemon=True)
+    with _lock:
+        _running[profile['thread']] = profile
+    profile['sampler'].start()
+    g.profile = profile
+    g.profile_status = profile['id']
+
+def _on_query(statement, seconds):
+    """db_connect 'query' listener: time the queries of a profiled request"""
+    if not _running:
+        return
+    profile = _running.get(threading.get_ident())
+    if profile is not None:
+        offset = time.perf_counter() - profile['started'] - seconds
+        profile['queries'].append((offset, seconds, normalize_sql(statement)))
+
+add_db_listener('query', _on_query)
+
+def finish_profile():
+    """Stop the current request's profile, if any, and write its files"""
+    profile = g.pop('profile', None)
+    if profile is None:
+        return
+    profile['stop'].set()
+    profile['sampler'].join()
+    elapsed = time.perf_counter() - profile['started']
+    with _lock:
+        _running.pop(profile['thread'], None)
+    try:
+        write_profile(profile, elapsed)
+    except OSError as e:
+        print(f"Could not write profile {profile['id']}: {e}")
+
+def short_path(filename):
+    """A frame's file relative to the project or to site-packages"""
+    if filename.startswith(PROJECT_DIR + os.sep):
+        return os.path.relpath(filename, PROJECT_DIR)
+    return filename.rsplit('site-packages' + os.sep, 1)[-1]
+
+def frame_name(frame):
+    """How a (qualname, file, line) frame appears in the folded stacks"""
+    name, filename, line = frame
+    return f"{name} ({short_path(filename)}:{line})"
+
+def write_profile(profile, elapsed):
+    """Write the folded stacks, speedscope file and query timings of a finished profile"""
+    os.makedirs(PROFILES_DIR, exist_ok=True)
+    base = os.path.join(PROFILES_DIR, profile['id'])
+
+    folded = {}
+    for stack, _ in profile['samples']:
+        key = ';'.join(frame_name(frame).replace(';', ':') for frame in stack)
+        folded[key] = folded.get(key, 0) + 1
+    with open(base + '.folded', 'w', encoding='utf-8') as f:
+        for key, count in sorted(folded.items()):
+            f.write(f"{key} {count}\n")
+
+    frames = {}
+    samples = []
+    for stack, _ in profile['samples']:
+        samples.append([frames.setdefault(frame, len(frames)) for frame in stack])
+    speedscope = {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': f"{profile['url']} ({elapsed * 1000:.0f} ms)",
+        'exporter': 'app.profiler',
+        'shared': {'frames': [{'name': name, 'file': short_path(filename), 'line': line}
+                              for name, filename, line in frames]},
+        'profiles': [{
+            'type': 'sampled',
+            'name': profile['url'],
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': round(elapsed * 1000, 3),
+            'samples': samples,
+            'weights': [round(seconds * 1000, 3) for _, seconds in profile['samples']],
+        }],
+    }
+    with open(base + '.speedscope.json', 'w', encoding='utf-8') as f:
+        json.dump(speedscope, f)
+
+    queries = profile['queries']
+    summary = {
+        'id': profile['id'],
+        'url': profile['url'],
+        'endpoint': profile['endpoint'],
+        'elapsed_ms': round(elapsed * 1000, 3),
+        'samples': len(profile['samples']),
+        'interval_ms': PROFILE_INTERVAL_MS,
+        'query_count': len(queries),
+        'query_ms': round(sum(seconds for _, seconds, _ in queries) * 1000, 3),
+        'queries': [{'offset_ms': round(offset * 1000, 3), 'duration_ms': round(seconds * 1000, 3), 'sql': sql}
+                    for offset, seconds, sql in queries],
+    }
+    with open(base + '.queries.json', 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
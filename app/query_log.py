@@ -0,0 +1,140 @@
+# Slow-query log and per-route query budgets.
+# Every statement run through get_db() is seen by the 'query' listener in
+# db_connect. Statements slower than SLOW_QUERY_SECONDS are printed with
+# their normalized SQL and the route that ran them. Views declare how many
+# queries (and how much DB time) a request may cost with @query_budget;
+# a request over its budget is reported with its most repeated statements,
+# which is what an N+1 regression looks like. With QUERY_BUDGET_STRICT
+# (CI, local development; the strict_query_budgets test fixture) it raises
+# instead, so the regression fails the run. assert_query_budget() checks
+# the same thing around any block, e.g. a test client call.
+import os
+import re
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import g, has_request_context, request
+
+from .db_connect import add_db_listener
+
+SLOW_QUERY_SECONDS = float(os.getenv('SLOW_QUERY_SECONDS', 0.5))
+QUERY_BUDGET_STRICT = os.getenv('QUERY_BUDGET_STRICT', 'false').lower() == 'true'
+MAX_SQL_LENGTH = 300
+
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%(?:\(\w+\))?s')
+_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_ROWS = re.compile(r'(\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+')
+
+# Blocks running under assert_query_budget() in this thread
+_active = threading.local()
+
+def normalize_sql(statement):
+    """Collapse a statement to its shape: literals and placeholders become ?, lists become (...)"""
+    if isinstance(statement, bytes):
+        statement = statement.decode('utf-8', 'replace')
+    sql = ' '.join(statement.split())
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _LIST.sub('(...)', sql)
+    # Multi-row VALUES from executemany()
+    sql = _ROWS.sub(r'\1', sql)
+    if len(sql) > MAX_SQL_LENGTH:
+        sql = sql[:MAX_SQL_LENGTH] + '...'
+    return sql
+
+def current_route():
+    """The endpoint running the current request, or 'cli' outside one"""
+    if not has_request_context():
+        return 'cli'
+    return request.endpoint or 'unmatched'
+
+def _record(log, sql, seconds):
+    """Add one statement to a {'queries', 'seconds', 'statements'} log"""
+    log['queries'] += 1
+    log['seconds'] += seconds
+    log['statements'][sql] = log['statements'].get(sql, 0) + 1
+
+def new_log():
+    """An empty query log"""
+    return {'queries': 0, 'seconds': 0.0, 'statements': {}}
+
+def _on_query(statement, seconds):
+    """db_connect 'query' listener"""
+    sql = None
+    if seconds >= SLOW_QUERY_SECONDS:
+        sql = normalize_sql(statement)
+        print(f"[SLOW QUERY] {seconds * 1000:.0f} ms in {current_route()}: {sql}")
+
+    logs = list(getattr(_active, 'logs', []))
+    if has_request_context():
+        if 'query_log' not in g:
+            g.query_log = new_log()
+        logs.append(g.query_log)
+    if logs:
+        sql = sql or normalize_sql(statement)
+        for log in logs:
+            _record(log, sql, seconds)
+
+add_db_listener('query', _on_query)
+
+def budget_problems(log, max_queries, max_seconds=None):
+    """Describe how a query log exceeds a budget, or return None if it fits"""
+    problems = []
+    if log['queries'] > max_queries:
+        problems.append(f"{log['queries']} queries (budget {max_queries})")
+    if max_seconds is not None and log['seconds'] > max_seconds:
+        problems.append(f"{log['seconds'] * 1000:.0f} ms in the database (budget {max_seconds * 1000:.0f} ms)")
+    if not problems:
+        return None
+    repeated = sorted(log['statements'].items(), key=lambda item: -item[1])[:3]
+    details = '; '.join(f"{count}x {sql}" for sql, count in repeated)
+    return f"{', '.join(problems)}. Most run: {details}"
+
+def query_budget(max_queries, max_seconds=None):
+    """Declare the most queries (and DB seconds) one request to this view may cost.
+
+    Counted over the whole request, the user loader and conditional-GET
+    check included, and checked at teardown so streamed rows count too.
+    """
+    def decorator(view):
+        @wraps(view)
+        def query_budget_wrapper(*args, **kwargs):
+            g.query_budget = (max_queries, max_seconds)
+            return view(*args, **kwargs)
+        return query_budget_wrapper
+    return decorator
+
+def check_query_budget(exception=None):
+    """Teardown hook: report (or, when strict, raise on) a request over its view's budget"""
+    budget = g.pop('query_budget', None)
+    log = g.pop('query_log', None)
+    if budget is None or log is None or exception is not None:
+        return
+    problem = budget_problems(log, *budget)
+    if problem is None:
+        return
+    message = f"Query budget exceeded in {current_route()}: {problem}"
+    if QUERY_BUDGET_STRICT:
+        raise AssertionError(message)
+    print(f"[QUERY BUDGET] {message}")
+
+@contextmanager
+def assert_query_budget(max_queries, max_seconds=None):
+    """Raise AssertionError if the block runs more queries (or DB seconds) than allowed.
+
+        with assert_query_budget(4):
+            client.get('/bookings')
+    """
+    log = new_log()
+    _active.logs = getattr(_active, 'logs', []) + [log]
+    try:
+        yield log
+    finally:
+        _active.logs = [active for active in _active.logs if active is not log]
+    problem = budget_problems(log, max_queries, max_seconds)
+    if problem:
+        raise AssertionError(f"Query budget exceeded: {problem}")
@@ -0,0 +1,120 @@
+# Daily revenue rollups.
+# daily_route_revenue and daily_status_counts hold one row per booking day
+# and route (and status), built from active bookings by refresh_rollups.py.
+# Bookings and flights carry an updated_at change marker; each refresh
+# queues only the booking days whose rows changed since the last
+# watermark and recomputes just those days, so its cost follows the
+# changes rather than the size of history. Time-series views read the
+# rollups instead of rescanning bookings.
+import pymysql
+from pymysql.constants import ER
+
+from .archive_store import COLD_ARCHIVE
+
+ROLLUP_NAME = 'daily_revenue'
+
+# (day, route) rows computed from the live bookings of the queued days
+ROUTE_REVENUE_SQL = """
+    SELECT DATE(b.booking_date) as day, f.departure_airport_id, f.arrival_airport_id,
+           COUNT(*) as bookings, COUNT(b.price) as priced, COALESCE(SUM(b.price), 0) as revenue
+    FROM rollup_pending_days p
+    JOIN bookings b ON b.is_archived = FALSE
+        AND b.booking_date >= p.day AND b.booking_date < p.day + INTERVAL 1 DAY
+    JOIN flights f ON b.flight_id = f.flight_id
+    WHERE p.day IN ({days})
+    GROUP BY day, f.departure_airport_id, f.arrival_airport_id
+"""
+
+STATUS_COUNTS_SQL = """
+    SELECT DATE(b.booking_date) as day, f.departure_airport_id, f.arrival_airport_id, b.booking_status,
+           COUNT(*) as bookings, COALESCE(SUM(b.price), 0) as revenue
+    FROM rollup_pending_days p
+    JOIN bookings b ON b.is_archived = FALSE
+        AND b.booking_date >= p.day AND b.booking_date < p.day + INTERVAL 1 DAY
+    JOIN flights f ON b.flight_id = f.flight_id
+    WHERE p.day IN ({days}) AND b.booking_status IS NOT NULL
+    GROUP BY day, f.departure_airport_id, f.arrival_airport_id, b.booking_status
+"""
+
+def queue_changed_days(cursor, since):
+    """Queue every booking day with a booking or flight changed at or after since (None queues all days)"""
+    if since is None:
+        cursor.execute("""
+            INSERT IGNORE INTO rollup_pending_days (day)
+            SELECT DISTINCT DATE(booking_date) FROM bookings WHERE booking_date IS NOT NULL
+        """)
+        return
+
+    sources = [
+        "SELECT DATE(booking_date) as day FROM bookings WHERE updated_at >= %s",
+        # A flight's airports decide the route of all its bookings
+        """SELECT DATE(b.booking_date) as day FROM flights f
+           JOIN bookings b ON b.flight_id = f.flight_id
+           WHERE f.updated_at >= %s""",
+    ]
+    if COLD_ARCHIVE:
+        # Archiving moves bookings out of the hot table, stamped with the change
+        sources.append("SELECT DATE(booking_date) as day FROM bookings_archive WHERE updated_at >= %s")
+    cursor.execute(f"""
+        INSERT IGNORE INTO rollup_pending_days (day)
+        SELECT DISTINCT day FROM ({' UNION ALL '.join(sources)}) as changed
+        WHERE day IS NOT NULL
+    """, [since] * len(sources))
+
+def refresh_days(cursor, days):
+    """Recompute both rollups for the queued days and dequeue them (caller commits)"""
+    if not days:
+        return
+    placeholders = ', '.join(['%s'] * len(days))
+    for table in ('daily_route_revenue', 'daily_status_counts'):
+        cursor.execute(f"DELETE FROM {table} WHERE day IN ({placeholders})", days)
+    cursor.execute(f"""
+        INSERT INTO daily_route_revenue
+            (day, departure_airport_id, arrival_airport_id, bookings, priced, revenue)
+        {ROUTE_REVENUE_SQL.format(days=placeholders)}
+    """, days)
+    cursor.execute(f"""
+        INSERT INTO daily_status_counts
+            (day, departure_airport_id, arrival_airport_id, booking_status, bookings, revenue)
+        {STATUS_COUNTS_SQL.format(days=placeholders)}
+    """, days)
+    cursor.execute(f"DELETE FROM rollup_pending_days WHERE day IN ({placeholders})", days)
+
+def rollup_missing(error):
+    """True if error is MySQL's "table doesn't exist", i.e. refresh_rollups.py has not run here yet"""
+    if isinstance(error, pymysql.err.ProgrammingError) and error.args[0] == ER.NO_SUCH_TABLE:
+        print(f"Warning: rollup tables missing ({error.args[1]}); run refresh_rollups.py")
+        return True
+    return False
+
+def daily_revenue(cursor, date_from=None, date_to=None):
+    """Bookings and revenue per booking day from the rollup, oldest first, as dicts (none before the first refresh)"""
+    query = """
+        SELECT day, SUM(bookings) as bookings, SUM(priced) as priced, SUM(revenue) as revenue
+        FROM daily_route_revenue WHERE 1 = 1
+    """
+    params = []
+    if date_from:
+        query += " AND day >= %s"
+        params.append(date_from)
+    if date_to:
+        query += " AND day <= %s"
+        params.append(date_to)
+    try:
+        cursor.execute(query + " GROUP BY day ORDER BY day", params)
+    except pymysql.err.ProgrammingError as e:
+        if not rollup_missing(e):
+            raise
+        return []
+    return cursor.fetchall()
+
+def rollup_as_of(cursor):
+    """The last refresh's watermark: the rollup reflects booking changes up to then (None before the first refresh)"""
+    try:
+        cursor.execute("SELECT watermark FROM rollup_state WHERE rollup_name = %s", [ROLLUP_NAME])
+    except pymysql.err.ProgrammingError as e:
+        if not rollup_missing(e):
+            raise
+        return None
+    row = cursor.fetchone()
+    return row['watermark'] if row else None
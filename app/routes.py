@@ -1,11 +1,49 @@
-from flask import render_template, request, redirect, url_for, flash, make_response
+from flask import render_template, request, redirect, url_for, flash, make_response, session
 from flask_login import login_user, logout_user, login_required, current_user
 from . import app
-from .db_connect import get_db
+from .airport_cache import active_airports, add_routes, airports_changed
+from .archive_store import archive_rows, archived_table, parent_join, restore_rows
+from .counters import booking_deltas, bump_counters, bump_versions, read_counters, read_versions, version_deltas
+from .db_connect import get_db, iter_rows
+from .functions import cache_delete, cached, fetch_page, search_clause, stream_page, wants_stream
 from .models import User
-import bcrypt
+from .passwords import check_password, rehash_password
+from .query_log import query_budget
+from .rollups import daily_revenue
+from .user_cache import cache_user, clear_session_claims, forget_user, store_session_claims
+import hashlib
+import os
+from datetime import date, timedelta
 from functools import wraps
 
+# FULLTEXT (ngram) search conditions for the listing pages' ?q= box;
+# the indexes are created by add_indexes.py
+CUSTOMER_MATCH = "MATCH(first_name, last_name, email, phone, frequent_flyer_number) AGAINST (%s IN BOOLEAN MODE)"
+AIRPORT_MATCH = "MATCH(airport_code, airport_name, city, state, country, timezone) AGAINST (%s IN BOOLEAN MODE)"
+FLIGHT_MATCH = "MATCH(flight_number, aircraft_type, status, gate) AGAINST (%s IN BOOLEAN MODE)"
+# A MATCH() inside an OR cannot use its FULLTEXT index, so every
+# alternative is its own UNION branch with its own index (the aliases name
+# the branches in add_indexes.py's EXPLAIN checks)
+FLIGHT_IDS_MATCHING = f"""
+    SELECT flight_id FROM flights matched_flights WHERE {FLIGHT_MATCH}
+    UNION
+    SELECT flight_id FROM flights by_departure WHERE departure_airport_id IN (
+        SELECT airport_id FROM airports matched_airports WHERE {AIRPORT_MATCH})
+    UNION
+    SELECT flight_id FROM flights by_arrival WHERE arrival_airport_id IN (
+        SELECT airport_id FROM airports matched_airports WHERE {AIRPORT_MATCH})
+"""
+FLIGHT_SEARCH = f"f.flight_id IN ({FLIGHT_IDS_MATCHING})"
+BOOKING_SEARCH = f"""b.booking_id IN (
+    SELECT booking_id FROM bookings matched_bookings
+    WHERE MATCH(booking_reference, seat_number, booking_status) AGAINST (%s IN BOOLEAN MODE)
+    UNION
+    SELECT booking_id FROM bookings by_customer WHERE customer_id IN (
+        SELECT customer_id FROM customers matched_customers WHERE {CUSTOMER_MATCH})
+    UNION
+    SELECT booking_id FROM bookings by_flight WHERE flight_id IN ({FLIGHT_IDS_MATCHING})
+)"""
+
 # Decorator to prevent caching (for logout and login pages)
 def no_cache(view):
     @wraps(view)
@@ -17,6 +55,51 @@ def no_cache(view):
         return response
     return no_cache_wrapper
 
+def build_id():
+    """Fingerprint of the app's code and templates, so a deploy changes every ETag"""
+    stamps = []
+    for folder, _, files in os.walk(os.path.dirname(__file__)):
+        for name in files:
+            if name.endswith(('.py', '.html')):
+                path = os.path.join(folder, name)
+                stamps.append(f'{path}:{os.stat(path).st_mtime_ns}')
+    return hashlib.sha1('\n'.join(sorted(stamps)).encode()).hexdigest()[:12]
+
+BUILD_ID = build_id()
+
+# Decorator for listing pages: conditional GET keyed on the version stamps
+# of the tables the page is built from (bumped by every write route)
+def conditional_get(*tables):
+    def decorator(view):
+        @wraps(view)
+        def conditional_get_wrapper(*args, **kwargs):
+            db = get_db()
+            # A pending flash message has to be rendered, not revalidated
+            if not db or session.get('_flashes'):
+                return no_cache(view)(*args, **kwargs)
+
+            cursor = db.cursor()
+            versions = read_versions(cursor, tables)
+            cursor.close()
+            # Same data, same user, same URL (page, search) and same code
+            # means the same HTML
+            key = [BUILD_ID, current_user.get_id(), current_user.role, request.full_path, *versions]
+            etag = hashlib.sha1(repr(key).encode()).hexdigest()
+
+            # ETag only: a Last-Modified date has one-second resolution and
+            # cannot tell users or URLs apart, so If-Modified-Since is ignored
+            # and no Last-Modified is sent. If-None-Match uses weak
+            # comparison (compressed responses carry W/ tags)
+            unchanged = request.if_none_match.contains_weak(etag)
+            response = make_response('', 304) if unchanged else make_response(view(*args, **kwargs))
+
+            response.set_etag(etag)
+            # Browsers may keep the page but must revalidate before reuse
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return conditional_get_wrapper
+    return decorator
+
 @app.route('/')
 @no_cache
 def index():
@@ -63,9 +146,30 @@ def login_post():
         flash('Invalid email or password.', 'error')
         return redirect(url_for('login'))
 
-    # Check password (compare with bcrypt hash)
+    # Check password (compare with bcrypt hash) on the bounded hashing pool
     try:
-        if bcrypt.checkpw(password.encode('utf-8'), employee['password'].encode('utf-8')):
+        valid = check_password(password, employee['password'])
+        if valid is None:
+            # Every hashing slot is taken; refuse now rather than queue behind them
+            flash('The login service is busy. Please try again in a moment.', 'error')
+            response = make_response(render_template('index.html'), 503)
+            response.headers['Retry-After'] = '2'
+            return response
+
+        if valid:
+            # Upgrade the stored hash if it was made with a different cost factor
+            new_hash = rehash_password(password, employee['password'])
+            if new_hash:
+                try:
+                    cursor = db.cursor()
+                    cursor.execute("UPDATE employees SET password = %s WHERE employee_id = %s",
+                                   (new_hash, employee['employee_id']))
+                    db.commit()
+                    cursor.close()
+                except Exception as e:
+                    # Keep the old hash; the upgrade is retried on the next login
+                    print(f"Password rehash error: {e}")
+
             # Create user object and login
             user = User(
                 employee['employee_id'],
@@ -75,6 +179,9 @@ def login_post():
                 employee['role']
             )
             login_user(user, remember=remember)
+            # Start from the row just read rather than a stale cached copy
+            cache_user(user)
+            store_session_claims(user)
             flash(f'Welcome back, {user.first_name}!', 'success')
             return redirect(url_for('dashboard'))
         else:
@@ -85,71 +192,61 @@ def login_post():
         flash('Authentication error. Please try again.', 'error')
         return redirect(url_for('login'))
 
-@app.route('/dashboard')
-@login_required
-@no_cache
-def dashboard():
-    """Employee dashboard - main page after login"""
-    # Get some statistics for the dashboard
+DASHBOARD_STATS_KEY = 'dashboard_stats'
+DASHBOARD_CACHE_TTL = float(os.getenv('DASHBOARD_CACHE_TTL', 30))
+DASHBOARD_RECENT_DAYS = 14
+
+def load_dashboard_stats():
+    """Load the dashboard statistics from stats_counters and the daily rollup, or None without a database"""
     db = get_db()
-    stats = {}
+    if not db:
+        return None
 
-    if db:
-        cursor = db.cursor()
+    cursor = db.cursor()
+    counters = read_counters(cursor)
+    # As of the last refresh_rollups.py run
+    recent_revenue = daily_revenue(cursor, date.today() - timedelta(days=DASHBOARD_RECENT_DAYS - 1))
+    cursor.close()
 
-        # Count total flights
-        cursor.execute("SELECT COUNT(*) as count FROM flights WHERE is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['total_flights'] = result['count'] if result else 0
-
-        # Count total customers
-        cursor.execute("SELECT COUNT(*) as count FROM customers WHERE is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['total_customers'] = result['count'] if result else 0
-
-        # Count total airports
-        cursor.execute("SELECT COUNT(*) as count FROM airports WHERE is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['total_airports'] = result['count'] if result else 0
-
-        # Count total bookings
-        cursor.execute("SELECT COUNT(*) as count FROM bookings WHERE is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['total_bookings'] = result['count'] if result else 0
-
-        # Financial calculations
-        # Total revenue from all active bookings
-        cursor.execute("SELECT SUM(price) as total_revenue FROM bookings WHERE is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['total_revenue'] = float(result['total_revenue']) if result and result['total_revenue'] else 0.0
-
-        # Average booking price
-        cursor.execute("SELECT AVG(price) as avg_price FROM bookings WHERE is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['avg_booking_price'] = float(result['avg_price']) if result and result['avg_price'] else 0.0
-
-        # Revenue by booking status
-        cursor.execute("SELECT SUM(price) as confirmed_revenue FROM bookings WHERE booking_status = 'Confirmed' AND is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['confirmed_revenue'] = float(result['confirmed_revenue']) if result and result['confirmed_revenue'] else 0.0
-
-        cursor.execute("SELECT SUM(price) as pending_revenue FROM bookings WHERE booking_status = 'Pending' AND is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['pending_revenue'] = float(result['pending_revenue']) if result and result['pending_revenue'] else 0.0
-
-        # Count confirmed bookings
-        cursor.execute("SELECT COUNT(*) as count FROM bookings WHERE booking_status = 'Confirmed' AND is_archived = FALSE")
-        result = cursor.fetchone()
-        stats['confirmed_bookings'] = result['count'] if result else 0
-
-        # Calculate percentage of confirmed bookings
-        if stats['total_bookings'] > 0:
-            stats['confirmed_percentage'] = (stats['confirmed_bookings'] / stats['total_bookings']) * 100
-        else:
-            stats['confirmed_percentage'] = 0.0
+    def counter(name):
+        return counters.get(name) or 0
 
-        cursor.close()
+    stats = {
+        'total_flights': int(counter('flights_active')),
+        'total_customers': int(counter('customers_active')),
+        'total_airports': int(counter('airports_active')),
+        'total_bookings': int(counter('bookings_active')),
+        'total_revenue': float(counter('bookings_revenue')),
+        'confirmed_revenue': float(counter('status_revenue:Confirmed')),
+        'pending_revenue': float(counter('status_revenue:Pending')),
+        'confirmed_bookings': int(counter('status_count:Confirmed')),
+        'recent_revenue': recent_revenue,
+    }
+
+    # Average over priced bookings only, matching SQL AVG(price)
+    priced = int(counter('bookings_priced'))
+    stats['avg_booking_price'] = stats['total_revenue'] / priced if priced > 0 else 0.0
+
+    # Calculate percentage of confirmed bookings
+    if stats['total_bookings'] > 0:
+        stats['confirmed_percentage'] = (stats['confirmed_bookings'] / stats['total_bookings']) * 100
+    else:
+        stats['confirmed_percentage'] = 0.0
 
+    return stats
+
+def invalidate_stats():
+    """Drop cached statistics after a write so the next dashboard hit reloads them"""
+    cache_delete(DASHBOARD_STATS_KEY)
+
+@app.route('/dashboard')
+@login_required
+@query_budget(3)
+@no_cache
+def dashboard():
+    """Employee dashboard - main page after login"""
+    # Statistics are cached per process for DASHBOARD_CACHE_TTL seconds
+    stats = cached(DASHBOARD_STATS_KEY, DASHBOARD_CACHE_TTL, load_dashboard_stats) or {}
     return render_template('dashboard.html', user=current_user, stats=stats)
 
 @app.route('/logout')
@@ -157,6 +254,8 @@ def dashboard():
 @no_cache
 def logout():
     """Logout user"""
+    forget_user(current_user.get_id())
+    clear_session_claims()
     logout_user()
     flash('You have been logged out successfully.', 'success')
     response = make_response(redirect(url_for('login')))
@@ -165,38 +264,48 @@ def logout():
     response.headers['Expires'] = '-1'
     return response
 
+# Airport codes and cities come from the shared airport cache, not joins
+FLIGHTS_LIST_QUERY = """
+    SELECT f.*
+    FROM flights f
+    WHERE f.is_archived = FALSE
+"""
+FLIGHTS_LIST_KEYS = [('f.departure_time', 'departure_time'), ('f.flight_id', 'flight_id')]
+
 @app.route('/flights')
 @login_required
-@no_cache
+@query_budget(4)
+@conditional_get('flights', 'airports')
 def flights():
     """View all active flights"""
     db = get_db()
+    page = None
     flights = []
     airports = []
 
     if db:
         cursor = db.cursor()
 
-        # Get all active flights
-        cursor.execute("""
-            SELECT f.*,
-                   a1.airport_code as departure_code, a1.city as departure_city,
-                   a2.airport_code as arrival_code, a2.city as arrival_city
-            FROM flights f
-            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
-            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
-            WHERE f.is_archived = FALSE
-            ORDER BY f.departure_time DESC
-        """)
-        flights = cursor.fetchall()
-
-        # Get all airports for dropdown
-        cursor.execute("SELECT * FROM airports WHERE is_archived = FALSE ORDER BY airport_code")
-        airports = cursor.fetchall()
+        # Airports for the dropdowns, from the shared cache (loaded before
+        # any unbuffered stream starts)
+        airports = active_airports()
+
+        search, params = search_clause(FLIGHT_SEARCH)
+        if wants_stream():
+            # Every active flight, read row by row while the page renders
+            flights = add_routes(iter_rows(
+                FLIGHTS_LIST_QUERY + search + " ORDER BY f.departure_time DESC, f.flight_id DESC", params
+            ), refresh_on_miss=False)
+        else:
+            # Get one page of active flights
+            page = fetch_page(cursor, FLIGHTS_LIST_QUERY + search, params, FLIGHTS_LIST_KEYS, descending=True)
+            flights = list(add_routes(page['rows']))
 
         cursor.close()
 
-    return render_template('flights.html', flights=flights, airports=airports)
+    if wants_stream():
+        return stream_page('flights.html', flights=flights, airports=airports, page=page)
+    return render_template('flights.html', flights=flights, airports=airports, page=page)
 
 @app.route('/flights/add', methods=['POST'])
 @login_required
@@ -220,8 +329,10 @@ def add_flight():
             request.form['status'],
             request.form['gate']
         ))
+        bump_counters(cursor, {'flights_active': 1}, version_deltas('flights'))
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Flight added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding flight: {str(e)}', 'error')
@@ -253,8 +364,10 @@ def edit_flight(flight_id):
             request.form['gate'],
             flight_id
         ))
+        bump_versions(cursor, 'flights')
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Flight updated successfully!', 'success')
     except Exception as e:
         flash(f'Error updating flight: {str(e)}', 'error')
@@ -269,34 +382,37 @@ def delete_flight(flight_id):
 
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE flights
-            SET is_archived = TRUE, archived_at = NOW(), archived_by = %s
-            WHERE flight_id = %s
-        """, (current_user.id, flight_id))
+        archive_rows(cursor, 'flights', [flight_id], current_user.id)
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Flight archived successfully!', 'success')
     except Exception as e:
         flash(f'Error archiving flight: {str(e)}', 'error')
 
     return redirect(url_for('flights'))
 
+CUSTOMERS_LIST_QUERY = "SELECT * FROM customers WHERE is_archived = FALSE"
+CUSTOMERS_LIST_KEYS = [('last_name', 'last_name'), ('first_name', 'first_name'), ('customer_id', 'customer_id')]
+
 @app.route('/customers')
 @login_required
-@no_cache
+@query_budget(3)
+@conditional_get('customers')
 def customers():
     """View all active customers"""
     db = get_db()
+    page = None
     customers = []
 
     if db:
         cursor = db.cursor()
-        cursor.execute("SELECT * FROM customers WHERE is_archived = FALSE ORDER BY last_name, first_name")
-        customers = cursor.fetchall()
+        search, params = search_clause(CUSTOMER_MATCH)
+        page = fetch_page(cursor, CUSTOMERS_LIST_QUERY + search, params, CUSTOMERS_LIST_KEYS, descending=False)
+        customers = page['rows']
         cursor.close()
 
-    return render_template('customers.html', customers=customers)
+    return render_template('customers.html', customers=customers, page=page)
 
 @app.route('/customers/add', methods=['POST'])
 @login_required
@@ -318,8 +434,10 @@ def add_customer():
             request.form['frequent_flyer_number'],
             request.form['date_of_birth'] if request.form['date_of_birth'] else None
         ))
+        bump_counters(cursor, {'customers_active': 1}, version_deltas('customers'))
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Customer added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding customer: {str(e)}', 'error')
@@ -348,8 +466,10 @@ def edit_customer(customer_id):
             request.form['date_of_birth'] if request.form['date_of_birth'] else None,
             customer_id
         ))
+        bump_versions(cursor, 'customers')
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Customer updated successfully!', 'success')
     except Exception as e:
         flash(f'Error updating customer: {str(e)}', 'error')
@@ -364,34 +484,37 @@ def delete_customer(customer_id):
 
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE customers
-            SET is_archived = TRUE, archived_at = NOW(), archived_by = %s
-            WHERE customer_id = %s
-        """, (current_user.id, customer_id))
+        archive_rows(cursor, 'customers', [customer_id], current_user.id)
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Customer archived successfully!', 'success')
     except Exception as e:
         flash(f'Error archiving customer: {str(e)}', 'error')
 
     return redirect(url_for('customers'))
 
+AIRPORTS_LIST_QUERY = "SELECT * FROM airports WHERE is_archived = FALSE"
+AIRPORTS_LIST_KEYS = [('country', 'country'), ('city', 'city'), ('airport_id', 'airport_id')]
+
 @app.route('/airports')
 @login_required
-@no_cache
+@query_budget(3)
+@conditional_get('airports')
 def airports():
     """View all active airports/destinations"""
     db = get_db()
+    page = None
     airports = []
 
     if db:
         cursor = db.cursor()
-        cursor.execute("SELECT * FROM airports WHERE is_archived = FALSE ORDER BY country, city")
-        airports = cursor.fetchall()
+        search, params = search_clause(AIRPORT_MATCH)
+        page = fetch_page(cursor, AIRPORTS_LIST_QUERY + search, params, AIRPORTS_LIST_KEYS, descending=False)
+        airports = page['rows']
         cursor.close()
 
-    return render_template('airports.html', airports=airports)
+    return render_template('airports.html', airports=airports, page=page)
 
 @app.route('/airports/add', methods=['POST'])
 @login_required
@@ -412,8 +535,11 @@ def add_airport():
             request.form['country'],
             request.form['timezone']
         ))
+        bump_counters(cursor, {'airports_active': 1}, version_deltas('airports'))
         db.commit()
         cursor.close()
+        airports_changed()
+        invalidate_stats()
         flash('Airport added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding airport: {str(e)}', 'error')
@@ -442,8 +568,11 @@ def edit_airport(airport_id):
             request.form['timezone'],
             airport_id
         ))
+        bump_versions(cursor, 'airports')
         db.commit()
         cursor.close()
+        airports_changed()
+        invalidate_stats()
         flash('Airport updated successfully!', 'success')
     except Exception as e:
         flash(f'Error updating airport: {str(e)}', 'error')
@@ -458,69 +587,56 @@ def delete_airport(airport_id):
 
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE airports
-            SET is_archived = TRUE, archived_at = NOW(), archived_by = %s
-            WHERE airport_id = %s
-        """, (current_user.id, airport_id))
+        archive_rows(cursor, 'airports', [airport_id], current_user.id)
         db.commit()
         cursor.close()
+        airports_changed()
+        invalidate_stats()
         flash('Airport archived successfully!', 'success')
     except Exception as e:
         flash(f'Error archiving airport: {str(e)}', 'error')
 
     return redirect(url_for('airports'))
 
+BOOKINGS_LIST_QUERY = """
+    SELECT b.*,
+           c.first_name, c.last_name, c.email,
+           f.flight_number, f.departure_airport_id, f.arrival_airport_id
+    FROM bookings b
+    JOIN customers c ON b.customer_id = c.customer_id
+    JOIN flights f ON b.flight_id = f.flight_id
+    WHERE b.is_archived = FALSE
+"""
+BOOKINGS_LIST_KEYS = [('b.booking_date', 'booking_date'), ('b.booking_id', 'booking_id')]
+
 @app.route('/bookings')
 @login_required
-@no_cache
+@query_budget(4)
+@conditional_get('bookings', 'customers', 'flights', 'airports')
 def bookings():
     """View all active bookings"""
     db = get_db()
+    page = None
     bookings = []
-    customers = []
-    flights = []
 
     if db:
-        cursor = db.cursor()
-
-        # Get all active bookings
-        cursor.execute("""
-            SELECT b.*,
-                   c.first_name, c.last_name, c.email,
-                   f.flight_number,
-                   a1.airport_code as departure_code,
-                   a2.airport_code as arrival_code
-            FROM bookings b
-            JOIN customers c ON b.customer_id = c.customer_id
-            JOIN flights f ON b.flight_id = f.flight_id
-            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
-            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
-            WHERE b.is_archived = FALSE
-            ORDER BY b.booking_date DESC
-        """)
-        bookings = cursor.fetchall()
-
-        # Get all customers for dropdown
-        cursor.execute("SELECT * FROM customers WHERE is_archived = FALSE ORDER BY last_name, first_name")
-        customers = cursor.fetchall()
-
-        # Get all flights for dropdown
-        cursor.execute("""
-            SELECT f.*,
-                   a1.airport_code as departure_code,
-                   a2.airport_code as arrival_code
-            FROM flights f
-            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
-            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
-            WHERE f.is_archived = FALSE
-            ORDER BY f.departure_time DESC
-        """)
-        flights = cursor.fetchall()
-
-        cursor.close()
+        search, params = search_clause(BOOKING_SEARCH)
+        if wants_stream():
+            # Every active booking, read row by row while the page renders
+            bookings = add_routes(iter_rows(
+                BOOKINGS_LIST_QUERY + search + " ORDER BY b.booking_date DESC, b.booking_id DESC", params
+            ), fields=('code',), refresh_on_miss=False)
+        else:
+            # Get one page of active bookings; the customer and flight pickers
+            # load on demand from /api/customers/search and /api/flights/search
+            cursor = db.cursor()
+            page = fetch_page(cursor, BOOKINGS_LIST_QUERY + search, params, BOOKINGS_LIST_KEYS, descending=True)
+            bookings = list(add_routes(page['rows'], fields=('code',)))
+            cursor.close()
 
-    return render_template('bookings.html', bookings=bookings, customers=customers, flights=flights)
+    if wants_stream():
+        return stream_page('bookings.html', bookings=bookings, page=page)
+    return render_template('bookings.html', bookings=bookings, page=page)
 
 @app.route('/bookings/add', methods=['POST'])
 @login_required
@@ -542,8 +658,12 @@ def add_booking():
             request.form['booking_status'],
             request.form['price']
         ))
+        # One counter statement per transaction keeps the row lock order fixed
+        bump_counters(cursor, {'bookings_active': 1}, booking_deltas(cursor, [cursor.lastrowid], 1),
+                      version_deltas('bookings'))
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Booking added successfully!', 'success')
     except Exception as e:
         flash(f'Error adding booking: {str(e)}', 'error')
@@ -558,6 +678,8 @@ def edit_booking(booking_id):
 
     try:
         cursor = db.cursor()
+        # Swap the booking's old revenue/status figures for the new ones
+        before = booking_deltas(cursor, [booking_id], -1)
         cursor.execute("""
             UPDATE bookings
             SET booking_reference = %s, customer_id = %s, flight_id = %s,
@@ -572,8 +694,11 @@ def edit_booking(booking_id):
             request.form['price'],
             booking_id
         ))
+        after = booking_deltas(cursor, [booking_id], 1)
+        bump_counters(cursor, before, after, version_deltas('bookings'))
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Booking updated successfully!', 'success')
     except Exception as e:
         flash(f'Error updating booking: {str(e)}', 'error')
@@ -588,23 +713,72 @@ def delete_booking(booking_id):
 
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE bookings
-            SET is_archived = TRUE, archived_at = NOW(), archived_by = %s
-            WHERE booking_id = %s
-        """, (current_user.id, booking_id))
+        archive_rows(cursor, 'bookings', [booking_id], current_user.id)
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Booking archived successfully!', 'success')
     except Exception as e:
         flash(f'Error archiving booking: {str(e)}', 'error')
 
     return redirect(url_for('bookings'))
 
+# Archived rows may point at parents that were archived too (and, with
+# ARCHIVE_MODE=cold, moved to their own archive table), so parents are
+# joined through parent_join(); airports come from the airport cache,
+# which holds archived airports too
+def archived_flights_query():
+    """SELECT for the archived flights page"""
+    return f"""
+        SELECT f.*, e.first_name as archived_by_name
+        FROM {archived_table('flights')} f
+        LEFT JOIN employees e ON f.archived_by = e.employee_id
+        WHERE f.is_archived = TRUE
+    """
+
+def archived_bookings_query():
+    """SELECT for the archived bookings page, with customer and flight details"""
+    customer_select, customer_join = parent_join(
+        'customers', 'c', 'b.customer_id', {'first_name': 'first_name', 'last_name': 'last_name', 'email': 'email'})
+    flight_select, flight_join = parent_join('flights', 'f', 'b.flight_id', {
+        'flight_number': 'flight_number',
+        'departure_airport_id': 'departure_airport_id',
+        'arrival_airport_id': 'arrival_airport_id',
+    })
+    return f"""
+        SELECT b.*, {customer_select}, {flight_select},
+               e.first_name as archived_by_name
+        FROM {archived_table('bookings')} b
+        {customer_join}
+        {flight_join}
+        LEFT JOIN employees e ON b.archived_by = e.employee_id
+        WHERE b.is_archived = TRUE
+    """
+
+ARCHIVED_FLIGHTS_QUERY = archived_flights_query()
+ARCHIVED_FLIGHTS_KEYS = [('f.archived_at', 'archived_at'), ('f.flight_id', 'flight_id')]
+ARCHIVED_BOOKINGS_QUERY = archived_bookings_query()
+ARCHIVED_BOOKINGS_KEYS = [('b.archived_at', 'archived_at'), ('b.booking_id', 'booking_id')]
+ARCHIVED_CUSTOMERS_QUERY = f"""
+    SELECT c.*, e.first_name as archived_by_name
+    FROM {archived_table('customers')} c
+    LEFT JOIN employees e ON c.archived_by = e.employee_id
+    WHERE c.is_archived = TRUE
+"""
+ARCHIVED_CUSTOMERS_KEYS = [('c.archived_at', 'archived_at'), ('c.customer_id', 'customer_id')]
+ARCHIVED_AIRPORTS_QUERY = f"""
+    SELECT a.*, e.first_name as archived_by_name
+    FROM {archived_table('airports')} a
+    LEFT JOIN employees e ON a.archived_by = e.employee_id
+    WHERE a.is_archived = TRUE
+"""
+ARCHIVED_AIRPORTS_KEYS = [('a.archived_at', 'archived_at'), ('a.airport_id', 'airport_id')]
+
 # Archive Routes
 @app.route('/archive')
 @login_required
-@no_cache
+@query_budget(3)
+@conditional_get('flights', 'customers', 'airports', 'bookings')
 def archive():
     """View all archived items"""
     db = get_db()
@@ -618,129 +792,86 @@ def archive():
     if db:
         cursor = db.cursor()
 
-        # Count archived items
-        cursor.execute("SELECT COUNT(*) as count FROM flights WHERE is_archived = TRUE")
-        result = cursor.fetchone()
-        stats['flights'] = result['count'] if result else 0
-
-        cursor.execute("SELECT COUNT(*) as count FROM customers WHERE is_archived = TRUE")
-        result = cursor.fetchone()
-        stats['customers'] = result['count'] if result else 0
-
-        cursor.execute("SELECT COUNT(*) as count FROM airports WHERE is_archived = TRUE")
-        result = cursor.fetchone()
-        stats['airports'] = result['count'] if result else 0
-
-        cursor.execute("SELECT COUNT(*) as count FROM bookings WHERE is_archived = TRUE")
-        result = cursor.fetchone()
-        stats['bookings'] = result['count'] if result else 0
-
+        # Archived counts are maintained in stats_counters by the write routes
+        counters = read_counters(cursor)
+        for table in stats:
+            stats[table] = int(counters.get(f'{table}_archived') or 0)
         cursor.close()
 
     return render_template('archive.html', stats=stats)
 
 @app.route('/archive/flights')
 @login_required
-@no_cache
+@query_budget(4)
+@conditional_get('flights', 'airports')
 def archive_flights():
     """View archived flights"""
     db = get_db()
+    page = None
     flights = []
     airports = []
 
     if db:
         cursor = db.cursor()
-        cursor.execute("""
-            SELECT f.*,
-                   a1.airport_code as departure_code, a1.city as departure_city,
-                   a2.airport_code as arrival_code, a2.city as arrival_city,
-                   e.first_name as archived_by_name
-            FROM flights f
-            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
-            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
-            LEFT JOIN employees e ON f.archived_by = e.employee_id
-            WHERE f.is_archived = TRUE
-            ORDER BY f.archived_at DESC
-        """)
-        flights = cursor.fetchall()
+        page = fetch_page(cursor, ARCHIVED_FLIGHTS_QUERY, [], ARCHIVED_FLIGHTS_KEYS, descending=True)
+        flights = list(add_routes(page['rows']))
         cursor.close()
 
-    return render_template('archive_flights.html', flights=flights)
+    return render_template('archive_flights.html', flights=flights, page=page)
 
 @app.route('/archive/customers')
 @login_required
-@no_cache
+@query_budget(3)
+@conditional_get('customers')
 def archive_customers():
     """View archived customers"""
     db = get_db()
+    page = None
     customers = []
 
     if db:
         cursor = db.cursor()
-        cursor.execute("""
-            SELECT c.*, e.first_name as archived_by_name
-            FROM customers c
-            LEFT JOIN employees e ON c.archived_by = e.employee_id
-            WHERE c.is_archived = TRUE
-            ORDER BY c.archived_at DESC
-        """)
-        customers = cursor.fetchall()
+        page = fetch_page(cursor, ARCHIVED_CUSTOMERS_QUERY, [], ARCHIVED_CUSTOMERS_KEYS, descending=True)
+        customers = page['rows']
         cursor.close()
 
-    return render_template('archive_customers.html', customers=customers)
+    return render_template('archive_customers.html', customers=customers, page=page)
 
 @app.route('/archive/airports')
 @login_required
-@no_cache
+@query_budget(3)
+@conditional_get('airports')
 def archive_airports():
     """View archived airports"""
     db = get_db()
+    page = None
     airports = []
 
     if db:
         cursor = db.cursor()
-        cursor.execute("""
-            SELECT a.*, e.first_name as archived_by_name
-            FROM airports a
-            LEFT JOIN employees e ON a.archived_by = e.employee_id
-            WHERE a.is_archived = TRUE
-            ORDER BY a.archived_at DESC
-        """)
-        airports = cursor.fetchall()
+        page = fetch_page(cursor, ARCHIVED_AIRPORTS_QUERY, [], ARCHIVED_AIRPORTS_KEYS, descending=True)
+        airports = page['rows']
         cursor.close()
 
-    return render_template('archive_airports.html', airports=airports)
+    return render_template('archive_airports.html', airports=airports, page=page)
 
 @app.route('/archive/bookings')
 @login_required
-@no_cache
+@query_budget(4)
+@conditional_get('bookings', 'customers', 'flights', 'airports')
 def archive_bookings():
     """View archived bookings"""
     db = get_db()
+    page = None
     bookings = []
 
     if db:
         cursor = db.cursor()
-        cursor.execute("""
-            SELECT b.*,
-                   c.first_name, c.last_name, c.email,
-                   f.flight_number,
-                   a1.airport_code as departure_code,
-                   a2.airport_code as arrival_code,
-                   e.first_name as archived_by_name
-            FROM bookings b
-            JOIN customers c ON b.customer_id = c.customer_id
-            JOIN flights f ON b.flight_id = f.flight_id
-            JOIN airports a1 ON f.departure_airport_id = a1.airport_id
-            JOIN airports a2 ON f.arrival_airport_id = a2.airport_id
-            LEFT JOIN employees e ON b.archived_by = e.employee_id
-            WHERE b.is_archived = TRUE
-            ORDER BY b.archived_at DESC
-        """)
-        bookings = cursor.fetchall()
+        page = fetch_page(cursor, ARCHIVED_BOOKINGS_QUERY, [], ARCHIVED_BOOKINGS_KEYS, descending=True)
+        bookings = list(add_routes(page['rows'], fields=('code',)))
         cursor.close()
 
-    return render_template('archive_bookings.html', bookings=bookings)
+    return render_template('archive_bookings.html', bookings=bookings, page=page)
 
 # Restore Routes
 @app.route('/restore/flight/<int:flight_id>', methods=['POST'])
@@ -750,13 +881,10 @@ def restore_flight(flight_id):
     db = get_db()
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE flights
-            SET is_archived = FALSE, archived_at = NULL, archived_by = NULL
-            WHERE flight_id = %s
-        """, (flight_id,))
+        restore_rows(cursor, 'flights', [flight_id])
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Flight restored successfully!', 'success')
     except Exception as e:
         flash(f'Error restoring flight: {str(e)}', 'error')
@@ -769,13 +897,10 @@ def restore_customer(customer_id):
     db = get_db()
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE customers
-            SET is_archived = FALSE, archived_at = NULL, archived_by = NULL
-            WHERE customer_id = %s
-        """, (customer_id,))
+        restore_rows(cursor, 'customers', [customer_id])
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Customer restored successfully!', 'success')
     except Exception as e:
         flash(f'Error restoring customer: {str(e)}', 'error')
@@ -788,13 +913,11 @@ def restore_airport(airport_id):
     db = get_db()
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE airports
-            SET is_archived = FALSE, archived_at = NULL, archived_by = NULL
-            WHERE airport_id = %s
-        """, (airport_id,))
+        restore_rows(cursor, 'airports', [airport_id])
         db.commit()
         cursor.close()
+        airports_changed()
+        invalidate_stats()
         flash('Airport restored successfully!', 'success')
     except Exception as e:
         flash(f'Error restoring airport: {str(e)}', 'error')
@@ -807,13 +930,10 @@ def restore_booking(booking_id):
     db = get_db()
     try:
         cursor = db.cursor()
-        cursor.execute("""
-            UPDATE bookings
-            SET is_archived = FALSE, archived_at = NULL, archived_by = NULL
-            WHERE booking_id = %s
-        """, (booking_id,))
+        restore_rows(cursor, 'bookings', [booking_id])
         db.commit()
         cursor.close()
+        invalidate_stats()
         flash('Booking restored successfully!', 'success')
     except Exception as e:
         flash(f'Error restoring booking: {str(e)}', 'error')
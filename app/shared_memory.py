@@ -0,0 +1,121 @@
+# Small shared-memory segments for state every worker process should see.
+# Each segment is a file under SHARED_CACHE_DIR mapped with mmap, so all
+# gunicorn workers on a host (forked from one master or not) share its
+# bytes. A segment holds a version counter, the version its payload was
+# built from, when the payload was built, and the payload itself; writers
+# take an exclusive flock and readers a shared one, so nobody sees a
+# half-written payload.
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:
+    # No flock (e.g. Windows dev servers): a single process needs no locking
+    fcntl = None
+
+SHARED_CACHE_DIR = os.getenv('SHARED_CACHE_DIR') or tempfile.gettempdir()
+
+# magic, version, payload version, payload built at (unix time), payload length
+HEADER = struct.Struct('<8sQqdQ')
+MAGIC = b'DLSHM001'
+GROW_STEP = 64 * 1024
+
+_segments_lock = threading.Lock()
+_segments = {}
+
+def segment_path(name):
+    """File backing the named segment, separate per database"""
+    return os.path.join(SHARED_CACHE_DIR, f"{os.getenv('DB_NAME', 'app')}-{name}.shm")
+
+def _open(name):
+    """Map the named segment in this process, creating its file on first use.
+
+    The file descriptor is opened per process: flock locks belong to the
+    open file, so one inherited across a fork would not exclude anyone.
+    """
+    with _segments_lock:
+        segment = _segments.get(name)
+        if segment and segment['pid'] == os.getpid():
+            return segment
+        fd = os.open(segment_path(name), os.O_RDWR | os.O_CREAT, 0o600)
+        segment = {'pid': os.getpid(), 'fd': fd, 'map': None, 'lock': threading.Lock()}
+        _segments[name] = segment
+    with _flock(segment, exclusive=True):
+        if os.fstat(fd).st_size < HEADER.size:
+            os.ftruncate(fd, GROW_STEP)
+            os.pwrite(fd, HEADER.pack(MAGIC, 0, -1, 0.0, 0), 0)
+    return segment
+
+@contextmanager
+def _flock(segment, exclusive):
+    """Hold this process's thread lock and a shared or exclusive flock on a segment"""
+    with segment['lock']:
+        if fcntl:
+            fcntl.flock(segment['fd'], fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(segment['fd'], fcntl.LOCK_UN)
+
+def _mapping(segment, size):
+    """Return a mapping of at least size bytes, remapping after another process grew the file"""
+    current = segment['map']
+    if current is None or len(current) < size:
+        if current is not None:
+            current.close()
+        file_size = os.fstat(segment['fd']).st_size
+        if file_size < size:
+            file_size = (size // GROW_STEP + 1) * GROW_STEP
+            os.ftruncate(segment['fd'], file_size)
+        segment['map'] = mmap.mmap(segment['fd'], file_size)
+    return segment['map']
+
+def _header(segment):
+    magic, version, payload_version, built_at, length = HEADER.unpack_from(_mapping(segment, HEADER.size), 0)
+    if magic != MAGIC:
+        return 0, -1, 0.0, 0
+    return version, payload_version, built_at, length
+
+def read_version(name):
+    """Current version counter of the named segment"""
+    return read_header(name)[0]
+
+def read_header(name):
+    """Return (version, payload_version, built_at) for the named segment, without its payload"""
+    segment = _open(name)
+    with _flock(segment, exclusive=False):
+        return _header(segment)[:3]
+
+def read_segment(name):
+    """Return (version, payload_version, built_at, payload bytes) for the named segment"""
+    segment = _open(name)
+    with _flock(segment, exclusive=False):
+        version, payload_version, built_at, length = _header(segment)
+        payload = bytes(_mapping(segment, HEADER.size + length)[HEADER.size:HEADER.size + length])
+    return version, payload_version, built_at, payload
+
+def write_segment(name, payload_version, payload):
+    """Store payload as built from payload_version (the version read before building it); return its build time"""
+    segment = _open(name)
+    built_at = time.time()
+    with _flock(segment, exclusive=True):
+        version = _header(segment)[0]
+        data = _mapping(segment, HEADER.size + len(payload))
+        data[HEADER.size:HEADER.size + len(payload)] = payload
+        HEADER.pack_into(data, 0, MAGIC, version, payload_version, built_at, len(payload))
+    return built_at
+
+def bump_version(name):
+    """Increment the named segment's version, marking its payload stale everywhere; return the new version"""
+    segment = _open(name)
+    with _flock(segment, exclusive=True):
+        version, payload_version, built_at, length = _header(segment)
+        HEADER.pack_into(_mapping(segment, HEADER.size), 0, MAGIC, version + 1, payload_version, built_at, length)
+        return version + 1
@@ -8,7 +8,10 @@
 // ================================================
 
 /**
- * Initialize table search functionality
+ * Initialize server-side table search
+ * Fetches the matching page from the server (?q=) as the user types and
+ * swaps in its rows and pager, so search covers every row, not just the
+ * rows already on the page.
  * @param {string} searchInputId - ID of the search input
  * @param {string} tableId - ID of the table to search
  */
@@ -18,68 +21,55 @@ function initTableSearch(searchInputId, tableId) {
 
     if (!searchInput || !table) return;
 
-    searchInput.addEventListener('keyup', function() {
-        const filter = this.value.toLowerCase();
-        const tbody = table.querySelector('tbody');
-        const rows = tbody.getElementsByTagName('tr');
+    let timer = null;
+    let controller = null;
 
-        let visibleCount = 0;
+    searchInput.addEventListener('input', function() {
+        const term = this.value.trim();
+        clearTimeout(timer);
 
-        for (let i = 0; i < rows.length; i++) {
-            const row = rows[i];
-            const cells = row.getElementsByTagName('td');
-            let found = false;
+        // Wait for a pause in typing before asking the server
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            controller = new AbortController();
 
-            for (let j = 0; j < cells.length; j++) {
-                const cellText = cells[j].textContent || cells[j].innerText;
-                if (cellText.toLowerCase().indexOf(filter) > -1) {
-                    found = true;
-                    break;
-                }
-            }
-
-            if (found) {
-                row.style.display = '';
-                visibleCount++;
-
-                // Add fade-in animation
-                row.style.animation = 'fadeIn 0.3s ease';
+            const url = new URL(window.location.href);
+            url.searchParams.delete('after');
+            url.searchParams.delete('before');
+            if (term) {
+                url.searchParams.set('q', term);
             } else {
-                row.style.display = 'none';
+                url.searchParams.delete('q');
             }
-        }
 
-        // Show/hide "no results" message
-        showNoResults(tbody, visibleCount, filter);
+            fetch(url, { signal: controller.signal, credentials: 'same-origin' })
+                .then(response => response.text())
+                .then(html => {
+                    showSearchResults(html, table);
+                    window.history.replaceState(null, '', url);
+                })
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        showToast('Search failed. Please try again.', 'danger');
+                    }
+                });
+        }, 300);
     });
 }
 
 /**
- * Show "no results" message when table is empty
+ * Swap a table's rows and pager for the ones in a freshly fetched page
  */
-function showNoResults(tbody, visibleCount, searchTerm) {
-    let noResultsRow = tbody.querySelector('.no-results-row');
-
-    if (visibleCount === 0 && searchTerm !== '') {
-        if (!noResultsRow) {
-            const colCount = tbody.querySelector('tr')?.getElementsByTagName('td').length || 1;
-            noResultsRow = document.createElement('tr');
-            noResultsRow.className = 'no-results-row';
-            noResultsRow.innerHTML = `
-                <td colspan="${colCount}" class="text-center py-4">
-                    <div class="empty-state">
-                        <i class="fas fa-search fa-3x mb-3 d-block" style="color: var(--delta-blue); opacity: 0.3;"></i>
-                        <h5>No results found</h5>
-                        <p class="text-muted">Try adjusting your search terms</p>
-                    </div>
-                </td>
-            `;
-            tbody.appendChild(noResultsRow);
-        }
-        noResultsRow.style.display = '';
-    } else if (noResultsRow) {
-        noResultsRow.style.display = 'none';
-    }
+function showSearchResults(html, table) {
+    const page = new DOMParser().parseFromString(html, 'text/html');
+    const newTable = page.getElementById(table.id);
+    if (!newTable) return;
+
+    table.querySelector('tbody').replaceWith(newTable.querySelector('tbody'));
+
+    const pager = table.closest('.card-body')?.querySelector('.table-pager');
+    const newPager = page.querySelector('.table-pager');
+    if (pager && newPager) pager.replaceWith(newPager);
 }
 
 // ================================================
@@ -386,6 +376,93 @@ function initModalEnhancements() {
     });
 }
 
+// ================================================
+// Typeahead Lookups
+// ================================================
+
+/**
+ * Fill a <select> from a JSON search endpoint as the user types
+ * @param {HTMLInputElement} input - Search box with data-lookup-url and data-lookup-target
+ */
+function initLookup(input) {
+    const select = document.getElementById(input.dataset.lookupTarget);
+    if (!select) return;
+
+    let timer = null;
+    let controller = null;
+
+    input.addEventListener('input', function() {
+        const term = this.value.trim();
+        clearTimeout(timer);
+
+        // Wait for a pause in typing before asking the server
+        timer = setTimeout(() => {
+            if (controller) controller.abort();
+            if (!term) return;
+
+            controller = new AbortController();
+            fetch(`${input.dataset.lookupUrl}?q=${encodeURIComponent(term)}`, {
+                signal: controller.signal,
+                credentials: 'same-origin'
+            })
+                .then(response => response.ok ? response.json() : { results: [] })
+                .then(data => fillLookupOptions(select, data.results))
+                .catch(error => {
+                    if (error.name !== 'AbortError') {
+                        showToast('Search failed. Please try again.', 'danger');
+                    }
+                });
+        }, 250);
+    });
+}
+
+/**
+ * Replace a lookup <select>'s options with search results, keeping the current choice
+ */
+function fillLookupOptions(select, results) {
+    const selected = select.selectedOptions[0];
+    const keep = selected && selected.value ? selected : null;
+
+    select.innerHTML = '';
+    const placeholder = document.createElement('option');
+    placeholder.value = '';
+    placeholder.textContent = results.length ? `Select one of ${results.length} matches` : 'No matches found';
+    select.appendChild(placeholder);
+
+    if (keep) select.appendChild(keep);
+    results.forEach(result => {
+        if (keep && String(result.id) === keep.value) return;
+        const option = document.createElement('option');
+        option.value = result.id;
+        option.textContent = result.label;
+        select.appendChild(option);
+    });
+
+    if (keep) select.value = keep.value;
+}
+
+/**
+ * Set a lookup <select> to a single known option (used when editing a record)
+ */
+function setLookupOption(selectId, value, label) {
+    const select = document.getElementById(selectId);
+    if (!select) return;
+
+    select.innerHTML = '';
+    const option = document.createElement('option');
+    option.value = value;
+    option.textContent = label;
+    select.appendChild(option);
+    select.value = String(value);
+}
+
+/**
+ * Wire up every search box that declares a lookup endpoint
+ */
+function initLookups() {
+    document.querySelectorAll('[data-lookup-url]').forEach(initLookup);
+}
+
 // ================================================
 // Initialize on Page Load
 // ================================================
@@ -397,6 +474,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initAutoDismissAlerts();
     initTableRowHighlight();
     initModalEnhancements();
+    initLookups();
     // initDarkMode(); // Uncomment to enable dark mode
 
     // Initialize stat counters if they exist
@@ -440,5 +518,6 @@ window.deltaApp = {
     hideLoading,
     showToast,
     confirmDeleteAction,
+    setLookupOption,
     toggleDarkMode
 };
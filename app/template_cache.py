@@ -0,0 +1,28 @@
+# Template compilation cache.
+# Jinja compiles a template to Python the first time it is rendered, which
+# puts 10-30 ms on the first hit of every page in every new worker. The
+# bytecode cache keeps the compiled code on disk (keyed by the template's
+# source checksum, so edits invalidate it), and warm_templates() compiles
+# every template up front: gunicorn.conf.py runs it in the master before
+# forking, so workers start with all templates already in memory.
+import os
+import time
+
+from jinja2 import FileSystemBytecodeCache
+
+# Empty: Jinja's per-user directory under the system temp dir
+TEMPLATE_CACHE_DIR = os.getenv('TEMPLATE_CACHE_DIR') or None
+
+def enable_bytecode_cache(app):
+    """Store the app's compiled templates on disk"""
+    if TEMPLATE_CACHE_DIR:
+        os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
+
+def warm_templates(app):
+    """Compile (or load from the bytecode cache) every template; return (count, seconds)"""
+    started = time.perf_counter()
+    names = sorted(app.jinja_env.list_templates())
+    for name in names:
+        app.jinja_env.get_template(name)
+    return len(names), time.perf_counter() - started
@@ -0,0 +1,85 @@
+# Per-process cache of logged-in User objects, so Flask-Login's user_loader
+# does not query employees on every authenticated request.
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from flask import session
+
+from .models import User
+
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', 60))
+USER_CACHE_MAX_ENTRIES = int(os.getenv('USER_CACHE_MAX_ENTRIES', 500))
+
+# Optionally rebuild the User from claims stored in the signed session
+# cookie, re-reading the employees row every USER_REVALIDATE_SECONDS
+USER_SESSION_CLAIMS = os.getenv('USER_SESSION_CLAIMS', 'false').lower() == 'true'
+USER_REVALIDATE_SECONDS = float(os.getenv('USER_REVALIDATE_SECONDS', 300))
+
+SESSION_CLAIMS_KEY = 'user_claims'
+
+# employee_id -> (expires_at, User), least recently used first
+_users = OrderedDict()
+_users_lock = threading.Lock()
+
+def get_cached_user(user_id):
+    """Return the cached User for user_id, or None if it is missing or expired"""
+    key = str(user_id)
+    with _users_lock:
+        item = _users.get(key)
+        if item is None:
+            return None
+        if item[0] < time.monotonic():
+            del _users[key]
+            return None
+        _users.move_to_end(key)
+        return item[1]
+
+def cache_user(user):
+    """Cache a User for USER_CACHE_TTL seconds (a ttl of 0 disables caching)"""
+    if USER_CACHE_TTL <= 0:
+        return
+    with _users_lock:
+        _users[user.get_id()] = (time.monotonic() + USER_CACHE_TTL, user)
+        _users.move_to_end(user.get_id())
+        while len(_users) > USER_CACHE_MAX_ENTRIES:
+            _users.popitem(last=False)
+
+def forget_user(user_id):
+    """Drop a user from the cache; call after changing or archiving their employees row"""
+    with _users_lock:
+        _users.pop(str(user_id), None)
+
+def clear_user_cache():
+    """Drop every cached user"""
+    with _users_lock:
+        _users.clear()
+
+def store_session_claims(user):
+    """Save the user's details in the signed session (when USER_SESSION_CLAIMS is on)"""
+    if not USER_SESSION_CLAIMS:
+        return
+    session[SESSION_CLAIMS_KEY] = {
+        'id': user.get_id(),
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'role': user.role,
+        'checked_at': time.time(),
+    }
+
+def user_from_session_claims(user_id):
+    """Rebuild the User from session claims, or None if they are missing, foreign or due a recheck"""
+    if not USER_SESSION_CLAIMS:
+        return None
+    claims = session.get(SESSION_CLAIMS_KEY)
+    if not claims or claims.get('id') != str(user_id):
+        return None
+    if time.time() - claims.get('checked_at', 0) > USER_REVALIDATE_SECONDS:
+        return None
+    return User(int(claims['id']), claims['email'], claims['first_name'], claims['last_name'], claims['role'])
+
+def clear_session_claims():
+    """Remove the user's claims from the session"""
+    session.pop(SESSION_CLAIMS_KEY, None)
@@ -0,0 +1,97 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.blueprints.analytics import AIRCRAFT_SEATS, compute_analytics
+
+# Synthetic data shape: N bookings made over one year, spread over
+# N / 150 flights on 400 routes
+DEFAULT_BOOKINGS = 1_000_000
+ROUTES = 400
+STATUSES = ['Confirmed', 'Pending', 'Cancelled']
+
+def synthetic_frames(n_bookings, seed=42):
+    """Build rollup, booking and flight frames shaped like the load_*() output"""
+    rng = np.random.default_rng(seed)
+    n_flights = max(n_bookings // 150, 1)
+    aircraft = np.array(list(AIRCRAFT_SEATS))
+    routes = np.array([f'A{i // 20:02d}-B{i % 20:02d}' for i in range(ROUTES)])
+
+    flight_aircraft = aircraft[rng.integers(0, len(aircraft), n_flights)]
+    flight_route = routes[rng.integers(0, ROUTES, n_flights)]
+
+    flight_id = rng.integers(0, n_flights, n_bookings)
+    booking_day = np.datetime64('2025-01-01') + rng.integers(0, 365, n_bookings).astype('timedelta64[D]')
+    bookings = pd.DataFrame({
+        'booking_id': np.arange(1, n_bookings + 1),
+        'flight_id': flight_id + 1,
+        'booking_status': pd.Categorical(rng.choice(STATUSES, n_bookings, p=[0.7, 0.2, 0.1])),
+        'price': rng.gamma(4.0, 90.0, n_bookings).round(2),
+        'aircraft_type': pd.Categorical(flight_aircraft[flight_id]),
+    })
+
+    # What refresh_rollups.py would have stored for these bookings
+    route_days = (
+        bookings.assign(day=booking_day, route=flight_route[flight_id])
+        .groupby(['day', 'route'])['price'].agg(bookings='size', priced='count', revenue='sum')
+        .reset_index()
+    )
+    route_days['route'] = route_days['route'].astype('category')
+
+    booked = bookings.loc[bookings['booking_status'] != 'Cancelled', 'flight_id'].value_counts()
+    flights = pd.DataFrame({'flight_id': np.arange(1, n_flights + 1), 'aircraft_type': flight_aircraft})
+    flights['booked'] = flights['flight_id'].map(booked).fillna(0).astype('int64')
+    return route_days, bookings, flights, flight_route[flight_id]
+
+def row_by_row(bookings, flights, booking_route):
+    """The same headline figures computed from raw bookings with a plain Python loop, for comparison"""
+    by_route, by_aircraft, booked = {}, {}, {}
+    prices = []
+    for booking, route in zip(bookings.itertuples(index=False), booking_route):
+        by_route[route] = by_route.get(route, 0) + booking.price
+        by_aircraft[booking.aircraft_type] = by_aircraft.get(booking.aircraft_type, 0) + booking.price
+        if booking.booking_status != 'Cancelled':
+            booked[booking.flight_id] = booked.get(booking.flight_id, 0) + 1
+        prices.append(booking.price)
+    prices.sort()
+    seats = sum(AIRCRAFT_SEATS[flight.aircraft_type] for flight in flights.itertuples(index=False))
+    return {
+        'routes': sorted(by_route.items(), key=lambda item: -item[1])[:20],
+        'p50': prices[len(prices) // 2],
+        'load_factor': sum(booked.values()) / seats,
+    }
+
+def timed(label, function, *args):
+    """Run function once and print how long it took"""
+    started = time.perf_counter()
+    result = function(*args)
+    print(f"  {label:<28} {time.perf_counter() - started:8.3f}s")
+    return result
+
+def main():
+    """Main function to run the benchmark"""
+    n_bookings = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BOOKINGS
+    compare = '--compare' in sys.argv
+
+    print("=" * 50)
+    print("Delta Airlines - Revenue Analytics Benchmark")
+    print("=" * 50)
+
+    route_days, bookings, flights, booking_route = timed(f"generate {n_bookings} bookings", synthetic_frames, n_bookings)
+    print(f"  {len(flights)} flights, {bookings.memory_usage(deep=True).sum() / 1e6:.1f} MB of bookings, "
+          f"{len(route_days)} rollup rows")
+
+    result = timed("compute_analytics (pandas)", compute_analytics, route_days, bookings, flights)
+    timed("compute_analytics (again)", compute_analytics, route_days, bookings, flights)
+    if compare:
+        naive = timed("row-by-row Python loop", row_by_row, bookings, flights, booking_route)
+        assert abs(naive['load_factor'] - result['load_factor']['overall']) < 1e-9
+        assert [route for route, _ in naive['routes']] == [row['route'] for row in result['revenue_by_route']]
+
+    print(f"\n[OK] revenue ${result['summary']['revenue']:,.2f}, "
+          f"load factor {result['load_factor']['overall']:.1%}, p50 ${result['price_percentiles']['p50']:.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+
+from flask import g, render_template, stream_template
+
+from app import app, compression
+from app.compression import compress_responses
+from app.models import User
+
+# Synthetic data shape: a default listing page, airports for the dropdowns,
+# and the row count of a ?stream=1 listing
+PAGE_ROWS = 50
+AIRPORTS = 60
+STREAM_ROWS = 2000
+STREAM_CHUNK_SIZE = 16 * 1024
+# Each measurement repeats for about this many CPU seconds
+MEASURE_SECONDS = 0.5
+
+# (label, encoding, gzip level or brotli quality)
+SETTINGS = [
+    ('gzip 1', 'gzip', 1), ('gzip 6', 'gzip', 6), ('gzip 9', 'gzip', 9),
+    ('br 1', 'br', 1), ('br 4', 'br', 4), ('br 5', 'br', 5),
+]
+
+def synthetic_rows(n):
+    """Airports, flights and bookings shaped like the listing queries' rows"""
+    airports = [{'airport_id': i, 'airport_code': f'A{i:02d}', 'city': f'City {i}'} for i in range(1, AIRPORTS + 1)]
+    flights, bookings = [], []
+    for i in range(1, n + 1):
+        departure = datetime(2025, 3, 1, 6) + timedelta(minutes=37 * i)
+        flight = {
+            'flight_id': i, 'flight_number': f'DL{1000 + i}',
+            'departure_airport_id': i % AIRPORTS + 1, 'arrival_airport_id': (i * 7) % AIRPORTS + 1,
+            'departure_code': f'A{i % AIRPORTS + 1:02d}', 'arrival_code': f'A{(i * 7) % AIRPORTS + 1:02d}',
+            'departure_city': f'City {i % AIRPORTS + 1}', 'arrival_city': f'City {(i * 7) % AIRPORTS + 1}',
+            'departure_time': departure, 'arrival_time': departure + timedelta(hours=2, minutes=i % 90),
+            'aircraft_type': ['Boeing 737', 'Airbus A320', 'Boeing 757'][i % 3],
+            'status': ['Scheduled', 'Delayed', 'Boarding'][i % 3], 'gate': f'B{i % 40}',
+        }
+        flights.append(flight)
+        bookings.append(dict(
+            flight, booking_id=i, booking_reference=f'BK{i * 7919 % 1000000:06d}', customer_id=i * 13,
+            first_name=f'First{i % 500}', last_name=f'Last{i % 700}', email=f'customer{i * 13}@example.com',
+            seat_number=f'{i % 30 + 1}{"ABCDEF"[i % 6]}', booking_status=['Confirmed', 'Pending', 'Cancelled'][i % 3],
+            price=round(99 + (i * 37) % 800 + 0.99, 2),
+        ))
+    return airports, flights, bookings
+
+def render_pages():
+    """Render the typical responses: (label, list of body chunks, streamed?)"""
+    airports, flights, bookings = synthetic_rows(STREAM_ROWS)
+    page = {'rows': [], 'next': 'token', 'prev': None, 'per_page': PAGE_ROWS}
+    with app.test_request_context('/flights'):
+        g._login_user = User(1, 'admin@example.com', 'Admin', 'User', 'admin')
+        flights_page = render_template('flights.html', flights=flights[:PAGE_ROWS], airports=airports, page=page)
+        bookings_page = render_template('bookings.html', bookings=bookings[:PAGE_ROWS], page=page)
+        streamed = ''.join(stream_template('flights.html', flights=flights, airports=airports, page=page))
+    api = json.dumps({'results': [{'id': f['flight_id'], 'label': f"{f['flight_number']} - {f['departure_code']} → "
+                                   f"{f['arrival_code']}"} for f in flights[:PAGE_ROWS]]})
+    small = json.dumps({'results': [{'id': 1, 'label': 'DL1001 - A02 → A08'}]})
+
+    streamed = streamed.encode()
+    return [
+        ('flights page (50 rows)', [flights_page.encode()], False),
+        ('bookings page (50 rows)', [bookings_page.encode()], False),
+        (f'flights ?stream=1 ({STREAM_ROWS} rows)',
+         [streamed[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(streamed), STREAM_CHUNK_SIZE)], True),
+        ('lookup JSON (50 results)', [api.encode()], False),
+        ('lookup JSON (1 result)', [small.encode()], False),
+    ]
+
+def serve(chunks, streamed, mimetype):
+    """A WSGI app returning the given body, with a Content-Length unless it is streamed"""
+    def wsgi_app(environ, start_response):
+        headers = [('Content-Type', mimetype)]
+        if not streamed:
+            headers.append(('Content-Length', str(sum(len(chunk) for chunk in chunks))))
+        start_response('200 OK', headers)
+        return iter(chunks)
+    return wsgi_app
+
+def measure(middleware, encoding):
+    """Bytes on the wire and CPU milliseconds for one request through middleware"""
+    environ = {'REQUEST_METHOD': 'GET', 'HTTP_ACCEPT_ENCODING': encoding}
+    started = time.process_time()
+    requests = 0
+    while requests < 3 or time.process_time() - started < MEASURE_SECONDS:
+        size = sum(len(chunk) for chunk in middleware(environ, lambda status, headers, exc_info=None: None))
+        requests += 1
+    return size, (time.process_time() - started) * 1000 / requests
+
+def main():
+    """Main function to run the benchmark"""
+    print("=" * 50)
+    print("Delta Airlines - Response Compression Benchmark")
+    print("=" * 50)
+
+    settings = SETTINGS if compression.brotli else [s for s in SETTINGS if s[1] == 'gzip']
+    if '--quick' in sys.argv:
+        settings = [s for s in settings if s[0] in ('gzip 6', 'br 4')]
+
+    for label, chunks, streamed in render_pages():
+        mimetype = 'application/json' if label.startswith('lookup') else 'text/html; charset=utf-8'
+        middleware = compress_responses(serve(chunks, streamed, mimetype))
+        raw, cpu = measure(middleware, 'identity')
+        print(f"\n{label}: {raw:,} bytes uncompressed ({cpu:.2f} ms)")
+        for name, encoding, level in settings:
+            compression.COMPRESS_LEVEL = level if encoding == 'gzip' else 6
+            compression.COMPRESS_BROTLI_QUALITY = level if encoding == 'br' else 4
+            size, cpu = measure(middleware, encoding)
+            print(f"  {name:<8} {size:>9,} bytes  {raw / size:5.1f}x  {cpu:7.2f} ms CPU")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Peak RSS and time to first byte of the full flights listing, rendered
+# buffered (every row in one page, as before ?stream=1 existed) and
+# streamed (?stream=1). Each mode runs in its own process so the peak RSS
+# of one does not hide the other.
+#
+#   python benchmark_streaming.py            against the database in .env
+#   python benchmark_streaming.py 200000 --fake
+#                                            against 200,000 generated rows,
+#                                            no MySQL server needed
+DEFAULT_FAKE_ROWS = 20000
+MODES = ['buffered', 'stream']
+
+def rss_mb():
+    """Current resident set size of this process in MB (Linux)"""
+    with open('/proc/self/status', encoding='ascii') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+def peak_rss_mb():
+    """Highest resident set size this process has reached, in MB"""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def fake_flight(i):
+    """One generated flights row"""
+    departure = datetime.datetime(2025, 1, 1) + datetime.timedelta(minutes=i)
+    return {
+        'flight_id': i, 'flight_number': f'DL{i:05d}', 'departure_airport_id': 1, 'arrival_airport_id': 2,
+        'departure_time': departure, 'arrival_time': departure + datetime.timedelta(hours=3),
+        'aircraft_type': 'Boeing 737', 'status': 'Scheduled', 'gate': 'A12', 'is_archived': 0,
+    }
+
+FAKE_AIRPORTS = [
+    {'airport_id': 1, 'airport_code': 'ATL', 'airport_name': 'Hartsfield-Jackson', 'city': 'Atlanta',
+     'state': 'GA', 'country': 'USA', 'timezone': 'America/New_York', 'is_archived': 0},
+    {'airport_id': 2, 'airport_code': 'JFK', 'airport_name': 'John F. Kennedy', 'city': 'New York',
+     'state': 'NY', 'country': 'USA', 'timezone': 'America/New_York', 'is_archived': 0},
+]
+
+def fake_connect(n_rows):
+    """pymysql.connect() stand-in whose flights query returns n_rows generated rows.
+
+    Rows are generated as they are fetched, like a server-side cursor, so
+    only what the app itself holds shows up in the RSS.
+    """
+    def new_cursor(*args):
+        state = {'rows': iter(())}
+        cursor = mock.MagicMock()
+
+        def execute(query, params=None):
+            if 'FROM flights' in query:
+                limit = params[-1] if 'LIMIT' in query else n_rows
+                state['rows'] = (fake_flight(i) for i in range(1, min(limit, n_rows) + 1))
+            elif 'FROM airports' in query:
+                state['rows'] = iter(FAKE_AIRPORTS)
+            else:
+                state['rows'] = iter(())
+
+        cursor.execute.side_effect = execute
+        cursor.fetchall.side_effect = lambda: list(state['rows'])
+        cursor.fetchmany.side_effect = lambda size=1: [row for _, row in zip(range(size), state['rows'])]
+        cursor.fetchone.side_effect = lambda: next(state['rows'], None)
+        return cursor
+
+    def connect(**kwargs):
+        conn = mock.MagicMock()
+        conn._closed = False
+        conn.cursor.side_effect = new_cursor
+        return conn
+    return connect
+
+def admin_id(app):
+    """employee_id of an admin to run the requests as"""
+    from app.db_connect import get_db
+    with app.app_context():
+        cursor = get_db().cursor()
+        cursor.execute("SELECT employee_id FROM employees WHERE role = 'admin' ORDER BY employee_id LIMIT 1")
+        row = cursor.fetchone()
+        cursor.execute("SELECT COUNT(*) as n FROM flights WHERE is_archived = FALSE")
+        count = cursor.fetchone()['n']
+        cursor.close()
+    if not row:
+        raise RuntimeError('no admin employee to log in as')
+    return row['employee_id'], count
+
+def run_child(mode, n_rows, fake):
+    """Measure one mode in this process and print the figures as JSON"""
+    if fake:
+        mock.patch('pymysql.connect', fake_connect(n_rows)).start()
+    from app import app, functions
+    from app.models import User
+
+    if fake:
+        app.login_manager._user_callback = lambda user_id: User(1, 'bench@example.com', 'Bench', 'Mark', 'admin')
+        user_id = 1
+    else:
+        user_id, n_rows = admin_id(app)
+    # The buffered mode renders the whole table as one page
+    functions.MAX_PAGE_SIZE = max(n_rows, 1)
+
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+    url = '/flights?stream=1' if mode == 'stream' else f'/flights?per_page={n_rows}'
+
+    # Warm up templates, the airport cache and the pool on a small page
+    client.get('/flights?per_page=10')
+    baseline = rss_mb()
+
+    started = time.perf_counter()
+    response = client.get(url, buffered=False, headers={'Accept-Encoding': 'identity'})
+    body = iter(response.response)
+    size = len(next(body, b''))
+    ttfb = time.perf_counter() - started
+    size += sum(len(chunk) for chunk in body)
+    response.close()
+    total = time.perf_counter() - started
+
+    print(json.dumps({
+        'mode': mode, 'rows': n_rows, 'status': response.status_code, 'bytes': size,
+        'ttfb_ms': ttfb * 1000, 'total_ms': total * 1000,
+        'baseline_rss_mb': baseline, 'peak_rss_mb': peak_rss_mb(),
+    }))
+
+def measure(mode, n_rows, fake):
+    """Run one mode in a fresh interpreter and return its figures"""
+    args = [sys.executable, os.path.abspath(__file__), '--child', mode, str(n_rows)] + (['--fake'] if fake else [])
+    result = subprocess.run(args, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def main():
+    """Main function to run the benchmark"""
+    if '--child' in sys.argv:
+        args = sys.argv[sys.argv.index('--child') + 1:]
+        run_child(args[0], int(args[1]), '--fake' in args)
+        return
+
+    fake = '--fake' in sys.argv
+    numbers = [arg for arg in sys.argv[1:] if arg.isdigit()]
+    n_rows = int(numbers[0]) if numbers else DEFAULT_FAKE_ROWS
+
+    print("=" * 50)
+    print("Delta Airlines - Streaming Listing Benchmark")
+    print("=" * 50)
+    print(f"Source: {f'{n_rows} generated flights (--fake)' if fake else 'database from .env'}\n")
+
+    for mode in MODES:
+        try:
+            result = measure(mode, n_rows, fake)
+        except RuntimeError as e:
+            print(f"[ERROR] {mode}: {e}")
+            sys.exit(1)
+        growth = result['peak_rss_mb'] - result['baseline_rss_mb']
+        print(f"[OK] {mode:<8} {result['rows']} rows, {result['bytes'] / 1e6:.1f} MB of HTML: "
+              f"TTFB {result['ttfb_ms']:8.1f} ms, total {result['total_ms'] / 1000:6.2f} s, "
+              f"peak RSS {result['peak_rss_mb']:6.1f} MB (+{growth:.1f} MB over baseline)")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from app.blueprints.assets import DIST_DIR, MANIFEST_PATH, PRECOMPRESSED_EXTENSIONS, SOURCE_DIR, STATIC_DIR
+
+HASH_LENGTH = 12
+
+def fingerprint(path):
+    """Short content hash of a file"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:HASH_LENGTH]
+
+def write_if_smaller(path, data, original_size):
+    """Write a compressed variant only when it actually saves bytes; return whether it was written"""
+    if len(data) >= original_size:
+        return False
+    with open(path, 'wb') as f:
+        f.write(data)
+    return True
+
+def build_asset(source, relative):
+    """Copy one asset to its fingerprinted name and precompress it; return the fingerprinted relative path"""
+    stem, extension = os.path.splitext(relative)
+    hashed = f"{stem}.{fingerprint(source)}{extension}"
+    target = os.path.join(DIST_DIR, hashed)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    shutil.copyfile(source, target)
+
+    variants = []
+    if extension in PRECOMPRESSED_EXTENSIONS:
+        with open(source, 'rb') as f:
+            data = f.read()
+        # mtime=0 keeps the .gz byte-identical across builds
+        if write_if_smaller(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0), len(data)):
+            variants.append(f"gz {os.path.getsize(target + '.gz')}")
+        if brotli and write_if_smaller(target + '.br', brotli.compress(data, quality=11), len(data)):
+            variants.append(f"br {os.path.getsize(target + '.br')}")
+
+    print(f"[OK] {relative} -> {hashed} ({os.path.getsize(source)} bytes"
+          f"{', ' + ', '.join(variants) if variants else ''})")
+    return hashed
+
+def build_assets():
+    """Build static/dist from static/assets and write the manifest.
+
+    Files from earlier builds are left in place, so pages still cached
+    with the old names keep working.
+    """
+    os.makedirs(DIST_DIR, exist_ok=True)
+
+    manifest = {}
+    for folder, _, files in os.walk(SOURCE_DIR):
+        for name in sorted(files):
+            source = os.path.join(folder, name)
+            relative = os.path.relpath(source, STATIC_DIR).replace(os.sep, '/')
+            manifest[relative] = build_asset(source, relative)
+
+    # Written last, so the app only switches to the new names once every file exists
+    with open(MANIFEST_PATH + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(MANIFEST_PATH + '.tmp', MANIFEST_PATH)
+    return manifest
+
+def main():
+    """Main function to run the asset build"""
+    print("=" * 50)
+    print("Delta Airlines - Build Static Assets")
+    print("=" * 50)
+
+    if not brotli:
+        print("[SKIP] brotli is not installed; writing gzip variants only")
+
+    try:
+        manifest = build_assets()
+    except OSError as e:
+        print(f"[ERROR] Error building assets: {e}")
+        sys.exit(1)
+
+    print("\n" + "=" * 50)
+    print(f"Build complete! {len(manifest)} assets listed in {os.path.relpath(MANIFEST_PATH)}")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,7 @@
 -- Delta Airlines Employee Portal Database Schema
 -- 5 Tables: employees, airports, flights, customers, bookings
+-- Plus stats_counters, which the app keeps in sync with them, and the
+-- daily revenue rollups that refresh_rollups.py maintains
 
 -- Table 1: Employees (for login and authentication)
 CREATE TABLE IF NOT EXISTS employees (
@@ -37,6 +39,7 @@ CREATE TABLE IF NOT EXISTS flights (
     status VARCHAR(20) DEFAULT 'Scheduled',
     gate VARCHAR(10),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (departure_airport_id) REFERENCES airports(airport_id),
     FOREIGN KEY (arrival_airport_id) REFERENCES airports(airport_id)
 );
@@ -63,13 +66,54 @@ CREATE TABLE IF NOT EXISTS bookings (
     seat_number VARCHAR(10),
     booking_status VARCHAR(20) DEFAULT 'Confirmed',
     price DECIMAL(10, 2),
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (customer_id) REFERENCES customers(customer_id),
     FOREIGN KEY (flight_id) REFERENCES flights(flight_id)
 );
 
+-- Table 6: Statistics counters (maintained by the app, rebuilt by reconcile_stats.py)
+CREATE TABLE IF NOT EXISTS stats_counters (
+    counter_name VARCHAR(100) PRIMARY KEY,
+    counter_value DECIMAL(16, 2) NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Tables 7-10: Daily revenue rollups (refreshed by refresh_rollups.py from cron)
+CREATE TABLE IF NOT EXISTS rollup_state (
+    rollup_name VARCHAR(50) PRIMARY KEY,
+    watermark DATETIME NOT NULL,
+    refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS rollup_pending_days (
+    day DATE PRIMARY KEY
+);
+
+CREATE TABLE IF NOT EXISTS daily_route_revenue (
+    day DATE NOT NULL,
+    departure_airport_id INT NOT NULL,
+    arrival_airport_id INT NOT NULL,
+    bookings INT NOT NULL,
+    priced INT NOT NULL,
+    revenue DECIMAL(16, 2) NOT NULL,
+    PRIMARY KEY (day, departure_airport_id, arrival_airport_id)
+);
+
+CREATE TABLE IF NOT EXISTS daily_status_counts (
+    day DATE NOT NULL,
+    departure_airport_id INT NOT NULL,
+    arrival_airport_id INT NOT NULL,
+    booking_status VARCHAR(20) NOT NULL,
+    bookings INT NOT NULL,
+    revenue DECIMAL(16, 2) NOT NULL,
+    PRIMARY KEY (day, departure_airport_id, arrival_airport_id, booking_status)
+);
+
 -- Create indexes for better query performance
 CREATE INDEX idx_flight_number ON flights(flight_number);
 CREATE INDEX idx_employee_email ON employees(email);
 CREATE INDEX idx_customer_email ON customers(email);
 CREATE INDEX idx_booking_reference ON bookings(booking_reference);
 CREATE INDEX idx_departure_time ON flights(departure_time);
+CREATE INDEX idx_flights_updated_at ON flights(updated_at);
+CREATE INDEX idx_bookings_updated_at ON bookings(updated_at);
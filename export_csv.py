@@ -0,0 +1,117 @@
+import mysql.connector
+from mysql.connector import Error
+import gzip
+import os
+import sys
+import time
+from datetime import date
+from dotenv import load_dotenv
+
+from app.blueprints.exports import EXPORT_FETCH_SIZE, EXPORT_SPECS, csv_chunks, export_query
+
+# Load environment variables
+load_dotenv()
+
+USAGE = ("Usage: python export_csv.py <bookings|flights> <out.csv|out.csv.gz> "
+         "[--from=YYYY-MM-DD] [--to=YYYY-MM-DD] [--status=STATUS]")
+
+def create_connection():
+    """Create database connection"""
+    try:
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306))
+        )
+        if connection.is_connected():
+            print("[OK] Successfully connected to the database")
+            return connection
+    except Error as e:
+        print(f"[ERROR] Error connecting to database: {e}")
+        return None
+
+def fetch_rows(cursor, query, params):
+    """Yield rows from an unbuffered cursor EXPORT_FETCH_SIZE at a time"""
+    cursor.execute(query, params)
+    rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+    while rows:
+        yield from rows
+        rows = cursor.fetchmany(EXPORT_FETCH_SIZE)
+
+def export_file(connection, table, path, filters):
+    """Write one extract to path (gzipped if it ends in .gz); return the row count"""
+    query, params = export_query(table, **filters)
+    print(f"\nExporting {table} to {path}...")
+
+    started = time.monotonic()
+    count = 0
+    # mysql.connector cursors are unbuffered unless asked otherwise
+    cursor = connection.cursor(dictionary=True)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', newline='', encoding='utf-8') as out:
+        def counted(rows):
+            nonlocal count
+            for row in rows:
+                count += 1
+                yield row
+        for chunk in csv_chunks(counted(fetch_rows(cursor, query, params)), EXPORT_SPECS[table]['columns']):
+            out.write(chunk)
+    cursor.close()
+
+    seconds = time.monotonic() - started
+    print(f"[OK] Wrote {count} rows in {seconds:.1f}s ({count / seconds if seconds else 0:.0f} rows/s)")
+    return count
+
+def parse_filters(args):
+    """Read --from=, --to= and --status= options into export_query() keywords"""
+    filters = {}
+    for arg in args:
+        name, _, value = arg.partition('=')
+        if name == '--from':
+            filters['date_from'] = date.fromisoformat(value)
+        elif name == '--to':
+            filters['date_to'] = date.fromisoformat(value)
+        elif name == '--status':
+            filters['status'] = value
+        else:
+            raise ValueError(f'unknown option {arg}')
+    return filters
+
+def main():
+    """Main function to run the export"""
+    print("=" * 50)
+    print("Delta Airlines - CSV Export")
+    print("=" * 50)
+
+    if len(sys.argv) < 3 or sys.argv[1] not in EXPORT_SPECS:
+        print(USAGE)
+        sys.exit(2)
+    try:
+        filters = parse_filters(sys.argv[3:])
+    except ValueError as e:
+        print(f"[ERROR] {e}")
+        print(USAGE)
+        sys.exit(2)
+
+    # Create connection
+    connection = create_connection()
+    if not connection:
+        sys.exit(1)
+
+    try:
+        export_file(connection, sys.argv[1], sys.argv[2], filters)
+    except Error as e:
+        print(f"[ERROR] Error during export: {e}")
+        sys.exit(1)
+    finally:
+        # Close connection
+        connection.close()
+
+    print("\n" + "=" * 50)
+    print("Export complete!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
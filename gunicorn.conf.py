@@ -0,0 +1,46 @@
+# Gunicorn settings (Procfile: gunicorn --config gunicorn.conf.py app:app).
+# The app is imported once in the master and workers are forked from it,
+# so they share its modules and compiled templates instead of each paying
+# the import and the first-render compile themselves. Anything a worker
+# must not inherit (open database sockets) is reset in post_fork.
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+wsgi_app = 'app:app'
+preload_app = True
+# Worker count comes from WEB_CONCURRENCY (gunicorn's default behaviour)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+
+# Threaded workers: with sync workers a process serves one request at a
+# time, so the bounded bcrypt pool (app/passwords.py) could never fill and
+# every login would hold its whole worker for the hash. The default gives
+# every hashing slot (running or queued) a request thread, plus a couple
+# more so other pages are still served while the slots are all taken and
+# further logins get a 503. Keep it within DB_POOL_MAX_SIZE, or requests
+# wait for a connection instead.
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS') or
+              int(os.getenv('BCRYPT_WORKERS', 2)) + int(os.getenv('BCRYPT_QUEUE_LIMIT', 4)) + 2)
+
+def when_ready(server):
+    """Compile every template in the master, so forked workers start warm"""
+    from app import app
+    from app.template_cache import warm_templates
+    count, seconds = warm_templates(app)
+    server.log.info("Compiled %d templates in %.0f ms", count, seconds * 1000)
+
+def post_fork(server, worker):
+    """Drop database state inherited from the master.
+
+    reset_pool() forgets pooled connections without closing them: a close
+    here would send QUIT down a socket the master (or a sibling) still owns.
+    """
+    from app.db_connect import reset_pool
+    reset_pool()
+
+def post_worker_init(worker):
+    """Open the worker's first connections before it takes requests"""
+    from app.db_connect import warm_pool
+    warm_pool()
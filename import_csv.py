@@ -0,0 +1,79 @@
+import mysql.connector
+from mysql.connector import Error
+import os
+import sys
+from dotenv import load_dotenv
+
+from app.blueprints.imports import IMPORT_CHUNK_SIZE, IMPORT_SPECS, import_rows
+
+# Load environment variables
+load_dotenv()
+
+USAGE = "Usage: python import_csv.py <customers|flights|bookings> <file.csv> [chunk_size]"
+
+def create_connection():
+    """Create database connection"""
+    try:
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306))
+        )
+        if connection.is_connected():
+            print("[OK] Successfully connected to the database")
+            return connection
+    except Error as e:
+        print(f"[ERROR] Error connecting to database: {e}")
+        return None
+
+def import_file(connection, table, path, chunk_size):
+    """Import one CSV file and print the report; return True if every row went in"""
+    print(f"\nImporting {path} into {table} ({chunk_size} rows per chunk)...")
+
+    with open(path, newline='', encoding='utf-8-sig') as stream:
+        report = import_rows(connection, table, stream, chunk_size)
+
+    for error in report['errors']:
+        print(f"[ERROR] line {error['line']}: {error['error']}")
+    if report['failed'] > len(report['errors']):
+        print(f"[ERROR] ... {report['failed'] - len(report['errors'])} more errors not shown")
+
+    print(f"\n[OK] Imported {report['inserted']} of {report['rows']} rows "
+          f"in {report['seconds']:.1f}s ({report['rows_per_second']:.0f} rows/s)")
+    if report['failed']:
+        print(f"[SKIP] {report['failed']} rows rejected")
+    return report['failed'] == 0
+
+def main():
+    """Main function to run the import"""
+    print("=" * 50)
+    print("Delta Airlines - Bulk CSV Import")
+    print("=" * 50)
+
+    if len(sys.argv) not in (3, 4) or sys.argv[1] not in IMPORT_SPECS:
+        print(USAGE)
+        sys.exit(2)
+    table, path = sys.argv[1], sys.argv[2]
+    chunk_size = int(sys.argv[3]) if len(sys.argv) == 4 else IMPORT_CHUNK_SIZE
+
+    # Create connection
+    connection = create_connection()
+    if not connection:
+        sys.exit(1)
+
+    ok = import_file(connection, table, path, chunk_size)
+
+    # Close connection
+    connection.close()
+
+    print("\n" + "=" * 50)
+    print("Import complete!" if ok else "Import finished with errors")
+    print("=" * 50)
+
+    if not ok:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
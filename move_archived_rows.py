@@ -0,0 +1,145 @@
+import mysql.connector
+from mysql.connector import Error
+import os
+import sys
+from dotenv import load_dotenv
+
+from app.archive_store import PRIMARY_KEYS, move_rows
+
+# Load environment variables
+load_dotenv()
+
+BATCH_SIZE = int(os.getenv('ARCHIVE_MIGRATION_BATCH_SIZE', 1000))
+
+# Children before parents, so a parent's archived children are already out
+# of the hot tables when its turn comes
+MIGRATION_ORDER = ['bookings', 'flights', 'customers', 'airports']
+
+# Archived rows still referenced by live rows cannot leave their table
+# (the foreign keys would break); they are left in place and reported
+STILL_REFERENCED = {
+    'bookings': None,
+    'flights': "EXISTS (SELECT 1 FROM bookings b WHERE b.flight_id = flights.flight_id)",
+    'customers': "EXISTS (SELECT 1 FROM bookings b WHERE b.customer_id = customers.customer_id)",
+    'airports': """EXISTS (SELECT 1 FROM flights f
+                           WHERE f.departure_airport_id = airports.airport_id
+                           OR f.arrival_airport_id = airports.airport_id)""",
+}
+
+def create_connection():
+    """Create database connection"""
+    try:
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306))
+        )
+        if connection.is_connected():
+            print("[OK] Successfully connected to the database")
+            return connection
+    except Error as e:
+        print(f"[ERROR] Error connecting to database: {e}")
+        return None
+
+def create_archive_tables(connection):
+    """Create <table>_archive for each table, with the same columns and non-unique indexes"""
+    cursor = connection.cursor()
+
+    print("\nCreating archive tables...")
+
+    for table in MIGRATION_ORDER:
+        cursor.execute("""
+            SELECT COUNT(*)
+            FROM INFORMATION_SCHEMA.TABLES
+            WHERE TABLE_SCHEMA = %s
+            AND TABLE_NAME = %s
+        """, (os.getenv('DB_NAME'), f'{table}_archive'))
+
+        if cursor.fetchone()[0] == 0:
+            cursor.execute(f"CREATE TABLE {table}_archive LIKE {table}")
+            print(f"[OK] Created {table}_archive")
+        else:
+            print(f"[SKIP] {table}_archive already exists")
+
+        # Unique keys (email, booking_reference, ...) only matter for live
+        # rows; a value can be reused once its old row is archived
+        cursor.execute("""
+            SELECT DISTINCT INDEX_NAME
+            FROM INFORMATION_SCHEMA.STATISTICS
+            WHERE TABLE_SCHEMA = %s
+            AND TABLE_NAME = %s
+            AND NON_UNIQUE = 0
+            AND INDEX_NAME <> 'PRIMARY'
+        """, (os.getenv('DB_NAME'), f'{table}_archive'))
+        for (index_name,) in cursor.fetchall():
+            cursor.execute(f"ALTER TABLE {table}_archive DROP INDEX {index_name}")
+            print(f"[OK] Dropped unique key {index_name} from {table}_archive")
+
+    cursor.close()
+
+def move_archived(connection, table):
+    """Move table's archived rows to <table>_archive in batches; return (moved, left)"""
+    pk = PRIMARY_KEYS[table]
+    query = f"SELECT {pk} FROM {table} WHERE is_archived = TRUE AND {pk} > %s"
+    if STILL_REFERENCED[table]:
+        query += f" AND NOT {STILL_REFERENCED[table]}"
+    query += f" ORDER BY {pk} LIMIT %s FOR UPDATE"
+
+    cursor = connection.cursor()
+    moved = 0
+    last_id = 0
+    while True:
+        # One short transaction per batch keeps lock time low
+        cursor.execute(query, (last_id, BATCH_SIZE))
+        ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            connection.rollback()
+            break
+        move_rows(cursor, table, f'{table}_archive', pk, ids)
+        connection.commit()
+        moved += len(ids)
+        last_id = ids[-1]
+        print(f"  {table}: {moved} rows moved", end='\r')
+
+    cursor.execute(f"SELECT COUNT(*) FROM {table} WHERE is_archived = TRUE")
+    left = cursor.fetchone()[0]
+    cursor.close()
+    return moved, left
+
+def main():
+    """Main function to run migration"""
+    print("=" * 50)
+    print("Delta Airlines - Move Archived Rows to Cold Tables")
+    print("=" * 50)
+
+    # Create connection
+    connection = create_connection()
+    if not connection:
+        sys.exit(1)
+
+    try:
+        create_archive_tables(connection)
+
+        print("\nMoving archived rows...")
+        for table in MIGRATION_ORDER:
+            moved, left = move_archived(connection, table)
+            print(f"[OK] {table}: moved {moved} archived rows to {table}_archive")
+            if left:
+                print(f"[SKIP] {table}: {left} archived rows are still referenced by live rows "
+                      f"and stay in {table}; archive those first and re-run")
+    except Error as e:
+        connection.rollback()
+        print(f"[ERROR] Error during migration: {e}")
+        sys.exit(1)
+    finally:
+        # Close connection
+        connection.close()
+
+    print("\n" + "=" * 50)
+    print("Migration complete! Set ARCHIVE_MODE=cold and restart the app.")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import mysql.connector
+from mysql.connector import Error
+import os
+from dotenv import load_dotenv
+
+from app.archive_store import COLD_ARCHIVE
+from app.counters import reconcile_counters
+
+# Load environment variables
+load_dotenv()
+
+def create_connection():
+    """Create database connection"""
+    try:
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306))
+        )
+        if connection.is_connected():
+            print("[OK] Successfully connected to the database")
+            return connection
+    except Error as e:
+        print(f"[ERROR] Error connecting to database: {e}")
+        return None
+
+def rebuild_stats_counters(connection):
+    """Create stats_counters if needed and rebuild it from the base tables"""
+    try:
+        cursor = connection.cursor()
+
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                counter_name VARCHAR(100) PRIMARY KEY,
+                counter_value DECIMAL(16, 2) NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+            )
+        """)
+        print("[OK] stats_counters table is present")
+
+        # Delete and re-insert in one transaction so readers never see it empty
+        reconcile_counters(cursor, cold_archive=COLD_ARCHIVE)
+        connection.commit()
+
+        cursor.execute("SELECT counter_name, counter_value FROM stats_counters ORDER BY counter_name")
+        for name, value in cursor.fetchall():
+            print(f"  {name}: {value}")
+        cursor.close()
+        print("\n[OK] Statistics counters rebuilt successfully!")
+
+    except Error as e:
+        connection.rollback()
+        print(f"[ERROR] Error rebuilding counters: {e}")
+
+def main():
+    """Main function to run the reconcile"""
+    print("=" * 50)
+    print("Delta Airlines - Reconcile Statistics Counters")
+    print("=" * 50)
+
+    # Create connection
+    connection = create_connection()
+    if not connection:
+        return
+
+    rebuild_stats_counters(connection)
+
+    # Close connection
+    connection.close()
+
+    print("\n" + "=" * 50)
+    print("Reconcile complete!")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
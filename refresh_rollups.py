@@ -0,0 +1,198 @@
+import mysql.connector
+from mysql.connector import Error
+import os
+import sys
+import time
+from dotenv import load_dotenv
+
+from app.rollups import ROLLUP_NAME, queue_changed_days, refresh_days
+
+# Load environment variables
+load_dotenv()
+
+BATCH_DAYS = int(os.getenv('ROLLUP_BATCH_DAYS', 7))
+# Rows stamped by transactions still open when a refresh starts are only
+# visible later; starting the next refresh this many seconds early picks
+# them up (recomputing a day twice is harmless)
+WATERMARK_LAG = int(os.getenv('ROLLUP_WATERMARK_LAG', 300))
+
+# Tables whose changes move rollup figures, and so need a change marker
+MARKED_TABLES = ['bookings', 'flights']
+
+ROLLUP_TABLES = {
+    'rollup_state': """
+        CREATE TABLE rollup_state (
+            rollup_name VARCHAR(50) PRIMARY KEY,
+            watermark DATETIME NOT NULL,
+            refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        )
+    """,
+    'rollup_pending_days': """
+        CREATE TABLE rollup_pending_days (
+            day DATE PRIMARY KEY
+        )
+    """,
+    'daily_route_revenue': """
+        CREATE TABLE daily_route_revenue (
+            day DATE NOT NULL,
+            departure_airport_id INT NOT NULL,
+            arrival_airport_id INT NOT NULL,
+            bookings INT NOT NULL,
+            priced INT NOT NULL,
+            revenue DECIMAL(16, 2) NOT NULL,
+            PRIMARY KEY (day, departure_airport_id, arrival_airport_id)
+        )
+    """,
+    'daily_status_counts': """
+        CREATE TABLE daily_status_counts (
+            day DATE NOT NULL,
+            departure_airport_id INT NOT NULL,
+            arrival_airport_id INT NOT NULL,
+            booking_status VARCHAR(20) NOT NULL,
+            bookings INT NOT NULL,
+            revenue DECIMAL(16, 2) NOT NULL,
+            PRIMARY KEY (day, departure_airport_id, arrival_airport_id, booking_status)
+        )
+    """,
+}
+
+def create_connection():
+    """Create database connection"""
+    try:
+        connection = mysql.connector.connect(
+            host=os.getenv('DB_HOST'),
+            user=os.getenv('DB_USER'),
+            password=os.getenv('DB_PASSWORD'),
+            database=os.getenv('DB_NAME'),
+            port=int(os.getenv('DB_PORT', 3306))
+        )
+        if connection.is_connected():
+            print("[OK] Successfully connected to the database")
+            return connection
+    except Error as e:
+        print(f"[ERROR] Error connecting to database: {e}")
+        return None
+
+def table_exists(cursor, table):
+    """Check whether table exists in the current database"""
+    cursor.execute("""
+        SELECT COUNT(*)
+        FROM INFORMATION_SCHEMA.TABLES
+        WHERE TABLE_SCHEMA = %s
+        AND TABLE_NAME = %s
+    """, (os.getenv('DB_NAME'), table))
+    return cursor.fetchone()[0] > 0
+
+def prepare_schema(connection):
+    """Add the updated_at change markers and create the rollup tables if needed"""
+    cursor = connection.cursor()
+
+    print("\nPreparing change markers...")
+    for base in MARKED_TABLES:
+        # Cold archive tables must keep the same column order as their hot table
+        for table in (base, f'{base}_archive'):
+            if not table_exists(cursor, table):
+                continue
+            cursor.execute("""
+                SELECT COUNT(*)
+                FROM INFORMATION_SCHEMA.COLUMNS
+                WHERE TABLE_SCHEMA = %s
+                AND TABLE_NAME = %s
+                AND COLUMN_NAME = 'updated_at'
+            """, (os.getenv('DB_NAME'), table))
+            if cursor.fetchone()[0] == 0:
+                cursor.execute(f"""
+                    ALTER TABLE {table}
+                    ADD COLUMN updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+                    ADD INDEX idx_{table}_updated_at (updated_at)
+                """)
+                print(f"[OK] Added updated_at to {table}")
+            else:
+                print(f"[SKIP] updated_at already exists in {table}")
+
+    print("\nPreparing rollup tables...")
+    for table, ddl in ROLLUP_TABLES.items():
+        if table_exists(cursor, table):
+            print(f"[SKIP] {table} already exists")
+        else:
+            cursor.execute(ddl)
+            print(f"[OK] Created {table}")
+
+    connection.commit()
+    cursor.close()
+
+def refresh(connection, full=False):
+    """Queue the days changed since the watermark, recompute them in batches and advance the watermark"""
+    cursor = connection.cursor()
+
+    cursor.execute("SELECT NOW() - INTERVAL %s SECOND", (WATERMARK_LAG,))
+    next_watermark = cursor.fetchone()[0]
+    cursor.execute("SELECT watermark FROM rollup_state WHERE rollup_name = %s", (ROLLUP_NAME,))
+    row = cursor.fetchone()
+    since = None if full or not row else row[0]
+
+    if since is None:
+        print("\nQueueing every booking day (full rebuild)...")
+        # Days whose bookings have all gone since still need clearing
+        cursor.execute("INSERT IGNORE INTO rollup_pending_days (day) SELECT DISTINCT day FROM daily_route_revenue")
+    else:
+        print(f"\nQueueing days changed since {since}...")
+    queue_changed_days(cursor, since)
+    connection.commit()
+
+    cursor.execute("SELECT COUNT(*) FROM rollup_pending_days")
+    pending = cursor.fetchone()[0]
+    print(f"[OK] {pending} days to refresh")
+
+    refreshed = 0
+    while True:
+        # One short transaction per batch of days
+        cursor.execute("SELECT day FROM rollup_pending_days ORDER BY day LIMIT %s", (BATCH_DAYS,))
+        days = [row[0] for row in cursor.fetchall()]
+        if not days:
+            break
+        refresh_days(cursor, days)
+        connection.commit()
+        refreshed += len(days)
+        print(f"  {refreshed}/{pending} days refreshed (through {days[-1]})", end='\r')
+
+    cursor.execute("""
+        INSERT INTO rollup_state (rollup_name, watermark) VALUES (%s, %s)
+        ON DUPLICATE KEY UPDATE watermark = VALUES(watermark), refreshed_at = NOW()
+    """, (ROLLUP_NAME, next_watermark))
+    connection.commit()
+    cursor.close()
+    return refreshed
+
+def main():
+    """Main function to run the refresh"""
+    print("=" * 50)
+    print("Delta Airlines - Refresh Daily Revenue Rollups")
+    print("=" * 50)
+
+    full = '--full' in sys.argv
+
+    # Create connection
+    connection = create_connection()
+    if not connection:
+        sys.exit(1)
+
+    started = time.monotonic()
+    try:
+        prepare_schema(connection)
+        refreshed = refresh(connection, full)
+    except Error as e:
+        connection.rollback()
+        print(f"[ERROR] Error refreshing rollups: {e}")
+        sys.exit(1)
+    finally:
+        # Close connection
+        connection.close()
+
+    print(f"\n[OK] Refreshed {refreshed} days in {time.monotonic() - started:.1f}s")
+    print("\n" + "=" * 50)
+    print("Refresh complete! Run this from cron, e.g. every 5 minutes.")
+    print("=" * 50)
+
+if __name__ == "__main__":
+    main()
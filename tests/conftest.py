@@ -0,0 +1,109 @@
+"""Shared pytest fixtures.
+
+The database is replaced by MagicMock connections (no MySQL needed):
+pymysql.connect() hands out fakes whose cursors answer each statement
+from fake_db['rules'], a list of (substring, rows) pairs matched in order
+against the SQL; statements nothing matches return no rows. Every
+statement run is recorded in fake_db['queries'] as (sql, params).
+"""
+import os
+import tempfile
+from unittest.mock import MagicMock
+
+import pytest
+
+# Keep shared-memory segments, metrics snapshots and profiles out of the
+# real directories (read when the app modules are imported)
+os.environ['SHARED_CACHE_DIR'] = tempfile.mkdtemp(prefix='app-tests-')
+os.environ['PROFILES_DIR'] = os.path.join(os.environ['SHARED_CACHE_DIR'], 'profiles')
+
+from app import app as flask_app, login_manager
+from app import db_connect, query_log
+from app.functions import _cache
+from app.models import User
+
+def _rows_for(fake_db, sql, params):
+    """Rows for a statement: the first rule whose substring appears in the SQL"""
+    for pattern, rows in fake_db['rules']:
+        if pattern in sql:
+            return list(rows(sql, params) if callable(rows) else rows)
+    return []
+
+def make_cursor(fake_db):
+    """A fake cursor answering from fake_db's rules"""
+    cursor = MagicMock()
+    cursor.rowcount = 0
+    cursor.lastrowid = 1
+    state = {'rows': []}
+
+    def execute(query, args=None):
+        sql = query.decode() if isinstance(query, bytes) else query
+        fake_db['queries'].append((sql, args))
+        state['rows'] = _rows_for(fake_db, sql, args)
+        cursor.rowcount = len(state['rows'])
+        return cursor.rowcount
+
+    def executemany(query, args):
+        fake_db['queries'].append((query, list(args)))
+        cursor.rowcount = len(fake_db['queries'][-1][1])
+        return cursor.rowcount
+
+    def fetchmany(size=1):
+        rows, state['rows'] = state['rows'][:size], state['rows'][size:]
+        return rows
+
+    def fetchall():
+        rows, state['rows'] = state['rows'], []
+        return rows
+
+    cursor.execute.side_effect = execute
+    cursor.executemany.side_effect = executemany
+    cursor.fetchone.side_effect = lambda: (fetchmany(1) or [None])[0]
+    cursor.fetchmany.side_effect = fetchmany
+    cursor.fetchall.side_effect = fetchall
+    return cursor
+
+def make_connection(fake_db):
+    """A fake PyMySQL connection whose cursors answer from fake_db's rules"""
+    conn = MagicMock()
+    conn._closed = False
+    conn.cursor.side_effect = lambda *args: make_cursor(fake_db)
+    fake_db['connections'].append(conn)
+    return conn
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Route every new database connection to a fake; returns its state dict"""
+    state = {'rules': [], 'queries': [], 'connections': []}
+    db_connect.reset_pool()
+    monkeypatch.setattr(db_connect.pymysql, 'connect', lambda **kwargs: make_connection(state))
+    _cache.clear()
+    yield state
+    db_connect.reset_pool()
+    _cache.clear()
+
+@pytest.fixture
+def app(fake_db):
+    """The Flask app, with a fake database"""
+    flask_app.testing = True
+    return flask_app
+
+@pytest.fixture
+def anonymous_client(app):
+    """A test client that is not logged in"""
+    return app.test_client()
+
+@pytest.fixture
+def client(app, monkeypatch):
+    """A test client logged in as an admin (the user loader never touches the database)"""
+    monkeypatch.setattr(login_manager, '_user_callback',
+                        lambda user_id: User(int(user_id), 'admin@example.com', 'Test', 'Admin', 'admin'))
+    test_client = app.test_client()
+    with test_client.session_transaction() as session:
+        session['_user_id'] = '1'
+    return test_client
+
+@pytest.fixture
+def strict_query_budgets(monkeypatch):
+    """Make a request over its view's @query_budget raise AssertionError instead of just printing"""
+    monkeypatch.setattr(query_log, 'QUERY_BUDGET_STRICT', True)
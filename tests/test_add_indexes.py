@@ -0,0 +1,56 @@
+"""add_indexes.py checks the queries the routes actually run and fails loudly."""
+import re
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip('mysql.connector')
+
+import add_indexes
+from app import routes
+
+def test_every_checked_alias_is_in_its_query():
+    for description, query, params, expected in add_indexes.QUERY_CHECKS:
+        for alias in expected:
+            assert re.search(rf'\b{alias}\b', query), f'{description}: {alias}'
+        if isinstance(params, list):
+            assert query.count('%s') == len(params), description
+
+def test_listing_checks_match_the_route_queries():
+    checks = {description: query for description, query, _, _ in add_indexes.QUERY_CHECKS}
+    assert checks['flights listing'].startswith(routes.FLIGHTS_LIST_QUERY)
+    assert 'JOIN airports' not in checks['flights listing']
+    assert checks['bookings archive'].startswith(routes.ARCHIVED_BOOKINGS_QUERY)
+
+def test_failed_index_creation_is_reported(monkeypatch):
+    cursor = MagicMock()
+    cursor.fetchone.return_value = (0,)
+
+    def execute(query, params=None):
+        if query.startswith('CREATE'):
+            raise add_indexes.Error('Duplicate key name')
+
+    cursor.execute.side_effect = execute
+    connection = MagicMock()
+    connection.cursor.return_value = cursor
+    assert add_indexes.add_indexes(connection) is False
+
+def test_full_scan_fails_the_check():
+    plan = [{'table': 'f', 'type': 'ALL', 'key': None, 'rows': 100000}]
+    assert not add_indexes.check_plan(plan, 'flights listing', {'f': 'idx_flights_active_departure'})
+    plan = [{'table': 'f', 'type': 'range', 'key': 'idx_flights_active_departure', 'rows': 51}]
+    assert add_indexes.check_plan(plan, 'flights listing', {'f': 'idx_flights_active_departure'})
+    assert not add_indexes.check_plan(plan, 'flights listing', {'b': None})
+
+def test_deeper_pages_must_range_scan():
+    assert 'flights listing, after' in add_indexes.RANGE_CHECKS
+    checks = {description: (query, params) for description, query, params, _ in add_indexes.QUERY_CHECKS}
+    query, params = checks['flights listing, after']
+    assert 'f.departure_time < %s OR (f.departure_time = %s AND (f.flight_id < %s))' in query
+    assert query.count('%s') == len(params)
+
+    plan = [{'table': 'f', 'type': 'index', 'key': 'idx_flights_active_departure', 'rows': 100000}]
+    expected = {'f': 'idx_flights_active_departure'}
+    assert not add_indexes.check_plan(plan, 'flights listing, after', expected, require_range=True)
+    plan = [{'table': 'f', 'type': 'range', 'key': 'idx_flights_active_departure', 'rows': 51}]
+    assert add_indexes.check_plan(plan, 'flights listing, after', expected, require_range=True)
@@ -0,0 +1,44 @@
+"""Bulk archive and restore by ids and filters."""
+import pytest
+
+def locked_ids(sql, params):
+    """lock_rows(): every requested id is still live"""
+    return [{'id': value} for value in params[:-1]]
+
+def cancelled_only(sql, params):
+    """The filter lookup: of the requested ids, only 2 is Cancelled"""
+    return [{'id': value} for value in params[1:-1] if value == 2]
+
+def archived_ids(fake_db):
+    """The ids each UPDATE ... SET is_archived = TRUE statement touched"""
+    return [params[1:] for sql, params in fake_db['queries'] if 'SET is_archived = TRUE' in sql]
+
+def test_ids_are_narrowed_by_the_filter(client, fake_db):
+    fake_db['rules'] += [
+        ('SELECT booking_status, price', [{'booking_status': 'Cancelled', 'price': 100}]),
+        ('FOR UPDATE', locked_ids),
+        ('booking_status = %s', cancelled_only),
+    ]
+    response = client.post('/bulk/archive/bookings', json={'ids': [1, 2, 3], 'status': 'Cancelled'})
+    assert response.status_code == 200
+    assert response.get_json()['affected'] == 1
+    assert archived_ids(fake_db) == [[2]]
+
+def test_no_matching_ids_archives_nothing(client, fake_db):
+    fake_db['rules'].append(('FOR UPDATE', locked_ids))
+    response = client.post('/bulk/archive/flights', json={'ids': [1, 2], 'before': '2020-01-01'})
+    assert response.status_code == 200
+    assert response.get_json()['affected'] == 0
+    assert archived_ids(fake_db) == []
+
+def test_ids_alone_archive_every_listed_row(client, fake_db):
+    fake_db['rules'].append(('FOR UPDATE', locked_ids))
+    response = client.post('/bulk/archive/flights', json={'ids': [3, 1, 2]})
+    assert response.get_json()['affected'] == 3
+    assert archived_ids(fake_db) == [[1, 2, 3]]
+
+@pytest.mark.parametrize('payload', [[1, 2], '1,2', 5])
+def test_payload_that_is_not_an_object_is_400(client, fake_db, payload):
+    response = client.post('/bulk/archive/flights', json=payload)
+    assert response.status_code == 400
+    assert archived_ids(fake_db) == []
@@ -0,0 +1,37 @@
+"""The response compression middleware."""
+import sys
+import zlib
+
+from app.compression import compress_responses
+
+def run(wsgi_app, accept_encoding='gzip'):
+    """Call a WSGI app; return (status, headers dict, body bytes)"""
+    sent = {}
+
+    def start_response(status, headers, exc_info=None):
+        sent.update(status=status, headers=dict(headers))
+
+    body = b''.join(wsgi_app({'HTTP_ACCEPT_ENCODING': accept_encoding, 'REQUEST_METHOD': 'GET'}, start_response))
+    return sent['status'], sent['headers'], body
+
+def test_html_is_gzipped():
+    def app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/html; charset=utf-8')])
+        return [b'<p>hello</p>' * 200]
+
+    status, headers, body = run(compress_responses(app, min_size=100))
+    assert status == '200 OK'
+    assert headers['Content-Encoding'] == 'gzip'
+    assert zlib.decompress(body, 31) == b'<p>hello</p>' * 200
+
+def test_error_response_before_any_headers_is_passed_through():
+    def app(environ, start_response):
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            start_response('500 INTERNAL SERVER ERROR', [('Content-Type', 'text/plain')], sys.exc_info())
+        return [b'Internal Server Error']
+
+    status, headers, body = run(compress_responses(app, min_size=100))
+    assert status == '500 INTERNAL SERVER ERROR'
+    assert body == b'Internal Server Error'
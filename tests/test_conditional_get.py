@@ -0,0 +1,33 @@
+"""Listing pages revalidate on their ETag alone."""
+from datetime import datetime
+
+from app import login_manager
+from app.models import User
+
+VERSIONS = ('FROM stats_counters', [
+    {'counter_name': 'version:customers', 'counter_value': 7, 'updated_at': datetime(2025, 1, 1)},
+])
+
+def test_matching_etag_is_304(client, fake_db):
+    fake_db['rules'].append(VERSIONS)
+    first = client.get('/customers')
+    assert first.status_code == 200
+    assert first.headers['ETag']
+    assert 'Last-Modified' not in first.headers
+
+    again = client.get('/customers', headers={'If-None-Match': first.headers['ETag']})
+    assert again.status_code == 304
+
+def test_if_modified_since_alone_is_ignored(client, fake_db):
+    fake_db['rules'].append(VERSIONS)
+    response = client.get('/customers', headers={'If-Modified-Since': 'Fri, 01 Jan 2100 00:00:00 GMT'})
+    assert response.status_code == 200
+
+def test_role_change_gets_a_fresh_page(client, fake_db, monkeypatch):
+    fake_db['rules'].append(VERSIONS)
+    etag = client.get('/customers').headers['ETag']
+
+    monkeypatch.setattr(login_manager, '_user_callback',
+                        lambda user_id: User(int(user_id), 'admin@example.com', 'Test', 'Admin', 'staff'))
+    response = client.get('/customers', headers={'If-None-Match': etag})
+    assert response.status_code == 200
@@ -0,0 +1,45 @@
+"""Writers update stats_counters in one statement, in counter-name order."""
+from decimal import Decimal
+
+def counter_writes(fake_db):
+    """(names, values) of each stats_counters upsert, in the order they ran"""
+    writes = []
+    for sql, params in fake_db['queries']:
+        if 'INSERT INTO stats_counters' in sql:
+            writes.append((params[0::2], params[1::2]))
+    return writes
+
+BOOKING_FORM = {
+    'booking_reference': 'ABC123', 'customer_id': '1', 'flight_id': '1',
+    'seat_number': '12A', 'booking_status': 'Confirmed', 'price': '250.00',
+}
+
+def test_add_booking_bumps_counters_once_in_name_order(client, fake_db):
+    fake_db['rules'].append(('SELECT booking_status, price FROM bookings',
+                             [{'booking_status': 'Confirmed', 'price': Decimal('250.00')}]))
+    assert client.post('/bookings/add', data=BOOKING_FORM).status_code == 302
+
+    writes = counter_writes(fake_db)
+    assert len(writes) == 1
+    names, values = writes[0]
+    assert names == sorted(names)
+    assert dict(zip(names, values)) == {
+        'bookings_active': 1, 'bookings_priced': 1, 'bookings_revenue': Decimal('250.00'),
+        'status_count:Confirmed': 1, 'status_revenue:Confirmed': Decimal('250.00'), 'version:bookings': 1,
+    }
+
+def test_archive_booking_bumps_counters_once_in_name_order(client, fake_db):
+    fake_db['rules'].append(('FOR UPDATE', lambda sql, params: (
+        [{'booking_status': 'Pending', 'price': Decimal('99.50')}] if 'booking_status' in sql else [{'id': 7}]
+    )))
+    assert client.post('/bookings/delete/7').status_code == 302
+
+    writes = counter_writes(fake_db)
+    assert len(writes) == 1
+    names, values = writes[0]
+    assert names == sorted(names)
+    assert dict(zip(names, values)) == {
+        'bookings_active': -1, 'bookings_archived': 1, 'bookings_priced': -1,
+        'bookings_revenue': Decimal('-99.50'), 'status_count:Pending': -1,
+        'status_revenue:Pending': Decimal('-99.50'), 'version:bookings': 1,
+    }
@@ -0,0 +1,21 @@
+"""Streaming CSV exports."""
+from app import db_connect
+
+def test_export_streams_the_rows(client, fake_db):
+    fake_db['rules'].append(('FROM flights', [{
+        'flight_id': 1, 'flight_number': 'DL100', 'departure_code': 'ATL', 'departure_city': 'Atlanta',
+        'arrival_code': 'JFK', 'arrival_city': 'New York', 'departure_time': '2025-01-01 08:00:00',
+        'arrival_time': '2025-01-01 11:00:00', 'aircraft_type': 'Boeing 737', 'status': 'Scheduled',
+        'gate': 'A12',
+    }]))
+    response = client.get('/export/flights.csv')
+    assert response.status_code == 200
+    lines = response.data.decode().splitlines()
+    assert lines[0].startswith('flight_id,flight_number')
+    assert lines[1].startswith('1,DL100,ATL')
+
+def test_export_without_database_is_503(client, fake_db, monkeypatch):
+    monkeypatch.setattr(db_connect, '_checkout', lambda: None)
+    response = client.get('/export/bookings.csv')
+    assert response.status_code == 503
+    assert b'booking_id' not in response.data
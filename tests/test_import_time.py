@@ -0,0 +1,52 @@
+"""Cold-start budget for "import app".
+
+Every gunicorn master (or every worker without preload_app) pays this
+before serving. Measured under -X importtime in a fresh interpreter, best
+of a few runs so a busy machine does not fail the check.
+"""
+import os
+import subprocess
+import sys
+
+# Milliseconds; the same variable as in .env.example
+IMPORT_TIME_BUDGET_MS = float(os.getenv('IMPORT_TIME_BUDGET_MS', 1000))
+RUNS = 3
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure_imports(module='app'):
+    """Import module in a fresh interpreter under -X importtime; return {module: (self_us, cumulative_us)}"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stderr.strip().splitlines()[-1]
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings[name.strip()] = (int(self_us), int(cumulative_us))
+    return timings
+
+def slowest_packages(timings, top=10):
+    """The packages with the most self time, for the failure message"""
+    by_package = {}
+    for name, (self_us, _) in timings.items():
+        package = name.split('.')[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    ranked = sorted(by_package.items(), key=lambda item: -item[1])[:top]
+    return ', '.join(f'{package} {self_us / 1000:.0f} ms' for package, self_us in ranked)
+
+def test_import_app_is_within_budget():
+    timings = min((measure_imports() for _ in range(RUNS)), key=lambda run: run['app'][1])
+    total_ms = timings['app'][1] / 1000
+    assert total_ms <= IMPORT_TIME_BUDGET_MS, (
+        f'import app took {total_ms:.0f} ms, over the {IMPORT_TIME_BUDGET_MS:.0f} ms budget; '
+        f'slowest: {slowest_packages(timings)}')
+
+def test_analytics_libraries_load_on_first_use():
+    timings = measure_imports()
+    assert 'pandas' not in timings
+    assert 'numpy' not in timings
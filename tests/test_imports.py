@@ -0,0 +1,58 @@
+"""Web CSV imports stay inside the request timeout."""
+import io
+
+from app.blueprints import imports
+
+HEADER = 'first_name,last_name,email,phone,frequent_flyer_number,date_of_birth\n'
+
+def customers_csv(rows):
+    lines = [f'First{i},Last{i},c{i}@example.com,,,\n' for i in range(rows)]
+    return (HEADER + ''.join(lines)).encode()
+
+def upload(client, body, **kwargs):
+    return client.post('/import', data={'table': 'customers', 'file': (io.BytesIO(body), 'customers.csv')},
+                       content_type='multipart/form-data', **kwargs)
+
+def inserts(fake_db):
+    return [sql for sql, _ in fake_db['queries'] if sql.startswith('INSERT INTO customers')]
+
+def test_too_many_rows_is_sent_to_the_cli(client, fake_db, monkeypatch):
+    monkeypatch.setattr(imports, 'IMPORT_MAX_ROWS', 3)
+    response = upload(client, customers_csv(4), follow_redirects=True)
+    assert b'python import_csv.py customers' in response.data
+    assert not inserts(fake_db)
+
+def test_too_many_bytes_is_sent_to_the_cli(client, fake_db, monkeypatch):
+    monkeypatch.setattr(imports, 'IMPORT_MAX_BYTES', 100)
+    response = upload(client, customers_csv(10), follow_redirects=True)
+    assert b'too large to import' in response.data
+    assert not inserts(fake_db)
+
+def test_chunked_upload_over_the_byte_cap_is_sent_to_the_cli(client, fake_db, monkeypatch):
+    monkeypatch.setattr(imports, 'IMPORT_MAX_BYTES', 100)
+    body = (b'--x\r\nContent-Disposition: form-data; name="table"\r\n\r\ncustomers\r\n'
+            b'--x\r\nContent-Disposition: form-data; name="file"; filename="customers.csv"\r\n\r\n'
+            + customers_csv(10) + b'\r\n--x--\r\n')
+    # No usable Content-Length: the body arrives chunked through a server
+    # (like gunicorn) that terminates the input stream
+    response = client.post('/import', input_stream=io.BytesIO(body), follow_redirects=True, headers={
+        'Content-Type': 'multipart/form-data; boundary=x', 'Transfer-Encoding': 'chunked',
+    }, environ_overrides={'wsgi.input_terminated': True})
+    assert b'too large to import' in response.data
+    assert not inserts(fake_db)
+
+def test_rows_within_the_limits_are_imported(client, fake_db, monkeypatch):
+    monkeypatch.setattr(imports, 'IMPORT_MAX_ROWS', 3)
+    response = upload(client, customers_csv(3))
+    assert response.status_code == 200
+    assert b'Imported 3 of 3 customers rows' in response.data
+    assert len(inserts(fake_db)) == 1
+
+def test_long_import_stops_and_reports_progress(client, fake_db, monkeypatch):
+    monkeypatch.setattr(imports, 'IMPORT_CHUNK_SIZE', 2)
+    monkeypatch.setattr(imports, 'IMPORT_TIME_LIMIT', 0)
+    response = upload(client, customers_csv(5))
+    assert response.status_code == 200
+    # One chunk of two rows (header on line 1), then the time limit
+    assert b'Stopped after 0s at line 3: imported 2 of the 2 customers rows read so far.' in response.data
+    assert len(inserts(fake_db)) == 1
@@ -0,0 +1,59 @@
+"""get_db() checks a connection out on first use only, once per request."""
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from app import db_connect
+
+from conftest import make_connection
+
+@pytest.fixture
+def checkouts(fake_db, monkeypatch):
+    """Count pool checkouts; returns a list that grows by one per checkout"""
+    counted = []
+
+    def checkout():
+        counted.append(1)
+        now = time.monotonic()
+        return {'conn': make_connection(fake_db), 'created_at': now, 'last_used': now}
+
+    monkeypatch.setattr(db_connect, '_checkout', checkout)
+    return counted
+
+@pytest.mark.parametrize('url, status, expected', [
+    # Logged in, so these redirect to the dashboard
+    ('/', 302, 0),
+    ('/login', 302, 0),
+    ('/about', 200, 0),
+    ('/static/assets/css/style.css', 200, 0),
+    ('/dashboard', 200, 1),
+    ('/customers', 200, 1),
+    ('/flights', 200, 1),
+])
+def test_checkouts_per_route(client, checkouts, url, status, expected):
+    response = client.get(url)
+    response.close()
+    assert response.status_code == status
+    assert len(checkouts) == expected
+
+def test_anonymous_pages_skip_the_pool(anonymous_client, checkouts):
+    for url in ('/', '/login', '/about'):
+        assert anonymous_client.get(url).status_code == 200
+    assert checkouts == []
+
+def test_connection_is_reused_within_a_request(app, checkouts):
+    with app.test_request_context('/'):
+        first = db_connect.get_db()
+        assert db_connect.get_db() is first
+        db_connect.close_db()
+    assert len(checkouts) == 1
+
+def test_stored_procedure_calls_are_timed(monkeypatch):
+    seen = []
+    monkeypatch.setitem(db_connect._listeners, 'query', [lambda query, seconds: seen.append(query)])
+    conn = db_connect._instrument(MagicMock())
+    cursor = conn.cursor()
+    cursor.execute("SELECT 1")
+    cursor.callproc('refresh_rollups', (1,))
+    assert seen == ["SELECT 1", 'CALL refresh_rollups()']
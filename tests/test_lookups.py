@@ -0,0 +1,21 @@
+"""Typeahead lookups only ever consider live rows."""
+import re
+
+import pytest
+
+def union_branches(sql):
+    """The SELECTs inside the UNION of matching ids"""
+    return re.findall(r'\(SELECT (.*?)\)\s*(?:UNION|\) matches)', sql, re.S)
+
+@pytest.mark.parametrize('url, branch_count', [
+    ('/api/customers/search?q=sm', 4),
+    ('/api/flights/search?q=DL1', 3),
+])
+def test_every_union_branch_skips_archived_rows(client, fake_db, url, branch_count):
+    assert client.get(url).status_code == 200
+
+    sql = next(sql for sql, _ in fake_db['queries'] if ') matches' in sql)
+    branches = union_branches(sql)
+    assert len(branches) == branch_count
+    for branch in branches:
+        assert 'is_archived = FALSE' in branch, branch
@@ -0,0 +1,47 @@
+"""Keyset pagination cursors (?after= / ?before=)."""
+import base64
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from app.functions import decode_cursor, encode_cursor, keyset_condition
+
+def token(values):
+    """A cursor token holding arbitrary JSON, as a tampered URL could"""
+    raw = json.dumps(values).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+def test_cursor_round_trip():
+    values = [datetime(2025, 1, 2, 3, 4, 5), Decimal('12.50'), 'Lee', 42]
+    assert decode_cursor(encode_cursor(values), 4) == values
+
+@pytest.mark.parametrize('values', [
+    [[1], {'x': 1}],
+    [{'dt': '2025-01-01', 'x': 1}, 1],
+    [{'dec': 5}, 1],
+    [True, 1],
+    [None, 1],
+    {'a': 1},
+])
+def test_malformed_cursor_is_ignored(values):
+    assert decode_cursor(token(values), 2) is None
+
+def test_keyset_condition_is_expanded():
+    condition, params = keyset_condition(['a', 'b', 'c'], [1, 2, 3], '<')
+    assert condition == ' AND (a < %s OR (a = %s AND (b < %s OR (b = %s AND (c < %s)))))'
+    assert params == [1, 1, 2, 2, 3]
+
+def test_malformed_cursor_shows_the_first_page(client, fake_db):
+    response = client.get('/customers?after=' + token([[1], {'x': 1}]))
+    assert response.status_code == 200
+    sql, params = next((sql, params) for sql, params in fake_db['queries'] if 'FROM customers' in sql)
+    assert 'last_name >' not in sql
+    assert params == [51]
+
+def test_next_page_uses_the_expanded_predicate(client, fake_db):
+    client.get('/customers?after=' + encode_cursor(['Lee', 'Ann', 7]))
+    sql, params = next((sql, params) for sql, params in fake_db['queries'] if 'FROM customers' in sql)
+    assert 'last_name > %s OR (last_name = %s AND (first_name > %s' in sql
+    assert params == ['Lee', 'Lee', 'Ann', 'Ann', 7, 51]
@@ -0,0 +1,49 @@
+"""Logins are turned away with a 503 once every hashing slot is taken."""
+import os
+import runpy
+import threading
+
+import bcrypt
+
+from app import passwords
+
+PASSWORD = 'correct horse'
+EMPLOYEE = {
+    'employee_id': 1, 'email': 'admin@example.com', 'first_name': 'Test', 'last_name': 'Admin',
+    'role': 'admin', 'password': bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(rounds=4)).decode(),
+}
+
+def login(client):
+    return client.post('/login', data={'email': EMPLOYEE['email'], 'password': PASSWORD})
+
+def test_full_hashing_queue_returns_503(anonymous_client, fake_db, monkeypatch):
+    fake_db['rules'].append(('FROM employees WHERE email', [EMPLOYEE]))
+    # Keep the test hash's cost, so a successful login does not rehash
+    monkeypatch.setattr(passwords, 'BCRYPT_ROUNDS', 4)
+
+    release = threading.Event()
+    slots = passwords.BCRYPT_WORKERS + passwords.BCRYPT_QUEUE_LIMIT
+    held = [passwords._submit(release.wait) for _ in range(slots)]
+    try:
+        assert all(future is not None for future in held)
+        rejected_before = passwords.password_stats()['rejected']
+
+        response = login(anonymous_client)
+        assert response.status_code == 503
+        assert response.headers['Retry-After'] == '2'
+        assert passwords.password_stats()['rejected'] == rejected_before + 1
+    finally:
+        release.set()
+        for future in held:
+            future.result(timeout=5)
+
+    # With the slots free again the same login goes through
+    response = login(anonymous_client)
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/dashboard')
+
+def test_gunicorn_threads_cover_every_hashing_slot(monkeypatch):
+    monkeypatch.delenv('GUNICORN_THREADS', raising=False)
+    config = runpy.run_path(os.path.join(os.path.dirname(__file__), '..', 'gunicorn.conf.py'))
+    assert config['worker_class'] == 'gthread'
+    assert config['threads'] > passwords.BCRYPT_WORKERS + passwords.BCRYPT_QUEUE_LIMIT
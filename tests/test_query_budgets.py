@@ -0,0 +1,86 @@
+"""Every @query_budget view stays within its budget with a page of rows.
+
+Three rows per listing are enough to catch an N+1: one extra query per
+row takes any of these views over its budget, and strict_query_budgets
+turns that into a failure.
+"""
+from datetime import date, datetime
+
+import pytest
+
+from app import routes
+from app.airport_cache import AIRPORT_COLUMNS
+
+pytestmark = pytest.mark.usefixtures('strict_query_budgets')
+
+def fake_row(i):
+    """One row with every column any listing, export or lookup reads"""
+    when = datetime(2025, 1, i, 8, 0)
+    return {
+        'flight_id': i, 'flight_number': f'DL{i}', 'departure_airport_id': 1, 'arrival_airport_id': 2,
+        'departure_time': when, 'arrival_time': when, 'aircraft_type': 'Boeing 737', 'status': 'Scheduled',
+        'gate': 'A1', 'departure_code': 'ATL', 'arrival_code': 'JFK', 'departure_city': 'Atlanta',
+        'arrival_city': 'New York', 'booked': 120,
+        'customer_id': i, 'first_name': 'Ann', 'last_name': 'Lee', 'email': f'ann{i}@example.com',
+        'phone': '555-0100', 'frequent_flyer_number': f'FF{i}', 'date_of_birth': date(1980, 1, 1),
+        'airport_id': i, 'airport_code': 'ATL', 'airport_name': 'Hartsfield-Jackson', 'city': 'Atlanta',
+        'state': 'GA', 'country': 'USA', 'timezone': 'America/New_York',
+        'booking_id': i, 'booking_reference': f'REF{i}', 'booking_date': when, 'seat_number': '1A',
+        'booking_status': 'Confirmed', 'price': 100,
+        'day': when.date(), 'bookings': 3, 'priced': 3, 'revenue': 300,
+        'created_at': when, 'is_archived': 0, 'archived_at': when, 'archived_by': 1, 'archived_by_name': 'Test',
+    }
+
+ROWS = [fake_row(i) for i in (1, 2, 3)]
+AIRPORTS = [{column: row[column] for column in AIRPORT_COLUMNS.split(', ')} for row in ROWS]
+
+@pytest.fixture
+def rows(fake_db):
+    """Answer every listing, export, lookup and analytics query with three rows"""
+    fake_db['rules'] += [
+        ('FROM stats_counters', []),
+        (AIRPORT_COLUMNS, AIRPORTS),
+        ('LIMIT', ROWS),
+        ('FROM daily_route_revenue', ROWS),
+        ('FROM flights', ROWS),
+        ('FROM bookings', ROWS),
+    ]
+    return fake_db
+
+@pytest.mark.parametrize('url', [
+    '/dashboard',
+    '/flights',
+    '/flights?stream=1',
+    '/customers',
+    '/airports',
+    '/bookings',
+    '/archive',
+    '/archive/flights',
+    '/archive/customers',
+    '/archive/airports',
+    '/archive/bookings',
+    '/analytics',
+    '/api/analytics',
+    '/api/customers/search?q=lee',
+    '/api/flights/search?q=DL1',
+    '/export/bookings.csv',
+    '/export/flights.csv',
+])
+def test_view_is_within_its_query_budget(client, rows, url):
+    # Streamed bodies are counted when the response is closed
+    response = client.get(url)
+    response.get_data()
+    response.close()
+    assert response.status_code == 200
+
+def test_extra_query_per_row_fails(client, rows, monkeypatch):
+    read_versions = routes.read_versions
+
+    def read_versions_n_plus_one(cursor, tables):
+        for row in ROWS:
+            cursor.execute("SELECT * FROM customers WHERE customer_id = %s", [row['customer_id']])
+        return read_versions(cursor, tables)
+
+    monkeypatch.setattr(routes, 'read_versions', read_versions_n_plus_one)
+    with pytest.raises(AssertionError, match='Query budget exceeded in customers'):
+        client.get('/customers')
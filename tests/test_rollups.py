@@ -0,0 +1,41 @@
+"""Pages that read the daily rollups before refresh_rollups.py has ever run."""
+import os
+import re
+from datetime import datetime
+
+import pymysql
+import pytest
+
+def no_rollup_table(sql, params):
+    raise pymysql.err.ProgrammingError(1146, "Table 'delta.daily_route_revenue' doesn't exist")
+
+@pytest.mark.parametrize('url', ['/dashboard', '/analytics', '/api/analytics'])
+def test_missing_rollup_table_is_empty_not_500(client, fake_db, url):
+    fake_db['rules'] += [('FROM daily_route_revenue', no_rollup_table), ('FROM rollup_state', no_rollup_table)]
+    assert client.get(url).status_code == 200
+
+def test_analytics_shows_when_the_rollup_was_refreshed(client, fake_db):
+    fake_db['rules'].append(('FROM rollup_state', [{'watermark': datetime(2025, 1, 2, 3, 4, 5)}]))
+    assert client.get('/api/analytics').get_json()['rollup_as_of'] == '2025-01-02 03:04'
+    assert b'as of 2025-01-02 03:04' in client.get('/analytics').data
+
+def test_other_database_errors_still_fail(client, fake_db):
+    def syntax_error(sql, params):
+        raise pymysql.err.ProgrammingError(1064, 'You have an error in your SQL syntax')
+
+    fake_db['rules'].append(('FROM daily_route_revenue', syntax_error))
+    with pytest.raises(pymysql.err.ProgrammingError):
+        client.get('/api/analytics')
+
+def test_schema_creates_the_rollup_tables():
+    pytest.importorskip('mysql.connector')
+    import refresh_rollups
+
+    schema_path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'database_schema.sql')
+    with open(schema_path, encoding='utf-8') as f:
+        schema = ' '.join(f.read().split())
+    for table, ddl in refresh_rollups.ROLLUP_TABLES.items():
+        columns = ' '.join(ddl.split()).replace(f'CREATE TABLE {table}', f'CREATE TABLE IF NOT EXISTS {table}')
+        assert columns in schema, table
+    for table in refresh_rollups.MARKED_TABLES:
+        assert re.search(rf'CREATE TABLE IF NOT EXISTS {table} \([^;]*updated_at TIMESTAMP', schema), table
@@ -0,0 +1,31 @@
+"""The ?q= search box on the listing pages."""
+import pytest
+
+def listing_query(fake_db, table):
+    """The paginated SELECT a listing page ran"""
+    return next(sql for sql, _ in fake_db['queries'] if f'FROM {table}' in sql and 'LIMIT' in sql)
+
+@pytest.mark.parametrize('url, table', [
+    ('/customers', 'customers'),
+    ('/airports', 'airports'),
+    ('/flights', 'flights'),
+    ('/bookings', 'bookings'),
+])
+def test_search_uses_fulltext_match(client, fake_db, url, table):
+    assert client.get(url + '?q=smith').status_code == 200
+    assert 'AGAINST' in listing_query(fake_db, table)
+
+@pytest.mark.parametrize('url, table', [
+    ('/customers', 'customers'),
+    ('/flights', 'flights'),
+])
+def test_too_short_search_returns_no_rows(client, fake_db, url, table):
+    response = client.get(url + '?q=a+b')
+    assert response.status_code == 200
+    assert 'AND FALSE' in listing_query(fake_db, table)
+    assert b'Search terms must be at least 2 characters long.' in response.data
+
+def test_empty_search_lists_everything(client, fake_db):
+    assert client.get('/customers?q=+').status_code == 200
+    sql = listing_query(fake_db, 'customers')
+    assert 'AGAINST' not in sql and 'AND FALSE' not in sql